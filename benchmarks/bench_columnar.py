@@ -0,0 +1,116 @@
+"""
+Storage and parse-time comparison of row and columnar review results.
+
+Builds reviews whose results look like typical extraction output (a dozen
+columns of short strings, numbers, booleans and nulls) and measures, for the
+row form and the columnar form of src/columnar.py:
+
+* storage: BSON size of the stored review document;
+* transfer: JSON size of the GET /reviews/{id} response (format=rows vs columnar);
+* read: bson.decode plus Review.model_validate of the stored document;
+* client parse: json.loads of the response body.
+
+No MongoDB is needed. Results are printed as JSON.
+
+Usage:
+    python benchmarks/bench_columnar.py --rows 100 1000 5000 --columns 12 --repeat 5
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bson
+
+from main import columnar_results
+from src.columnar import encode_results
+from src.models import Review
+from src.responses import ModelJSONResponse
+
+COLUMN_NAMES = [
+    "document_id", "title", "author", "published_at", "relevance_score", "confidence",
+    "is_relevant", "category", "summary", "page_count", "language", "reviewer_note",
+]
+
+
+def make_review(rows: int, columns: int, rng: random.Random) -> dict:
+    names = (COLUMN_NAMES * (columns // len(COLUMN_NAMES) + 1))[:columns]
+    names = [name if i < len(COLUMN_NAMES) else f"{name}_{i}" for i, name in enumerate(names)]
+    generators = [
+        lambda j: f"doc_{j:06d}",
+        lambda j: f"Document title {j}",
+        lambda j: rng.choice(["A. Smith", "B. Jones", "C. Lee", None]),
+        lambda j: f"2024-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+        lambda j: round(rng.random(), 4),
+        lambda j: round(rng.random(), 2),
+        lambda j: rng.random() > 0.5,
+        lambda j: rng.choice(["legal", "finance", "medical", "other"]),
+        lambda j: "Short extracted summary " * rng.randint(1, 3),
+        lambda j: rng.randint(1, 400),
+        lambda j: rng.choice(["en", "de", "fr"]),
+        lambda j: None,
+    ]
+    results = [
+        {name: generators[i % len(generators)](j) for i, name in enumerate(names)}
+        for j in range(rows)
+    ]
+    return Review(
+        id="review_1",
+        user_id="user_1",
+        name="Benchmark review",
+        fields=[{"name": name} for name in names],
+        results=results,
+    ).model_dump(exclude={"runs"})
+
+
+def best_ms(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+def measure(rows: int, columns: int, repeat: int) -> dict:
+    rng = random.Random(rows)
+    row_doc = make_review(rows, columns, rng)
+    columnar_doc = encode_results(row_doc)
+    row_bson, columnar_bson = bson.encode(row_doc), bson.encode(columnar_doc)
+
+    review = Review.model_validate(row_doc)
+    row_json = ModelJSONResponse(review).body
+    columnar_json = ModelJSONResponse(columnar_results(review)).body
+    if Review.model_validate(bson.decode(columnar_bson)).results != review.results:
+        raise RuntimeError("Columnar round trip changed the results")
+
+    return {
+        "rows": rows,
+        "columns": columns,
+        "storage_bytes": {"rows": len(row_bson), "columnar": len(columnar_bson), "ratio": round(len(columnar_bson) / len(row_bson), 3)},
+        "transfer_bytes": {"rows": len(row_json), "columnar": len(columnar_json), "ratio": round(len(columnar_json) / len(row_json), 3)},
+        "read_ms": {
+            "rows": best_ms(lambda: Review.model_validate(bson.decode(row_bson)), repeat),
+            "columnar": best_ms(lambda: Review.model_validate(bson.decode(columnar_bson)), repeat),
+            "columnar_decode_only": best_ms(lambda: bson.decode(columnar_bson), repeat),
+        },
+        "client_parse_ms": {
+            "rows": best_ms(lambda: json.loads(row_json), repeat),
+            "columnar": best_ms(lambda: json.loads(columnar_json), repeat),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 5000], help="Result rows per review")
+    parser.add_argument("--columns", type=int, default=12, help="Columns per row")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per measurement")
+    args = parser.parse_args()
+    print(json.dumps([measure(rows, args.columns, args.repeat) for rows in args.rows], indent=2))
@@ -0,0 +1,491 @@
+"""
+Endpoint latency benchmark for the API in main.py.
+
+Seeds a configurable dataset into a throwaway database, drives every route
+with concurrent requests through the ASGI app in-process, and prints
+throughput and p50/p95/p99 latency per endpoint as JSON so runs can be
+compared across commits.
+
+MongoDB is taken from --uri. Without it, a temporary mongod is spawned when
+one is on PATH; otherwise the benchmark stops with an error. The seeded
+database is dropped at the end.
+
+Usage:
+    python benchmarks/bench_endpoints.py --users 20 --collections 5 --documents 200 \\
+        --reviews 5 --runs 10 --rows 50 --requests 200 --concurrency 20 --output bench.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NDJSON = {"Accept": "application/x-ndjson"}
+BULK_SIZE = 10
+# A typical results-table view: a filter, a sort and the first page.
+RESULTS_QUERY = {
+    "filters": [{"column": "score", "op": "gte", "value": 1}],
+    "sort": [{"column": "score", "direction": "desc"}],
+    "limit": 20,
+}
+
+
+class Endpoint(NamedTuple):
+    """A route to drive: build(i, data) returns the URL and httpx request kwargs for request i."""
+    method: str
+    path: str
+    build: Callable[[int, Dict[str, Any]], tuple]
+    name: str = ""
+
+
+def pick(items: List[str], i: int) -> str:
+    return items[i % len(items)]
+
+
+def user_doc(user_id: str) -> dict:
+    return {"id": user_id, "name": f"User {user_id}", "email": f"{user_id}@bench.local", "password": "secret"}
+
+
+def review_doc(review_id: str, user_id: str, collection_ids: List[str], rows: int) -> dict:
+    return {
+        "id": review_id,
+        "user_id": user_id,
+        "name": f"Review {review_id}",
+        "prompt": "Summarise the document",
+        "collection_ids": collection_ids,
+        "fields": [{"name": "title"}, {"name": "score"}, {"name": "summary"}],
+        "results": [
+            {"document_id": f"doc_{j}", "title": f"Title {j}", "score": j / 10, "summary": "lorem ipsum " * 8}
+            for j in range(rows)
+        ],
+        "updated_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def run_doc(run_id: str, review_id: str, created_at: str, rows: int, revision: int = 0) -> dict:
+    """Run results that differ from the previous revision in a single cell, like a typical rerun."""
+    results = [{"document_id": f"doc_{j}", "title": f"Title {j}", "score": j / 10} for j in range(rows)]
+    if rows:
+        results[revision % rows]["score"] = revision
+    return {
+        "id": run_id,
+        "review_id": review_id,
+        "created_at": created_at,
+        "name": f"Run {run_id}",
+        "prompt": "Summarise the document",
+        "fields": [{"name": "title"}, {"name": "score"}],
+        "results": results,
+        "status": "success",
+    }
+
+
+# Reads run first, then writes, then deletes of the objects the writes created,
+# so every request hits an existing object and latencies are comparable run to run.
+ENDPOINTS: List[Endpoint] = [
+    # Health
+    Endpoint("GET", "/", lambda i, d: ("/", {})),
+    Endpoint("GET", "/health", lambda i, d: ("/health", {})),
+    Endpoint("GET", "/ready", lambda i, d: ("/ready", {})),
+    Endpoint("GET", "/cache/stats", lambda i, d: ("/cache/stats", {})),
+    Endpoint("GET", "/metrics", lambda i, d: ("/metrics", {})),
+    # Users
+    Endpoint("GET", "/users/{user_id}", lambda i, d: (f"/users/{pick(d['users'], i)}", {})),
+    Endpoint("GET", "/users/{user_id}/dashboard", lambda i, d: (f"/users/{pick(d['users'], i)}/dashboard", {})),
+    Endpoint("GET", "/users", lambda i, d: ("/users", {"params": {"limit": 100}})),
+    Endpoint("GET", "/users", lambda i, d: ("/users", {"headers": NDJSON}), name="GET /users (ndjson)"),
+    Endpoint("POST", "/login", lambda i, d: ("/login", {"json": {"email": f"{pick(d['users'], i)}@bench.local", "password": "secret"}})),
+    # Collections
+    Endpoint("GET", "/collections/{collection_id}", lambda i, d: (f"/collections/{pick(d['collections'], i)}", {})),
+    Endpoint("GET", "/collections", lambda i, d: ("/collections", {"params": {"user_id": pick(d['users'], i)}})),
+    Endpoint(
+        "GET", "/collections", lambda i, d: ("/collections", {"params": {"user_id": pick(d['users'], i)}, "headers": NDJSON}),
+        name="GET /collections (ndjson)",
+    ),
+    Endpoint("GET", "/collections/summaries", lambda i, d: ("/collections/summaries", {"params": {"user_id": pick(d['users'], i)}})),
+    Endpoint(
+        "GET", "/collections/search",
+        lambda i, d: ("/collections/search", {"params": {"user_id": pick(d['users'], i), "q": "user"}}),
+    ),
+    Endpoint(
+        "GET", "/collections/{collection_id}/documents",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents", {"params": {"limit": 100}}),
+    ),
+    Endpoint(
+        "GET", "/collections/{collection_id}/documents/{document_id}",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents/doc_{i % max(d['documents'], 1)}", {}),
+    ),
+    # Reviews
+    Endpoint(
+        "GET", "/documents/{document_id}/references",
+        lambda i, d: (f"/documents/doc_{i % max(d['documents'], 1)}/references", {}),
+    ),
+    Endpoint(
+        "POST", "/documents/references",
+        lambda i, d: ("/documents/references", {"json": {
+            "document_ids": [f"doc_{(i + k) % max(d['documents'], 1)}" for k in range(BULK_SIZE)],
+        }}),
+    ),
+    Endpoint("GET", "/reviews/{review_id}", lambda i, d: (f"/reviews/{pick(d['reviews'], i)}", {})),
+    Endpoint("GET", "/reviews", lambda i, d: ("/reviews", {"params": {"user_id": pick(d['users'], i)}})),
+    Endpoint(
+        "GET", "/reviews", lambda i, d: ("/reviews", {"params": {"user_id": pick(d['users'], i)}, "headers": NDJSON}),
+        name="GET /reviews (ndjson)",
+    ),
+    Endpoint("GET", "/reviews/summaries", lambda i, d: ("/reviews/summaries", {"params": {"user_id": pick(d['users'], i)}})),
+    Endpoint("GET", "/reviews/search", lambda i, d: ("/reviews/search", {"params": {"user_id": pick(d['users'], i), "q": "review"}})),
+    Endpoint(
+        "GET", "/reviews/search",
+        lambda i, d: ("/reviews/search", {"params": {"user_id": pick(d['users'], i), "q": "summarise", "mode": "text"}}),
+        name="GET /reviews/search (text)",
+    ),
+    Endpoint("GET", "/reviews/{review_id}/runs", lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs", {})),
+    Endpoint(
+        "GET", "/reviews/{review_id}/runs/{run_id}",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs/{pick(d['reviews'], i)}_run_{i % max(d['runs'], 1)}", {}),
+    ),
+    Endpoint(
+        "GET", "/reviews/{review_id}/runs/{run_id}/results",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs/{pick(d['reviews'], i)}_run_{i % max(d['runs'], 1)}/results", {}),
+    ),
+    Endpoint(
+        "POST", "/reviews/{review_id}/results/query",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/results/query", {"json": RESULTS_QUERY}),
+    ),
+    Endpoint(
+        "POST", "/reviews/{review_id}/runs/{run_id}/results/query",
+        lambda i, d: (
+            f"/reviews/{pick(d['reviews'], i)}/runs/{pick(d['reviews'], i)}_run_{i % max(d['runs'], 1)}/results/query",
+            {"json": RESULTS_QUERY},
+        ),
+    ),
+    Endpoint(
+        "GET", "/reviews/{review_id}/runs/{run_id}/export",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs/{pick(d['reviews'], i)}_run_{i % max(d['runs'], 1)}/export", {}),
+    ),
+    Endpoint(
+        "GET", "/reviews/{review_id}/runs/diff",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs/diff", {"params": {
+            "from_run": f"{pick(d['reviews'], i)}_run_0",
+            "to_run": f"{pick(d['reviews'], i)}_run_{max(d['runs'] - 1, 0)}",
+        }}),
+    ),
+    # Writes
+    Endpoint("POST", "/users", lambda i, d: ("/users", {"json": user_doc(f"bench_new_user_{i}")})),
+    Endpoint(
+        "POST", "/users/bulk",
+        lambda i, d: ("/users/bulk", {"json": [user_doc(f"bench_bulk_user_{i}_{j}") for j in range(BULK_SIZE)]}),
+    ),
+    Endpoint("PUT", "/users/{user_id}", lambda i, d: (f"/users/{pick(d['users'], i)}", {"json": user_doc(pick(d['users'], i))})),
+    Endpoint(
+        "PATCH", "/users/{user_id}",
+        lambda i, d: (f"/users/{pick(d['users'], i)}", {"json": {"add_review_ids": [f"bench_patch_review_{i}"]}}),
+    ),
+    Endpoint(
+        "POST", "/collections",
+        lambda i, d: ("/collections", {"json": {"id": f"bench_new_collection_{i}", "user_id": pick(d['users'], i), "collection_name": "New"}}),
+    ),
+    Endpoint(
+        "POST", "/collections/bulk",
+        lambda i, d: ("/collections/bulk", {"json": [
+            {"id": f"bench_bulk_collection_{i}_{j}", "user_id": pick(d['users'], i), "collection_name": "Bulk"}
+            for j in range(BULK_SIZE)
+        ]}),
+    ),
+    Endpoint(
+        "PUT", "/collections/{collection_id}",
+        lambda i, d: (f"/collections/bench_new_collection_{i}", {"json": {
+            "id": f"bench_new_collection_{i}", "user_id": pick(d['users'], i), "collection_name": "Renamed",
+        }}),
+    ),
+    Endpoint(
+        "PATCH", "/collections/{collection_id}",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}", {"json": {"add_document_ids": [f"bench_patch_doc_{i}"]}}),
+    ),
+    Endpoint(
+        "POST", "/collections/{collection_id}/documents/{document_id}",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents/bench_single_doc_{i}", {}),
+    ),
+    Endpoint(
+        "POST", "/collections/{collection_id}/documents",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents", {"json": {
+            "document_ids": [f"bench_batch_doc_{i}_{j}" for j in range(BULK_SIZE)],
+        }}),
+    ),
+    Endpoint(
+        "POST", "/reviews",
+        lambda i, d: ("/reviews", {"json": review_doc(f"bench_new_review_{i}", pick(d['users'], i), [], d['rows'])}),
+    ),
+    Endpoint(
+        "POST", "/reviews/bulk",
+        lambda i, d: ("/reviews/bulk", {"json": [
+            review_doc(f"bench_bulk_review_{i}_{j}", pick(d['users'], i), [], d['rows']) for j in range(BULK_SIZE)
+        ]}),
+    ),
+    Endpoint(
+        "PUT", "/reviews/{review_id}",
+        lambda i, d: (f"/reviews/bench_new_review_{i}", {"json": review_doc(f"bench_new_review_{i}", pick(d['users'], i), [], d['rows'])}),
+    ),
+    Endpoint(
+        "PATCH", "/reviews/{review_id}",
+        lambda i, d: (f"/reviews/bench_new_review_{i}", {"json": {"name": f"Patched {i}"}}),
+    ),
+    Endpoint(
+        "POST", "/reviews/{review_id}/runs",
+        lambda i, d: (f"/reviews/{pick(d['reviews'], i)}/runs", {"json": run_doc(
+            f"bench_new_run_{i}", pick(d['reviews'], i), f"2024-02-01T00:00:{i % 60:02d}+00:00", d['rows'],
+        )}),
+    ),
+    # Deletes of objects created above
+    Endpoint(
+        "DELETE", "/collections/{collection_id}/documents/{document_id}",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents/bench_single_doc_{i}", {}),
+    ),
+    Endpoint(
+        "POST", "/collections/{collection_id}/documents/remove",
+        lambda i, d: (f"/collections/{pick(d['collections'], i)}/documents/remove", {"json": {
+            "document_ids": [f"bench_batch_doc_{i}_{j}" for j in range(BULK_SIZE)],
+        }}),
+    ),
+    Endpoint("DELETE", "/reviews/{review_id}", lambda i, d: (f"/reviews/bench_new_review_{i}", {})),
+    Endpoint("DELETE", "/collections/{collection_id}", lambda i, d: (f"/collections/bench_new_collection_{i}", {})),
+    Endpoint("DELETE", "/users/{user_id}", lambda i, d: (f"/users/bench_new_user_{i}", {})),
+]
+
+
+# Server-sent-event streams stay open until the client leaves, so they have no request latency to measure.
+UNTIMED_ROUTES = {("GET", "/reviews/{review_id}/events"), ("GET", "/users/{user_id}/events")}
+
+
+def uncovered_routes(routes) -> List[str]:
+    """List the app routes (as "METHOD path") that no entry in ENDPOINTS drives."""
+    covered = {(endpoint.method, endpoint.path) for endpoint in ENDPOINTS} | UNTIMED_ROUTES
+    missing = []
+    for route in routes:
+        for method in sorted(getattr(route, "methods", None) or ()):
+            if method in ("HEAD", "OPTIONS") or route.path.startswith(("/docs", "/redoc", "/openapi")):
+                continue
+            if (method, route.path) not in covered:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def drive(client, endpoint: Endpoint, data: Dict[str, Any], requests: int, concurrency: int) -> dict:
+    """Send `requests` requests to one endpoint with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        url, kwargs = endpoint.build(i, data)
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(endpoint.method, url, **kwargs)
+            await response.aread()
+            latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - start)
+
+
+async def seed(db, args) -> Dict[str, Any]:
+    """Write the dataset through the bulk methods and return the ids the endpoints use."""
+    from src.models import Collection, Review, ReviewRun, User
+    from src.mongodb import RUN_CHECKPOINT_INTERVAL
+    from src.run_deltas import encode_run
+
+    users = [f"user_{u:05d}" for u in range(args.users)]
+    collections, reviews = [], []
+    collection_models, review_models, run_docs = [], [], []
+    document_ids = [f"doc_{k}" for k in range(args.documents)]
+
+    for user_id in users:
+        owned = [f"{user_id}_collection_{c}" for c in range(args.collections)]
+        collections.extend(owned)
+        collection_models.extend(
+            Collection(id=collection_id, user_id=user_id, collection_name=collection_id, document_ids=document_ids)
+            for collection_id in owned
+        )
+        for r in range(args.reviews):
+            review_id = f"{user_id}_review_{r}"
+            reviews.append(review_id)
+            review_models.append(Review(**review_doc(review_id, user_id, owned[:2], args.rows)))
+            # Runs are stored the way add_review_run stores them: deltas between checkpoints.
+            base = None
+            for n in range(args.runs):
+                created_at = f"2024-01-01T00:{n // 60 % 60:02d}:{n % 60:02d}+00:00"
+                run = ReviewRun(**run_doc(f"{review_id}_run_{n}", review_id, created_at, args.rows, revision=n)).model_dump()
+                stored = encode_run(run, base, n, RUN_CHECKPOINT_INTERVAL)
+                run_docs.append(stored)
+                base = dict(stored, fields=run["fields"], results=run["results"])
+
+    await db.bulk_create_users([User(**user_doc(user_id)) for user_id in users])
+    await db.bulk_create_collections(collection_models)
+    await db.bulk_create_reviews(review_models)
+    await db.reviews_collection.update_many({"id": {"$in": reviews}}, {"$set": {"run_sequence": args.runs}})
+    for offset in range(0, len(run_docs), 1000):
+        await db.review_runs_collection.insert_many(run_docs[offset:offset + 1000])
+
+    return {
+        "users": users,
+        "collections": collections,
+        "reviews": reviews,
+        "documents": args.documents,
+        "runs": args.runs,
+        "rows": args.rows,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def mongo_uri(uri: Optional[str]) -> AsyncIterator[str]:
+    """Yield the MongoDB URI to benchmark against, spawning a temporary mongod if needed."""
+    if uri:
+        yield uri
+        return
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        raise SystemExit("No MongoDB available: pass --uri or put mongod on PATH.")
+
+    from pymongo import AsyncMongoClient
+
+    port = free_port()
+    with tempfile.TemporaryDirectory(prefix="bench-mongod-") as dbpath:
+        process = subprocess.Popen(
+            [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            spawned_uri = f"mongodb://127.0.0.1:{port}"
+            client = AsyncMongoClient(spawned_uri, serverSelectionTimeoutMS=15000)
+            try:
+                await client.admin.command("ping")
+            finally:
+                await client.close()
+            yield spawned_uri
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args) -> dict:
+    async with mongo_uri(args.uri) as uri:
+        # src.mongodb reads its settings at import time, so set them before importing the app.
+        os.environ["MONGODB_ATLAS_CLUSTER_URI"] = uri
+        os.environ["DATABASE_NAME"] = args.database
+        import httpx
+        import main as api
+
+        missing = uncovered_routes(api.app.routes)
+        if missing:
+            print(f"Warning: routes not benchmarked: {', '.join(missing)}", file=sys.stderr)
+
+        async with api.app.router.lifespan_context(api.app):
+            db = api.db
+            try:
+                await db.client.drop_database(args.database)
+                await db.ensure_indexes()
+                seed_start = time.perf_counter()
+                data = await seed(db, args)
+                seed_seconds = time.perf_counter() - seed_start
+                db.cache.clear()
+
+                transport = httpx.ASGITransport(app=api.app)
+                results = {}
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+                    for endpoint in ENDPOINTS:
+                        name = endpoint.name or f"{endpoint.method} {endpoint.path}"
+                        results[name] = await drive(client, endpoint, data, args.requests, args.concurrency)
+            finally:
+                if not args.keep:
+                    await db.client.drop_database(args.database)
+
+    return {
+        "commit": git_commit(),
+        "dataset": {
+            "users": args.users,
+            "collections_per_user": args.collections,
+            "documents_per_collection": args.documents,
+            "reviews_per_user": args.reviews,
+            "runs_per_review": args.runs,
+            "rows_per_result": args.rows,
+        },
+        "requests_per_endpoint": args.requests,
+        "concurrency": args.concurrency,
+        "seed_seconds": round(seed_seconds, 2),
+        "endpoints": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB URI; defaults to a temporary mongod from PATH")
+    parser.add_argument("--database", default="nexus_bench", help="Database to seed (dropped afterwards)")
+    parser.add_argument("--users", type=int, default=20, help="Number of users (N)")
+    parser.add_argument("--collections", type=int, default=5, help="Collections per user (M)")
+    parser.add_argument("--documents", type=int, default=200, help="Document ids per collection (K)")
+    parser.add_argument("--reviews", type=int, default=5, help="Reviews per user")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per review (R)")
+    parser.add_argument("--rows", type=int, default=50, help="Rows per review and run result (S)")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight per endpoint")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
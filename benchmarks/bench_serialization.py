@@ -0,0 +1,118 @@
+"""
+Microbenchmark for the trusted-read fast path on GET /reviews.
+
+Compares, on the same in-memory documents:
+
+* baseline: pop _id, validate each Review, then let FastAPI validate and
+  serialize the page again through the route's response_model and render it
+  with the standard JSONResponse;
+* fast: validate each projected document once with model_validate and
+  render the page with ModelJSONResponse in a single pydantic-core pass.
+
+No MongoDB is needed. Results are printed as JSON.
+
+Usage:
+    python benchmarks/bench_serialization.py --reviews 1000 --rows 50 --repeat 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from main import app
+from src.models import Page, Review
+from src.responses import ModelJSONResponse
+
+
+def make_documents(reviews: int, rows: int) -> list:
+    """Build review documents shaped like what the reviews collection returns."""
+    return [
+        {
+            "_id": f"oid_{i}",
+            "id": f"review_{i:06d}",
+            "user_id": "user_1",
+            "name": f"Review {i}",
+            "prompt": "Summarise the document",
+            "collection_ids": ["collection_1", "collection_2"],
+            "fields": [{"name": "title"}, {"name": "score"}, {"name": "summary"}],
+            "results": [
+                {"document_id": f"doc_{j}", "title": f"Title {j}", "score": j / 10, "summary": "lorem ipsum " * 8}
+                for j in range(rows)
+            ],
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+        for i in range(reviews)
+    ]
+
+
+def review_list_field():
+    """Return the response field FastAPI uses for GET /reviews."""
+    for route in app.routes:
+        if getattr(route, "path", None) == "/reviews" and "GET" in route.methods:
+            return route.response_field
+    raise RuntimeError("GET /reviews route not found")
+
+
+async def baseline(documents: list, field) -> bytes:
+    items = []
+    for document in documents:
+        review_dict = dict(document)
+        review_dict.pop("_id", None)
+        items.append(Review(**review_dict))
+    page = Page[Review](items=items, next_cursor=None)
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def fast(documents: list, field) -> bytes:
+    # The projection already drops _id in MongoDB; mirror that outside the timed section.
+    page = Page[Review](items=[Review.model_validate(document) for document in documents], next_cursor=None)
+    return ModelJSONResponse(page).body
+
+
+async def measure(func, documents: list, field, repeat: int) -> dict:
+    timings = []
+    body = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await func(documents, field)
+        timings.append(time.perf_counter() - start)
+    return {"median_ms": round(statistics.median(timings) * 1000, 2), "min_ms": round(min(timings) * 1000, 2), "bytes": len(body)}
+
+
+async def main(reviews: int, rows: int, repeat: int) -> None:
+    documents = make_documents(reviews, rows)
+    projected = [{key: value for key, value in document.items() if key != "_id"} for document in documents]
+    field = review_list_field()
+
+    baseline_body = await baseline(documents, field)
+    fast_body = await fast(projected, field)
+    if json.loads(baseline_body) != json.loads(fast_body):
+        raise RuntimeError("Fast path output differs from the baseline")
+
+    results = {
+        "reviews": reviews,
+        "rows_per_review": rows,
+        "baseline": await measure(baseline, documents, field, repeat),
+        "fast": await measure(fast, projected, field, repeat),
+    }
+    results["speedup"] = round(results["baseline"]["median_ms"] / results["fast"]["median_ms"], 2)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=1000, help="Number of reviews in the page")
+    parser.add_argument("--rows", type=int, default=50, help="Result rows per review")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per variant")
+    args = parser.parse_args()
+    asyncio.run(main(args.reviews, args.rows, args.repeat))
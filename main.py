@@ -1,24 +1,89 @@
-from fastapi import FastAPI, HTTPException, status
-from fastapi.responses import JSONResponse
+import asyncio
+import contextlib
+import logging
+import os
+import time
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from pymongo.errors import DuplicateKeyError
+from typing import AsyncIterator, List, Literal, Optional
 from contextlib import asynccontextmanager
 
-from src.mongodb import MongoDB
-from src.models import User, Collection, Review, ReviewRun
+from src.cache import cache_from_env
+from src.columnar import to_columnar
+from src.events import CHANGE_STREAM, EventBus, events_source_from_env
+from src.export import MEDIA_TYPES, PARQUET, csv_chunks, parquet_available, parquet_chunks
+from src.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, MetricsMiddleware
+from src.mongodb import MongoDB, VersionConflict
+from src.models import (
+    User,
+    Collection,
+    Review,
+    ReviewRun,
+    RunDiff,
+    Page,
+    UserPatch,
+    CollectionPatch,
+    ReviewPatch,
+    ReviewSummary,
+    CollectionSummary,
+    BulkResult,
+    DocumentIdsRequest,
+    DocumentReferences,
+    DocumentReferencesRequest,
+    ResultsPage,
+    ResultsQuery,
+    UserDashboard,
+)
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from src.responses import ModelJSONResponse
+
 
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s %(message)s")
+logger = logging.getLogger(__name__)
 
 # MongoDB instance
 db: Optional[MongoDB] = None
+# Fan-out of review and collection changes to the /events streams
+events = EventBus()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage MongoDB connection lifecycle."""
     global db
-    db = MongoDB()
+    db = MongoDB(cache=cache_from_env(), metrics=REGISTRY, events=events)
+    await db.ensure_indexes()
+    if os.getenv("MONGODB_CHECK_QUERY_PLANS", "").lower() in ("1", "true", "yes"):
+        await db.check_query_plans()
+    watcher = None
+    if events_source_from_env() == CHANGE_STREAM:
+        watcher = asyncio.create_task(db.watch_changes())
+        watcher.add_done_callback(watcher_stopped)
     yield
-    db.close()
+    if watcher and not watcher.done():
+        watcher.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await watcher
+    await db.close()
+
+
+def watcher_stopped(watcher: asyncio.Task) -> None:
+    """
+    Done-callback of the change stream watcher.
+
+    The watcher only ends on its own when the stream fails (no replica set, a
+    lost connection, an invalidated stream). The failure is logged and the
+    write methods take over publishing, so open event streams still see this
+    process's changes.
+    """
+    if watcher.cancelled():
+        return
+    logger.error("Change stream watcher stopped, publishing local writes instead", exc_info=watcher.exception())
+    if db is not None:
+        db.publish_writes = True
 
 
 app = FastAPI(
@@ -37,6 +102,121 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, registry=REGISTRY)
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Check whether the client asked for a newline-delimited JSON stream."""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def ndjson_response(items: AsyncIterator[BaseModel]) -> StreamingResponse:
+    """Stream models to the client as one JSON document per line."""
+    async def lines():
+        async for item in items:
+            yield item.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+SSE_MEDIA_TYPE = "text/event-stream"
+# Comment lines sent on idle streams so proxies do not close them.
+SSE_KEEPALIVE_SECONDS = float(os.getenv("SSE_KEEPALIVE_SECONDS", "15"))
+
+
+async def change_events(request: Request, kind: str, item_id: str) -> AsyncIterator[str]:
+    """Forward the change events of one topic as server-sent events until the client disconnects."""
+    async with events.subscribe(kind, item_id) as queue:
+        yield "retry: 3000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), SSE_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event.change}\ndata: {event.model_dump_json()}\n\n"
+
+
+def sse_response(request: Request, kind: str, item_id: str) -> StreamingResponse:
+    """Open a server-sent-event stream of a topic's changes."""
+    return StreamingResponse(
+        change_events(request, kind, item_id),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+ResultsFormat = Literal["rows", "columnar"]
+RESULTS_FORMAT_QUERY = Query("rows", alias="format", description="rows (default) or columnar results")
+
+SearchMode = Literal["prefix", "text"]
+SEARCH_MODE_QUERY = Query("prefix", description="prefix (default): names starting with q; text: full-text relevance")
+
+
+def columnar_results(item: BaseModel) -> dict:
+    """Dump a review or run with its results as column arrays (see src/columnar.py)."""
+    data = item.model_dump(exclude={"results"})
+    data["results"] = to_columnar(item.results)
+    return data
+
+
+def results_response(content, results_format: ResultsFormat) -> ModelJSONResponse:
+    """Respond with a review, run or page of them, converting results to the requested format."""
+    if results_format == "columnar":
+        if isinstance(content, Page):
+            content = {"items": [columnar_results(item) for item in content.items], "next_cursor": content.next_cursor}
+        else:
+            content = columnar_results(content)
+    return ModelJSONResponse(content)
+
+
+def entity_tag(version: int, variant: Optional[str] = None) -> str:
+    """ETag of a document version; variant tells representations of one version apart (e.g. columnar)."""
+    return f'"{version}-{variant}"' if variant else f'"{version}"'
+
+
+def _header_tags(header: str) -> List[str]:
+    return [tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()]
+
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    """Whether an If-None-Match header matches the current ETag."""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or tag in _header_tags(if_none_match)
+
+
+def if_match_versions(if_match: Optional[str]) -> Optional[List[int]]:
+    """
+    Versions an If-Match header accepts.
+
+    Returns None when the header is missing or "*", so the write is unconditional.
+    Tags that are not ours match no version, so the write fails with 412.
+    """
+    if not if_match or if_match.strip() == "*":
+        return None
+    versions = []
+    for tag in _header_tags(if_match):
+        version = tag.strip('"').split("-")[0]
+        if version.isdigit():
+            versions.append(int(version))
+    return versions
+
+
+async def not_modified(get_version, item_id: str, if_none_match: Optional[str], variant: Optional[str] = None) -> Optional[Response]:
+    """Answer 304 when If-None-Match holds the current ETag, reading only the version."""
+    if not if_none_match:
+        return None
+    version = await get_version(item_id)
+    if version is None:
+        return None
+    tag = entity_tag(version, variant)
+    if etag_matches(if_none_match, tag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": tag})
+    return None
 
 
 # ==================== User Endpoints ====================
@@ -45,12 +225,20 @@ app.add_middleware(
 async def create_user(user: User):
     """Create a new user."""
     try:
-        user_id = db.create_user(user)
+        user_id = await db.create_user(user)
         return {"message": "User created successfully", "id": user_id}
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A user with this id or email already exists")
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@app.post("/users/bulk", response_model=BulkResult, tags=["Users"])
+async def bulk_create_users(users: List[User], upsert: bool = False):
+    """Create many users in one request; failures are reported per item."""
+    return await db.bulk_create_users(users, upsert=upsert)
+
+
 class LoginRequest(BaseModel):
     email: str
     password: str
@@ -59,7 +247,7 @@ class LoginRequest(BaseModel):
 @app.post("/login", response_model=dict, tags=["Users"])
 async def login(login_request: LoginRequest):
     """Authenticate a user."""
-    user = db.get_user_by_email(login_request.email)
+    user = await db.get_user_by_email(login_request.email)
     if not user or user.password != login_request.password:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     
@@ -69,36 +257,80 @@ async def login(login_request: LoginRequest):
 @app.get("/users/{user_id}", response_model=User, tags=["Users"])
 async def get_user(user_id: str):
     """Get a user by ID."""
-    user = db.get_user(user_id)
+    user = await db.get_user(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    return user
+    return ModelJSONResponse(user)
+
+
+@app.get("/users/{user_id}/dashboard", response_model=UserDashboard, tags=["Users"])
+async def get_user_dashboard(user_id: str, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    """Get a user with the first page of their collection and review summaries in one request."""
+    dashboard = await db.get_user_dashboard(user_id, limit=limit)
+    if not dashboard:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return ModelJSONResponse(dashboard)
+
+
+@app.get("/users/{user_id}/events", tags=["Users"])
+async def user_events(user_id: str, request: Request):
+    """Stream changes to the user's reviews and collections as server-sent events."""
+    if not await db.get_user(user_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return sse_response(request, "user", user_id)
 
 
 @app.put("/users/{user_id}", response_model=dict, tags=["Users"])
 async def update_user(user_id: str, user: User):
     """Update an existing user."""
-    success = db.update_user(user_id, user)
+    try:
+        success = await db.update_user(user_id, user)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A user with this email already exists")
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found or no changes made")
     return {"message": "User updated successfully"}
 
 
+@app.patch("/users/{user_id}", response_model=dict, tags=["Users"])
+async def patch_user(user_id: str, patch: UserPatch):
+    """Partially update a user; only the fields sent are written."""
+    try:
+        success = await db.patch_user(user_id, patch)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A user with this email already exists")
+    if not success:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return {"message": "User updated successfully"}
+
+
 @app.delete("/users/{user_id}", response_model=dict, tags=["Users"])
 async def delete_user(user_id: str):
     """Delete a user by ID."""
-    success = db.delete_user(user_id)
+    success = await db.delete_user(user_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return {"message": "User deleted successfully"}
 
 
-@app.get("/users", response_model=List[User], tags=["Users"])
-async def list_users():
-    """Get all users."""
+@app.get("/users", response_model=Page[User], tags=["Users"])
+async def list_users(
+    request: Request,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """
+    Get a page of users; pass next_cursor back as `after` for the next page.
+
+    With `Accept: application/x-ndjson` every user is streamed instead, one per line.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(db.stream_users())
     try:
-        users = db.list_users()
-        return users
+        users = await db.list_users(limit=limit, after=after)
+        return ModelJSONResponse(users)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
@@ -109,167 +341,425 @@ async def list_users():
 async def create_collection(collection: Collection):
     """Create a new collection."""
     try:
-        collection_id = db.create_collection(collection)
+        collection_id = await db.create_collection(collection)
         return {"message": "Collection created successfully", "id": collection_id}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@app.post("/collections/bulk", response_model=BulkResult, tags=["Collections"])
+async def bulk_create_collections(collections: List[Collection], upsert: bool = False):
+    """Create many collections in one request; failures are reported per item."""
+    return await db.bulk_create_collections(collections, upsert=upsert)
+
+
+@app.get("/collections/summaries", response_model=Page[CollectionSummary], tags=["Collections"])
+async def list_collection_summaries(
+    user_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Get a page of collection summaries (document counts instead of document ids)."""
+    try:
+        return ModelJSONResponse(await db.list_collection_summaries(user_id, limit=limit, after=after))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@app.get("/collections/search", response_model=Page[CollectionSummary], tags=["Collections"])
+async def search_collections(
+    user_id: str,
+    q: str = Query(..., min_length=1),
+    mode: SearchMode = SEARCH_MODE_QUERY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Search a user's collections by name; pass next_cursor back as `after` for the next page."""
+    try:
+        return ModelJSONResponse(await db.search_collections(user_id, q, mode=mode, limit=limit, after=after))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 @app.get("/collections/{collection_id}", response_model=Collection, tags=["Collections"])
-async def get_collection(collection_id: str):
-    """Get a collection by ID."""
-    collection = db.get_collection(collection_id)
+async def get_collection(collection_id: str, if_none_match: Optional[str] = Header(None)):
+    """Get a collection by ID. Answers 304 when If-None-Match holds the current ETag."""
+    unchanged = await not_modified(db.get_collection_version, collection_id, if_none_match)
+    if unchanged:
+        return unchanged
+    collection = await db.get_collection(collection_id)
     if not collection:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
-    return collection
+    return ModelJSONResponse(collection, headers={"ETag": entity_tag(collection.version)})
 
 
 @app.put("/collections/{collection_id}", response_model=dict, tags=["Collections"])
-async def update_collection(collection_id: str, collection: Collection):
-    """Update an existing collection."""
-    success = db.update_collection(collection_id, collection)
+async def update_collection(collection_id: str, collection: Collection, if_match: Optional[str] = Header(None)):
+    """Update an existing collection. With If-Match, answers 412 if it changed since that ETag."""
+    try:
+        success = await db.update_collection(collection_id, collection, expected_versions=if_match_versions(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found or no changes made")
     return {"message": "Collection updated successfully"}
 
 
+@app.patch("/collections/{collection_id}", response_model=dict, tags=["Collections"])
+async def patch_collection(collection_id: str, patch: CollectionPatch):
+    """Partially update a collection; only the fields sent are written."""
+    success = await db.patch_collection(collection_id, patch)
+    if not success:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
+    return {"message": "Collection updated successfully"}
+
+
 @app.delete("/collections/{collection_id}", response_model=dict, tags=["Collections"])
 async def delete_collection(collection_id: str):
     """Delete a collection by ID."""
-    success = db.delete_collection(collection_id)
+    success = await db.delete_collection(collection_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
     return {"message": "Collection deleted successfully"}
 
 
+# A POST, as proxies and clients may drop a DELETE body. Declared before the
+# single-document route below, which would otherwise take "remove" as an id.
+@app.post("/collections/{collection_id}/documents/remove", response_model=dict, tags=["Collections"])
+async def remove_documents_from_collection(collection_id: str, request: DocumentIdsRequest):
+    """Remove many documents from a collection; reports how many were present."""
+    removed = await db.remove_documents_from_collection(collection_id, request.document_ids)
+    if removed is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
+    return {"message": "Documents removed from collection successfully", "removed": removed}
+
+
 @app.post("/collections/{collection_id}/documents/{document_id}", response_model=dict, tags=["Collections"])
 async def add_document_to_collection(collection_id: str, document_id: str):
     """Add a document to a collection."""
-    success = db.add_document_to_collection(collection_id, document_id)
+    success = await db.add_document_to_collection(collection_id, document_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
     return {"message": "Document added to collection successfully"}
 
 
-@app.get("/collections", response_model=List[Collection], tags=["Collections"])
-async def list_collections(user_id: Optional[str] = None):
-    """Get all collections, optionally filtered by user_id."""
+@app.get("/collections/{collection_id}/documents", response_model=Page[str], tags=["Collections"])
+async def list_collection_documents(
+    collection_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Get a page of a collection's document ids (works for inline and bucketed storage)."""
     try:
-        collections = db.list_collections(user_id)
-        return collections
+        page = await db.list_collection_documents(collection_id, limit=limit, after=after)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
+    return ModelJSONResponse(page)
+
+
+@app.get("/collections/{collection_id}/documents/{document_id}", response_model=dict, tags=["Collections"])
+async def check_document_in_collection(collection_id: str, document_id: str):
+    """Check whether a document belongs to a collection."""
+    member = await db.is_document_in_collection(collection_id, document_id)
+    if member is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
+    return {"collection_id": collection_id, "document_id": document_id, "member": member}
+
+
+@app.post("/collections/{collection_id}/documents", response_model=dict, tags=["Collections"])
+async def add_documents_to_collection(collection_id: str, request: DocumentIdsRequest):
+    """Add many documents to a collection; reports how many were new."""
+    added = await db.add_documents_to_collection(collection_id, request.document_ids)
+    if added is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found")
+    return {"message": "Documents added to collection successfully", "added": added}
+
+
+@app.get("/collections", response_model=Page[Collection], tags=["Collections"])
+async def list_collections(
+    request: Request,
+    user_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """
+    Get a page of collections, optionally filtered by user_id.
+
+    With `Accept: application/x-ndjson` every match is streamed instead, one per line.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(db.stream_collections(user_id))
+    try:
+        collections = await db.list_collections(user_id, limit=limit, after=after)
+        return ModelJSONResponse(collections)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+# ==================== Document Endpoints ====================
+
+@app.get("/documents/{document_id}/references", response_model=DocumentReferences, tags=["Documents"])
+async def get_document_references(document_id: str):
+    """List the collections that contain a document and the reviews that cover them."""
+    references = await db.find_document_references([document_id])
+    return ModelJSONResponse(references[0])
+
+
+@app.post("/documents/references", response_model=List[DocumentReferences], tags=["Documents"])
+async def find_document_references(request: DocumentReferencesRequest):
+    """Look up the references of many documents at once, one entry per distinct id in request order."""
+    return ModelJSONResponse(await db.find_document_references(request.document_ids))
+
+
 # ==================== Review Endpoints ====================
 
 @app.post("/reviews", response_model=dict, status_code=status.HTTP_201_CREATED, tags=["Reviews"])
 async def create_review(review: Review):
     """Create a new review."""
     try:
-        review_id = db.create_review(review)
+        review_id = await db.create_review(review)
         return {"message": "Review created successfully", "id": review_id}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@app.post("/reviews/bulk", response_model=BulkResult, tags=["Reviews"])
+async def bulk_create_reviews(reviews: List[Review], upsert: bool = False):
+    """Create many reviews in one request; failures are reported per item."""
+    return await db.bulk_create_reviews(reviews, upsert=upsert)
+
+@app.get("/reviews/summaries", response_model=Page[ReviewSummary], tags=["Reviews"])
+async def list_review_summaries(
+    user_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Get a page of review summaries (counts instead of results and runs)."""
+    try:
+        return ModelJSONResponse(await db.list_review_summaries(user_id, limit=limit, after=after))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@app.get("/reviews/search", response_model=Page[ReviewSummary], tags=["Reviews"])
+async def search_reviews(
+    user_id: str,
+    q: str = Query(..., min_length=1),
+    mode: SearchMode = SEARCH_MODE_QUERY,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """Search a user's reviews by name (text mode also matches the prompt); pass next_cursor back as `after`."""
+    try:
+        return ModelJSONResponse(await db.search_reviews(user_id, q, mode=mode, limit=limit, after=after))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
 @app.get("/reviews/{review_id}", response_model=Review, tags=["Reviews"])
-async def get_review(review_id: str):
-    """Get a review by ID."""
-    review = db.get_review(review_id)
+async def get_review(
+    review_id: str,
+    results_format: ResultsFormat = RESULTS_FORMAT_QUERY,
+    if_none_match: Optional[str] = Header(None),
+):
+    """Get a review by ID. Answers 304 when If-None-Match holds the current ETag."""
+    variant = None if results_format == "rows" else results_format
+    unchanged = await not_modified(db.get_review_version, review_id, if_none_match, variant)
+    if unchanged:
+        return unchanged
+    review = await db.get_review(review_id)
     if not review:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-    return review
-
-@app.get("/reviews", response_model=List[Review], tags=["Reviews"])
-async def list_reviews(user_id: Optional[str] = None):
-    """Get all reviews, optionally filtered by user_id."""
+    response = results_response(review, results_format)
+    response.headers["ETag"] = entity_tag(review.version, variant)
+    return response
+
+@app.get("/reviews", response_model=Page[Review], tags=["Reviews"])
+async def list_reviews(
+    request: Request,
+    user_id: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    results_format: ResultsFormat = RESULTS_FORMAT_QUERY,
+):
+    """
+    Get a page of reviews, optionally filtered by user_id.
+
+    With `Accept: application/x-ndjson` every match is streamed instead, one per line.
+    """
+    if wants_ndjson(request):
+        return ndjson_response(db.stream_reviews(user_id))
     try:
-        reviews = db.list_reviews(user_id)
-        return reviews
+        reviews = await db.list_reviews(user_id, limit=limit, after=after)
+        return results_response(reviews, results_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@app.get("/reviews/{review_id}/events", tags=["Reviews"])
+async def review_events(review_id: str, request: Request):
+    """Stream the review's changes (updates, added runs, deletion) as server-sent events."""
+    if await db.get_review_version(review_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return sse_response(request, "review", review_id)
+
+
+@app.post("/reviews/{review_id}/results/query", response_model=ResultsPage, tags=["Reviews"])
+async def query_review_results(review_id: str, query: ResultsQuery):
+    """Filter, sort and page a review's results by the columns in its fields."""
+    try:
+        page = await db.query_review_results(review_id, query)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return ModelJSONResponse(page)
+
+
 @app.put("/reviews/{review_id}", response_model=dict, tags=["Reviews"])
-async def update_review(review_id: str, review: Review):
-    """Update an existing review."""
-    success = db.update_review(review_id, review)
+async def update_review(review_id: str, review: Review, if_match: Optional[str] = Header(None)):
+    """Update an existing review. With If-Match, answers 412 if it changed since that ETag."""
+    start = time.perf_counter()
+    try:
+        success = await db.update_review(review_id, review, expected_versions=if_match_versions(if_match))
+    except VersionConflict as e:
+        raise HTTPException(status_code=status.HTTP_412_PRECONDITION_FAILED, detail=str(e))
+    logger.info(
+        "update_review review_id=%s runs=%d results=%d found=%s duration_ms=%.1f",
+        review_id,
+        len(review.runs),
+        len(review.results),
+        success,
+        (time.perf_counter() - start) * 1000,
+    )
+
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found or no changes made")
     return {"message": "Review updated successfully"}
 
+@app.patch("/reviews/{review_id}", response_model=dict, tags=["Reviews"])
+async def patch_review(review_id: str, patch: ReviewPatch):
+    """Partially update a review; only the fields sent are written."""
+    success = await db.patch_review(review_id, patch)
+    if not success:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return {"message": "Review updated successfully"}
+
 @app.delete("/reviews/{review_id}", response_model=dict, tags=["Reviews"])
 async def delete_review(review_id: str):
     """Delete a review by ID."""
-    success = db.delete_review(review_id)
+    success = await db.delete_review(review_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
     return {"message": "Review deleted successfully"}
 
 
-@app.post("/collections/{collection_id}/documents/{document_id}", response_model=dict, tags=["Collections"])
-async def add_document_to_collection(collection_id: str, document_id: str):
-    """Add a document ID to a collection."""
-    success = db.add_document_to_collection(collection_id, document_id)
-    if not success:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found or document already exists")
-    return {"message": "Document added to collection successfully"}
+# ==================== Review Run Endpoints ====================
+
+@app.post("/reviews/{review_id}/runs", response_model=dict, status_code=status.HTTP_201_CREATED, tags=["Review Runs"])
+async def add_review_run(review_id: str, run: ReviewRun):
+    """Append a run to a review."""
+    if run.review_id != review_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Run review_id does not match the URL")
+    try:
+        run_id = await db.add_review_run(run)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Run already exists")
+    if run_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
+    return {"message": "Run added successfully", "id": run_id}
+
+
+@app.get("/reviews/{review_id}/runs", response_model=Page[ReviewRun], tags=["Review Runs"])
+async def list_review_runs(
+    review_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+    results_format: ResultsFormat = RESULTS_FORMAT_QUERY,
+):
+    """Get a page of a review's runs, oldest first."""
+    try:
+        return results_response(await db.list_review_runs(review_id, limit=limit, after=after), results_format)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@app.get("/reviews/{review_id}/runs/diff", response_model=RunDiff, tags=["Review Runs"])
+async def diff_review_runs(review_id: str, from_run: str, to_run: str):
+    """Get the changes in fields and results from one run of a review to another."""
+    diff = await db.diff_review_runs(review_id, from_run, to_run)
+    if diff is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    return ModelJSONResponse(diff)
+
+
+@app.get("/reviews/{review_id}/runs/{run_id}", response_model=ReviewRun, tags=["Review Runs"])
+async def get_review_run(
+    review_id: str,
+    run_id: str,
+    results_format: ResultsFormat = RESULTS_FORMAT_QUERY,
+    inline_results: bool = Query(False, description="Include results offloaded to GridFS instead of only results_file"),
+):
+    """Get a single run of a review."""
+    run = await db.get_review_run(review_id, run_id, inline_results=inline_results)
+    if not run:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    return results_response(run, results_format)
+
+
+@app.get("/reviews/{review_id}/runs/{run_id}/results", tags=["Review Runs"])
+async def stream_run_results(review_id: str, run_id: str):
+    """Stream a run's results as NDJSON, one row per line, wherever they are stored."""
+    lines = await db.stream_run_results(review_id, run_id)
+    if lines is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.post("/reviews/{review_id}/runs/{run_id}/results/query", response_model=ResultsPage, tags=["Review Runs"])
+async def query_run_results(review_id: str, run_id: str, query: ResultsQuery):
+    """Filter, sort and page a run's results by the columns in its fields, wherever they are stored."""
+    try:
+        page = await db.query_run_results(review_id, run_id, query)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if page is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    return ModelJSONResponse(page)
+
+
+@app.get("/reviews/{review_id}/runs/{run_id}/export", tags=["Review Runs"])
+async def export_run_results(
+    review_id: str,
+    run_id: str,
+    export_format: Literal["csv", "parquet"] = Query("csv", alias="format", description="csv (default) or parquet"),
+):
+    """Download a run's results as CSV or Parquet, with columns in the order of the run's fields."""
+    if export_format == PARQUET and not parquet_available():
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail="Parquet export requires pyarrow to be installed")
+    opened = await db.open_run_results(review_id, run_id)
+    if opened is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Run not found")
+    run, rows = opened
+    chunks = parquet_chunks(run.fields, rows) if export_format == PARQUET else csv_chunks(run.fields, rows)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{review_id}-{run_id}.{export_format}"'},
+    )
 
 
 @app.delete("/collections/{collection_id}/documents/{document_id}", response_model=dict, tags=["Collections"])
 async def remove_document_from_collection(collection_id: str, document_id: str):
     """Remove a document ID from a collection."""
-    success = db.remove_document_from_collection(collection_id, document_id)
+    success = await db.remove_document_from_collection(collection_id, document_id)
     if not success:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection not found or document doesn't exist")
     return {"message": "Document removed from collection successfully"}
 
 
-
-
-
-# ==================== Review Endpoints ====================
-
-@app.post("/reviews", response_model=dict, status_code=status.HTTP_201_CREATED, tags=["Reviews"])
-async def create_review(review: Review):
-    """Create a new review."""
-    try:
-        review_id = db.create_review(review)
-        return {"message": "Review created successfully", "id": review_id}
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
-
-
-@app.get("/reviews/{review_id}", response_model=Review, tags=["Reviews"])
-async def get_review(review_id: str):
-    """Get a review by ID."""
-    review = db.get_review(review_id)
-    if not review:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found")
-    return review
-
-
-@app.put("/reviews/{review_id}", response_model=dict, tags=["Reviews"])
-async def update_review(review_id: str, review: Review):
-    """Update an existing review."""
-    print(f"DEBUG: Received update for {review_id}")
-    print(f"DEBUG: Review data runs count: {len(review.runs)}")
-    
-    success = db.update_review(review_id, review)
-    
-    if not success:
-        print("DEBUG: Update failed (not found)")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Review not found or no changes made")
-    
-    print("DEBUG: Update successful")
-    return {"message": "Review updated successfully"}
-
-
-
-
-
-
-
-
 # ==================== Health Check ====================
 
 @app.get("/", tags=["Health"])
@@ -278,13 +768,17 @@ async def root():
     return {"message": "Nexus Integration API is running", "status": "healthy"}
 
 
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("HEALTH_TIMEOUT_SECONDS", "1"))
+# Readiness fails once this share of the busiest pool's connections is checked out.
+READY_POOL_USAGE_LIMIT = float(os.getenv("READY_POOL_USAGE_LIMIT", "0.9"))
+
+
 @app.get("/health", tags=["Health"])
 async def health_check():
-    """Detailed health check endpoint."""
+    """Liveness probe: a single ping with a timeout."""
     try:
-        # Test MongoDB connection
-        db.list_users()
-        return {"status": "healthy", "database": "connected"}
+        latency_ms = await db.ping(HEALTH_TIMEOUT_SECONDS)
+        return {"status": "healthy", "database": "connected", "latency_ms": round(latency_ms, 2)}
     except Exception as e:
         return JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -292,6 +786,41 @@ async def health_check():
         )
 
 
+@app.get("/ready", tags=["Health"])
+async def readiness_check():
+    """
+    Readiness probe: ping plus connection-pool occupancy and recent MongoDB latency.
+
+    Returns 503 when the ping fails or the busiest pool is close to saturation,
+    so the orchestrator can shed traffic before requests queue for connections.
+    """
+    report = db.pool_stats()
+    try:
+        report["ping_ms"] = round(await db.ping(HEALTH_TIMEOUT_SECONDS), 2)
+    except Exception as e:
+        report.update(status="unready", reason=f"ping failed: {e}")
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=report)
+
+    pool = report["pool"]
+    if pool["max_pool_size"] and pool["available"] <= pool["max_pool_size"] * (1 - READY_POOL_USAGE_LIMIT):
+        report.update(status="unready", reason="connection pool saturated")
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=report)
+    report["status"] = "ready"
+    return report
+
+
+@app.get("/cache/stats", tags=["Health"])
+async def cache_stats():
+    """Read-through cache counters (hits, misses, evictions, ...)."""
+    return db.cache.stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metrics():
+    """Request and MongoDB command metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8001)
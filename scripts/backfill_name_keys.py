@@ -0,0 +1,23 @@
+
+import asyncio
+import sys
+import os
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mongodb import MongoDB
+
+async def backfill_name_keys():
+    db = MongoDB()
+    try:
+        await db.ensure_indexes()
+        counts = await db.backfill_name_keys()
+        print(f"Set name_key on {counts['reviews']} reviews and {counts['collections']} collections.")
+    except Exception as e:
+        print(f"Error backfilling name keys: {e}")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(backfill_name_keys())
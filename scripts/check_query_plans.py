@@ -0,0 +1,26 @@
+
+import asyncio
+import sys
+import os
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mongodb import MongoDB
+
+async def check_query_plans():
+    db = MongoDB()
+    try:
+        await db.ensure_indexes()
+        plans = await db.check_query_plans()
+        for method_name, stages in plans.items():
+            print(f"{method_name}: {' <- '.join(stages)}")
+        print("All query methods use an index.")
+    except Exception as e:
+        print(f"Query plan check failed: {e}")
+        sys.exit(1)
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(check_query_plans())
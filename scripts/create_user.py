@@ -1,4 +1,5 @@
 
+import asyncio
 import sys
 import os
 
@@ -8,12 +9,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.mongodb import MongoDB
 from src.models import User
 
-def create_user():
+async def create_user():
     db = MongoDB()
     try:
         user_id = "user_Cvons95"
         # Check if user exists to avoid duplicates or errors if unique constraints exist (though simpler here)
-        existing_user = db.get_user(user_id)
+        existing_user = await db.get_user(user_id)
         if existing_user:
             print(f"User {user_id} already exists.")
             return
@@ -23,12 +24,12 @@ def create_user():
             name="Cvons95",
             review_ids=[]
         )
-        created_id = db.create_user(new_user)
+        created_id = await db.create_user(new_user)
         print(f"Successfully created user with ID: {created_id}")
     except Exception as e:
         print(f"Error creating user: {e}")
     finally:
-        db.close()
+        await db.close()
 
 if __name__ == "__main__":
-    create_user()
+    asyncio.run(create_user())
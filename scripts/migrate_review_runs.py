@@ -0,0 +1,23 @@
+
+import asyncio
+import sys
+import os
+
+# Add the project root to the python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.mongodb import MongoDB
+
+async def migrate_review_runs():
+    db = MongoDB()
+    try:
+        await db.ensure_indexes()
+        counts = await db.migrate_embedded_runs()
+        print(f"Moved {counts['runs']} runs out of {counts['reviews']} reviews into review_runs.")
+    except Exception as e:
+        print(f"Error migrating review runs: {e}")
+    finally:
+        await db.close()
+
+if __name__ == "__main__":
+    asyncio.run(migrate_review_runs())
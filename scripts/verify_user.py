@@ -1,4 +1,5 @@
 
+import asyncio
 import sys
 import os
 import json
@@ -8,11 +9,11 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.mongodb import MongoDB
 
-def verify_user():
+async def verify_user():
     db = MongoDB()
     try:
         user_id = "user_Cvons95"
-        user = db.get_user(user_id)
+        user = await db.get_user(user_id)
         if user:
             print(f"User found: {user.model_dump_json(indent=2)}")
         else:
@@ -20,7 +21,7 @@ def verify_user():
     except Exception as e:
         print(f"Error verifying user: {e}")
     finally:
-        db.close()
+        await db.close()
 
 if __name__ == "__main__":
-    verify_user()
+    asyncio.run(verify_user())
@@ -0,0 +1,159 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class Cache:
+    """
+    Interface for the read-through cache in front of the MongoDB getters.
+
+    Values are shared between callers and must be treated as read-only.
+
+    A reader that misses takes the key's generation before it reads the
+    database and passes it to set. If the key was invalidated in between, the
+    value it read may predate that write, and set drops it.
+    """
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        raise NotImplementedError
+
+    def generation(self, key: Hashable) -> int:
+        """Return a number that changes whenever the key is invalidated."""
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Store a value, unless generation is given and the key was invalidated since it was taken."""
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        """Drop a value if present."""
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Drop every value."""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        """Return the cache counters."""
+        raise NotImplementedError
+
+
+class NullCache(Cache):
+    """Cache that stores nothing; every lookup is a miss."""
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        return None
+
+    def generation(self, key: Hashable) -> int:
+        return 0
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        pass
+
+    def delete(self, key: Hashable) -> None:
+        pass
+
+    def clear(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": 0, "max_size": 0, "hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+
+class LRUCache(Cache):
+    """
+    In-process LRU cache with a per-entry time to live.
+
+    Args:
+        max_size: Maximum number of entries; the least recently used entry is evicted beyond it
+        ttl_seconds: How long an entry stays valid after it was stored
+        clock: Monotonic time source, injectable for tests
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 30.0, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Generation of each recently invalidated key, from one counter so a
+        # number is never reused. Keys pruned from here (or never invalidated)
+        # report _generation_floor, the highest generation pruned so far.
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._generation_counter = 0
+        self._generation_floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, key: Hashable) -> int:
+        return self._generations.get(key, self._generation_floor)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation(key):
+            return
+        self._entries[key] = (value, self.clock() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+        self._generation_counter += 1
+        self._generations[key] = self._generation_counter
+        self._generations.move_to_end(key)
+        while len(self._generations) > self.max_size:
+            _, pruned = self._generations.popitem(last=False)
+            self._generation_floor = max(self._generation_floor, pruned)
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+        # Every read in flight may be stale.
+        self._generation_counter += 1
+        self._generations.clear()
+        self._generation_floor = self._generation_counter
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+def cache_from_env() -> Cache:
+    """
+    Build the cache configured by CACHE_MAX_SIZE and CACHE_TTL_SECONDS.
+
+    A size or TTL of 0 disables caching.
+    """
+    max_size = int(os.getenv("CACHE_MAX_SIZE", "1024"))
+    ttl_seconds = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+    if max_size <= 0 or ttl_seconds <= 0:
+        return NullCache()
+    return LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
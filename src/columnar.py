@@ -0,0 +1,102 @@
+import os
+from typing import Any, Dict, List
+
+# Columnar form of a list of result rows:
+#
+#   {"columns": ["document_id", "score"], "values": [["d1", "d2"], [0.4, 0.9]], "length": 2}
+#
+# Column names are stored once instead of in every row, and each column's
+# values sit in one array. Rows that lack a column are listed under
+# "absent": {"score": [1]} so a round trip restores them exactly.
+#
+# Stored documents keep the columnar block in results_columnar. Rows appended
+# later (PATCH append_results) are pushed onto a plain results array, and
+# readers put the two back together as columnar rows followed by appended rows.
+
+COLUMNAR_FIELD = "results_columnar"
+
+
+def to_columnar(rows: List[dict]) -> Dict[str, Any]:
+    """
+    Convert result rows to the columnar form.
+
+    Args:
+        rows: Result rows
+
+    Returns:
+        dict: columns, values and length, plus absent when some rows lack a column
+    """
+    columns: Dict[str, list] = {}
+    absent: Dict[str, List[int]] = {}
+    for index, row in enumerate(rows):
+        for name in row:
+            if name not in columns:
+                # Rows before this one did not have the column.
+                columns[name] = [None] * index
+                if index:
+                    absent[name] = list(range(index))
+        for name, values in columns.items():
+            if name in row:
+                values.append(row[name])
+            else:
+                values.append(None)
+                absent.setdefault(name, []).append(index)
+    block: Dict[str, Any] = {"columns": list(columns), "values": list(columns.values()), "length": len(rows)}
+    if absent:
+        block["absent"] = absent
+    return block
+
+
+def from_columnar(block: Dict[str, Any]) -> List[dict]:
+    """
+    Convert a columnar block back to result rows.
+
+    Args:
+        block: Columnar block built by to_columnar
+
+    Returns:
+        List of row dicts
+    """
+    columns = block["columns"]
+    rows = [dict(zip(columns, values)) for values in zip(*block["values"])] if columns else [{} for _ in range(block["length"])]
+    for name, indexes in block.get("absent", {}).items():
+        for index in indexes:
+            del rows[index][name]
+    return rows
+
+
+def decode_results(doc: dict) -> dict:
+    """
+    Return a document whose results are plain rows, whichever way they were stored.
+
+    Args:
+        doc: Stored review or run document
+
+    Returns:
+        dict: The same document if it was stored as rows, otherwise a copy with results rebuilt
+    """
+    if COLUMNAR_FIELD not in doc:
+        return doc
+    doc = dict(doc)
+    doc["results"] = from_columnar(doc.pop(COLUMNAR_FIELD)) + (doc.get("results") or [])
+    return doc
+
+
+def encode_results(doc: dict) -> dict:
+    """
+    Return a copy of a document with its results moved into the columnar block.
+
+    Args:
+        doc: Review or run document with results as rows
+
+    Returns:
+        dict: Document to store, with results_columnar instead of results
+    """
+    doc = dict(doc)
+    doc[COLUMNAR_FIELD] = to_columnar(doc.pop("results", None) or [])
+    return doc
+
+
+def columnar_storage_from_env() -> bool:
+    """Whether new results are stored columnar, as configured by RESULTS_STORAGE (rows or columnar)."""
+    return os.getenv("RESULTS_STORAGE", "rows").lower() == "columnar"
@@ -0,0 +1,114 @@
+import asyncio
+import os
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set, Tuple
+
+from src.models import ChangeEvent
+
+# In-process fan-out of change notifications to server-sent-event streams.
+#
+# Events are published once per change and copied to every subscriber of the
+# changed document's topic, (kind, id), and of its owner's topic, ("user",
+# user_id). Either the MongoDB write methods publish (EVENTS_SOURCE=local, the
+# default), or one change stream on the database does (EVENTS_SOURCE=
+# change_stream). A change stream also sees writes made by other processes.
+
+LOCAL = "local"
+CHANGE_STREAM = "change_stream"
+
+# A subscriber that falls this far behind loses its oldest notifications;
+# each one only says that something changed, so the client re-reads anyway.
+EVENT_QUEUE_SIZE = 100
+
+Topic = Tuple[str, str]
+
+# Change stream operation -> change reported for it. Updates are refined from
+# the names of the updated fields (see change_from_stream).
+_STREAM_CHANGES = {"insert": "created", "replace": "updated", "update": "updated"}
+
+
+class EventBus:
+    """Per-topic fan-out of ChangeEvents to subscriber queues."""
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[Topic, Set[asyncio.Queue]] = defaultdict(set)
+
+    def publish(self, event: ChangeEvent) -> int:
+        """
+        Hand an event to every subscriber of its document and of its owner.
+
+        Args:
+            event: The change to announce
+
+        Returns:
+            int: Number of subscriber queues the event was put on
+        """
+        topics = [(event.kind, event.id)]
+        if event.user_id:
+            topics.append(("user", event.user_id))
+        delivered = 0
+        for topic in topics:
+            for queue in self._subscribers.get(topic, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(event)
+                delivered += 1
+        return delivered
+
+    def has_subscribers(self, kind: str) -> bool:
+        """Whether any stream of this kind ("review", "collection" or "user") is open."""
+        return any(topic[0] == kind and queues for topic, queues in self._subscribers.items())
+
+    @asynccontextmanager
+    async def subscribe(self, kind: str, item_id: str) -> AsyncIterator[asyncio.Queue]:
+        """
+        Receive the events of one topic for the duration of the context.
+
+        Args:
+            kind: "review", "collection" or "user"
+            item_id: The id of the document or user to follow
+
+        Yields:
+            asyncio.Queue of ChangeEvents
+        """
+        topic = (kind, item_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[topic].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[topic].discard(queue)
+            if not self._subscribers[topic]:
+                del self._subscribers[topic]
+
+
+def change_from_stream(change: dict) -> Optional[ChangeEvent]:
+    """
+    Build a ChangeEvent from a change stream document projected by MongoDB.watch_changes.
+
+    Args:
+        change: Change document with operationType, ns, fullDocument (id, user_id,
+            version) and changed_fields
+
+    Returns:
+        ChangeEvent, or None for changes that cannot be attributed to a document id
+    """
+    document = change.get("fullDocument") or {}
+    if "id" not in document:
+        return None
+    kind = "review" if change["ns"]["coll"] == "reviews" else "collection"
+    event = _STREAM_CHANGES.get(change["operationType"], "updated")
+    fields = set(change.get("changed_fields") or ())
+    if "run_sequence" in fields:
+        event = "run_added"
+    elif kind == "collection" and any(field.split(".")[0] in ("document_ids", "document_count") for field in fields):
+        event = "documents_changed"
+    return ChangeEvent(kind=kind, id=document["id"], user_id=document.get("user_id"), change=event, version=document.get("version"))
+
+
+def events_source_from_env() -> str:
+    """Where change events come from, as configured by EVENTS_SOURCE (local or change_stream)."""
+    source = os.getenv("EVENTS_SOURCE", LOCAL).lower()
+    return CHANGE_STREAM if source == CHANGE_STREAM else LOCAL
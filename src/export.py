@@ -0,0 +1,172 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional: pip install pyarrow
+    pa = None
+    pq = None
+
+# Result rows are exported with one column per entry of the run's fields
+# schema, in schema order, looked up by the field's "name". A field's "type"
+# (string, integer, number or boolean) sets the Parquet column type; anything
+# else, and every CSV cell, is written as text. Lists and dicts are written as
+# JSON. Rows are written in batches, so memory stays bounded by the batch size
+# rather than the number of rows.
+
+CSV = "csv"
+PARQUET = "parquet"
+MEDIA_TYPES = {CSV: "text/csv", PARQUET: "application/vnd.apache.parquet"}
+
+CSV_BATCH_ROWS = 1000
+PARQUET_ROW_GROUP_ROWS = 10000
+
+
+def parquet_available() -> bool:
+    """Whether pyarrow is installed, which Parquet export needs."""
+    return pq is not None
+
+
+def export_columns(fields: List[dict]) -> List[str]:
+    """Column names in schema order, skipping fields without a name."""
+    return [field["name"] for field in fields if field.get("name")]
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return str(value)
+
+
+def _integer(value: Any) -> Optional[int]:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return None
+
+
+def _number(value: Any) -> Optional[float]:
+    return float(value) if isinstance(value, (int, float)) else None
+
+
+def _boolean(value: Any) -> Optional[bool]:
+    return value if isinstance(value, bool) else None
+
+
+# Field type -> (pyarrow type name, cell conversion). Cells that do not fit the type are written as null.
+_PARQUET_TYPES: Dict[str, tuple] = {
+    "integer": ("int64", _integer),
+    "int": ("int64", _integer),
+    "number": ("float64", _number),
+    "float": ("float64", _number),
+    "boolean": ("bool_", _boolean),
+    "bool": ("bool_", _boolean),
+}
+
+
+async def _batches(rows: AsyncIterator[dict], size: int) -> AsyncIterator[List[dict]]:
+    batch: List[dict] = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def csv_chunks(fields: List[dict], rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Write rows as CSV, a header line first.
+
+    Args:
+        fields: The run's fields schema
+        rows: Result rows
+
+    Yields:
+        bytes: UTF-8 CSV, one chunk per batch of rows
+    """
+    columns = export_columns(fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for batch in _batches(rows, CSV_BATCH_ROWS):
+        writer.writerows([_text(row.get(column)) for column in columns] for row in batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks: List[bytes] = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        # The Parquet writer records offsets from tell(), so it counts drained bytes too.
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+async def parquet_chunks(fields: List[dict], rows: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """
+    Write rows as a Parquet file, one row group per batch of rows.
+
+    Args:
+        fields: The run's fields schema
+        rows: Result rows
+
+    Yields:
+        bytes: The file in order, as each row group is written
+
+    Raises:
+        RuntimeError: If pyarrow is not installed
+    """
+    if not parquet_available():
+        raise RuntimeError("Parquet export requires pyarrow")
+    columns = export_columns(fields)
+    types = {field["name"]: field.get("type") for field in fields if field.get("name")}
+    converters: List[Callable[[Any], Any]] = []
+    schema_fields = []
+    for column in columns:
+        type_name, convert = _PARQUET_TYPES.get(str(types[column]).lower(), ("string", _text))
+        converters.append(convert)
+        schema_fields.append(pa.field(column, getattr(pa, type_name)()))
+    schema = pa.schema(schema_fields)
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    async for batch in _batches(rows, PARQUET_ROW_GROUP_ROWS):
+        arrays = [
+            pa.array([convert(row.get(column)) for row in batch], type=schema.field(column).type)
+            for column, convert in zip(columns, converters)
+        ]
+        writer.write_batch(pa.record_batch(arrays, schema=schema))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
@@ -0,0 +1,211 @@
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+
+
+# Declarative index registry, keyed by MongoDB collection name.
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "collections": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("document_ids", ASCENDING)], name="document_ids"),
+        # Name search: prefix ranges on the normalized name, and full text, per user.
+        IndexModel([("user_id", ASCENDING), ("name_key", ASCENDING), ("id", ASCENDING)], name="user_id_name_key_id"),
+        IndexModel(
+            [("user_id", ASCENDING), ("collection_name", TEXT)],
+            name="user_id_collection_name_text",
+            language_override="text_language",
+        ),
+    ],
+    "reviews": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("id", ASCENDING)], name="user_id_id"),
+        IndexModel([("collection_ids", ASCENDING)], name="collection_ids"),
+        IndexModel([("user_id", ASCENDING), ("name_key", ASCENDING), ("id", ASCENDING)], name="user_id_name_key_id"),
+        # Matches in the name rank above matches in the prompt.
+        IndexModel(
+            [("user_id", ASCENDING), ("name", TEXT), ("prompt", TEXT)],
+            name="user_id_name_prompt_text",
+            weights={"name": 10, "prompt": 1},
+            language_override="text_language",
+        ),
+    ],
+    "collection_document_buckets": [
+        # Unique across buckets, so an id can live in only one bucket per collection.
+        # Empty buckets are excluded, as they would all index the same key.
+        IndexModel(
+            [("collection_id", ASCENDING), ("document_ids", ASCENDING)],
+            name="collection_id_document_ids_unique",
+            unique=True,
+            partialFilterExpression={"count": {"$gt": 0}},
+        ),
+        IndexModel([("collection_id", ASCENDING), ("count", ASCENDING)], name="collection_id_count"),
+        IndexModel([("collection_id", ASCENDING), ("_id", ASCENDING)], name="collection_id_id"),
+        # Reverse lookup of bucketed ids, which the collection_id-prefixed index cannot serve.
+        IndexModel(
+            [("document_ids", ASCENDING)],
+            name="document_ids",
+            partialFilterExpression={"count": {"$gt": 0}},
+        ),
+    ],
+    "review_runs": [
+        IndexModel([("review_id", ASCENDING), ("id", ASCENDING)], name="review_id_id_unique", unique=True),
+        IndexModel([("review_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)], name="review_id_created_at_id"),
+        # Runs written before delta encoding have no sequence number.
+        IndexModel(
+            [("review_id", ASCENDING), ("sequence", ASCENDING)],
+            name="review_id_sequence_unique",
+            unique=True,
+            partialFilterExpression={"sequence": {"$exists": True}},
+        ),
+    ],
+}
+
+# Query shapes issued by the MongoDB query methods, used by the plan check.
+# Keys are the method names, with a ":variant" suffix for methods that run
+# more than one shape; values are (collection name, sample filter, sort).
+_PAGE_SORT = [("id", ASCENDING)]
+_SAMPLE = "__plan_check__"
+
+QUERY_SHAPES: Dict[str, tuple] = {
+    "get_user": ("users", {"id": _SAMPLE}, None),
+    "get_user_by_email": ("users", {"email": _SAMPLE}, None),
+    "list_users": ("users", {"id": {"$gt": _SAMPLE}}, _PAGE_SORT),
+    "get_collection": ("collections", {"id": _SAMPLE}, None),
+    "list_collections": ("collections", {"user_id": _SAMPLE, "id": {"$gt": _SAMPLE}}, _PAGE_SORT),
+    "list_collections:all": ("collections", {"id": {"$gt": _SAMPLE}}, _PAGE_SORT),
+    "delete_collection": ("collection_document_buckets", {"collection_id": _SAMPLE}, None),
+    "get_review": ("reviews", {"id": _SAMPLE}, None),
+    "list_reviews": ("reviews", {"user_id": _SAMPLE, "id": {"$gt": _SAMPLE}}, _PAGE_SORT),
+    "list_reviews:all": ("reviews", {"id": {"$gt": _SAMPLE}}, _PAGE_SORT),
+    "delete_review": ("review_runs", {"review_id": _SAMPLE, "results_file": {"$ne": None}}, None),
+    "is_document_in_collection": (
+        "collection_document_buckets",
+        {"collection_id": _SAMPLE, "count": {"$gt": 0}, "document_ids": _SAMPLE},
+        None,
+    ),
+    "list_collection_documents": (
+        "collection_document_buckets",
+        {"collection_id": _SAMPLE, "count": {"$gt": 0}},
+        [("_id", ASCENDING)],
+    ),
+    "_bucket_members": (
+        "collection_document_buckets",
+        {"collection_id": _SAMPLE, "count": {"$gt": 0}, "document_ids": {"$in": [_SAMPLE]}},
+        None,
+    ),
+    "_push_to_buckets": (
+        "collection_document_buckets",
+        {"collection_id": _SAMPLE, "count": {"$lt": 1000}},
+        [("count", DESCENDING)],
+    ),
+    "add_review_run": ("review_runs", {"review_id": _SAMPLE, "sequence": 0}, None),
+    "get_review_run": ("review_runs", {"id": _SAMPLE, "review_id": _SAMPLE}, None),
+    "list_review_runs": ("review_runs", {"review_id": _SAMPLE}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    "search_collections": (
+        "collections",
+        {"user_id": _SAMPLE, "name_key": {"$gte": "plan", "$lt": "plan\U0010ffff"}},
+        [("name_key", ASCENDING), ("id", ASCENDING)],
+    ),
+    "search_collections:text": ("collections", {"user_id": _SAMPLE, "$text": {"$search": "plan"}}, None),
+    "search_reviews": (
+        "reviews",
+        {"user_id": _SAMPLE, "name_key": {"$gte": "plan", "$lt": "plan\U0010ffff"}},
+        [("name_key", ASCENDING), ("id", ASCENDING)],
+    ),
+    "search_reviews:text": ("reviews", {"user_id": _SAMPLE, "$text": {"$search": "plan"}}, None),
+    "find_document_references": ("collections", {"document_ids": {"$in": [_SAMPLE]}}, None),
+    "find_document_references:buckets": (
+        "collection_document_buckets",
+        {"document_ids": {"$in": [_SAMPLE]}, "count": {"$gt": 0}},
+        None,
+    ),
+    "find_document_references:reviews": ("reviews", {"collection_ids": {"$in": [_SAMPLE]}}, None),
+    "diff_review_runs": (
+        "review_runs",
+        {"review_id": _SAMPLE, "sequence": {"$gt": 0, "$lte": 9}},
+        [("sequence", ASCENDING)],
+    ),
+    "diff_review_runs:heads": ("review_runs", {"review_id": _SAMPLE, "id": {"$in": [_SAMPLE]}}, None),
+}
+
+# Query methods whose filters are already one of the shapes above, by that shape's key.
+SHARED_QUERY_SHAPES: Dict[str, str] = {
+    "get_user_dashboard": "get_user",
+    "update_user": "get_user",
+    "delete_user": "get_user",
+    "stream_users": "list_users",
+    "list_collection_summaries": "list_collections",
+    "stream_collections": "list_collections",
+    "update_collection": "delete_collection",
+    "bulk_create_collections": "delete_collection",
+    "_add_document": "get_collection",
+    "_add_documents": "get_collection",
+    "_apply_document_batch": "get_collection",
+    "_remove_document": "get_collection",
+    "_is_bucketed": "get_collection",
+    "_spill_to_buckets": "get_collection",
+    "_add_to_buckets": "_bucket_members",
+    "_remove_from_buckets": "_bucket_members",
+    "_push_one_to_bucket": "_push_to_buckets",
+    "list_review_summaries": "list_reviews",
+    "stream_reviews": "list_reviews",
+    "query_review_results": "get_review",
+    "open_run_results": "get_review_run",
+    "stream_run_results": "get_review_run",
+    "query_run_results": "get_review_run",
+    "_decode_run_docs": "diff_review_runs",
+}
+
+# Query methods the plan check leaves out: helpers that run their caller's
+# filter, or look documents up by id on whichever collection they are given,
+# and maintenance jobs that scan for documents no index can find.
+UNCHECKED_QUERY_METHODS = frozenset({
+    "_get_cached",
+    "_get_version",
+    "_notify",
+    "_update",
+    "_conditional_update",
+    "_paginate",
+    "_paginate_aggregate",
+    "_stream",
+    "_search",
+    "_query_results",
+    "check_query_plans",
+    "migrate_embedded_runs",
+    "backfill_name_keys",
+})
+
+
+def find_plan_stages(plan: Any) -> List[str]:
+    """
+    Collect every stage name in an explain() plan tree.
+
+    Args:
+        plan: A plan document (or any nested part of an explain() result)
+
+    Returns:
+        List of stage names found, in depth-first order
+    """
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(find_plan_stages(value))
+    elif isinstance(plan, list):
+        for item in plan:
+            stages.extend(find_plan_stages(item))
+    return stages
+
+
+def winning_plan(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract the winning plan from an explain() result across server versions."""
+    planner = explain.get("queryPlanner", {})
+    plan = planner.get("winningPlan", {})
+    # Servers using the slot based engine nest the classic tree under queryPlan.
+    return plan.get("queryPlan", plan)
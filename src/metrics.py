@@ -0,0 +1,395 @@
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+import bson
+from bson.errors import InvalidDocument
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Number of recent command durations kept for the readiness report.
+RECENT_COMMANDS = 256
+
+# Latency buckets in seconds, from sub-millisecond index hits to multi-second scans.
+LATENCY_BUCKETS: Tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic counter with a fixed set of label names.
+
+    Args:
+        name: Metric name, e.g. mongodb_command_errors_total
+        help_text: One-line description for the HELP line
+        label_names: Names of the labels every sample carries
+    """
+
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(tuple(str(labels[name]) for name in self.label_names), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram:
+    """
+    Cumulative histogram with a fixed set of label names.
+
+    Args:
+        name: Metric name, e.g. http_request_duration_seconds
+        help_text: One-line description for the HELP line
+        label_names: Names of the labels every sample carries
+        buckets: Upper bounds of the buckets, ascending; +Inf is implied
+    """
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.label_names)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = entry[0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        entry[1] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(tuple(str(labels[name]) for name in self.label_names))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Holds the application's metrics and renders them in the Prometheus text format.
+
+    Metrics are updated from the event loop thread only (the ASGI middleware and
+    the async MongoDB client's listeners), so no locking is needed.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, help_text: str, label_names: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name: str, help_text: str, label_names: Iterable[str] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def _register(self, metric):
+        # Registering the same metric again (e.g. a second MongoDB client) shares the existing one.
+        existing = self._metrics.get(metric.name)
+        if existing is None:
+            self._metrics[metric.name] = metric
+            return metric
+        if type(existing) is not type(metric) or existing.label_names != metric.label_names:
+            raise ValueError(f"Metric {metric.name} already registered with a different type or labels")
+        return existing
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route template, method and status.
+
+    Routes are labelled by their path template (e.g. /reviews/{review_id}), never
+    by the raw path, so label cardinality stays bounded. Streaming responses are
+    timed until the last chunk is sent.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry"):
+        self.app = app
+        self.requests = registry.histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route template, method and status",
+            ("method", "route", "status"),
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.requests.observe(
+                time.perf_counter() - start,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code,
+            )
+
+
+def _bson_size(document) -> int:
+    try:
+        return len(bson.encode(document))
+    except (InvalidDocument, TypeError):
+        return 0
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """
+    pymongo command listener recording per-command timings, payload sizes and errors.
+
+    Commands slower than slow_query_ms are logged at WARNING with their command
+    name, collection and duration; 0 disables the slow-query log.
+
+    Args:
+        registry: Registry to record the mongodb_command_* metrics in
+        slow_query_ms: Slow-query log threshold in milliseconds
+    """
+
+    def __init__(self, registry: MetricsRegistry, slow_query_ms: float = 100.0):
+        self.slow_query_ms = slow_query_ms
+        self.durations = registry.histogram(
+            "mongodb_command_duration_seconds",
+            "MongoDB command latency by command and collection",
+            ("command", "collection"),
+        )
+        self.request_bytes = registry.counter(
+            "mongodb_command_request_bytes_total",
+            "BSON bytes sent to MongoDB by command and collection",
+            ("command", "collection"),
+        )
+        self.reply_bytes = registry.counter(
+            "mongodb_command_reply_bytes_total",
+            "BSON bytes received from MongoDB by command and collection",
+            ("command", "collection"),
+        )
+        self.errors = registry.counter(
+            "mongodb_command_errors_total",
+            "Failed MongoDB commands by command, collection and error code",
+            ("command", "collection", "code"),
+        )
+        # Collection of each in-flight command, keyed by (connection, request id).
+        self._pending: Dict[tuple, str] = {}
+        self._recent: deque = deque(maxlen=RECENT_COMMANDS)
+
+    @staticmethod
+    def _collection(event: monitoring.CommandStartedEvent) -> str:
+        target = event.command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = self._collection(event)
+        self._pending[(event.connection_id, event.request_id)] = collection
+        self.request_bytes.inc(_bson_size(event.command), command=event.command_name, collection=collection)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        self._record(event, collection)
+        self.reply_bytes.inc(_bson_size(event.reply), command=event.command_name, collection=collection)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        collection = self._pending.pop((event.connection_id, event.request_id), "")
+        self._record(event, collection)
+        code = event.failure.get("code", "") if isinstance(event.failure, dict) else ""
+        self.errors.inc(command=event.command_name, collection=collection, code=code)
+
+    def _record(self, event, collection: str) -> None:
+        seconds = event.duration_micros / 1_000_000
+        self.durations.observe(seconds, command=event.command_name, collection=collection)
+        self._recent.append(seconds)
+        if self.slow_query_ms and seconds * 1000 >= self.slow_query_ms:
+            logger.warning(
+                "slow mongodb command command=%s collection=%s duration_ms=%.1f database=%s",
+                event.command_name,
+                collection,
+                seconds * 1000,
+                event.database_name,
+            )
+
+
+    def recent_latency(self) -> Dict[str, float]:
+        """
+        Summarize the latency of the last RECENT_COMMANDS commands.
+
+        Returns:
+            dict: samples, p50_ms, p99_ms and max_ms (zeros before the first command)
+        """
+        durations = sorted(self._recent)
+        if not durations:
+            return {"samples": 0, "p50_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+        def percentile(fraction: float) -> float:
+            return round(durations[min(len(durations) - 1, int(fraction * len(durations)))] * 1000, 2)
+
+        return {
+            "samples": len(durations),
+            "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(durations[-1] * 1000, 2),
+        }
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """
+    pymongo connection pool listener keeping live pool occupancy per server.
+
+    Counts are derived from the pool events, so reading them never touches the
+    driver's internals or the network.
+    """
+
+    def __init__(self):
+        self._pools: Dict[tuple, Dict[str, int]] = {}
+
+    def _pool(self, address: tuple) -> Dict[str, int]:
+        pool = self._pools.get(address)
+        if pool is None:
+            pool = self._pools[address] = {"open": 0, "in_use": 0, "waiting": 0}
+        return pool
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        self._pool(event.address)
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        self._pools.pop(event.address, None)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        self._pool(event.address)["open"] += 1
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        pool = self._pool(event.address)
+        pool["open"] = max(0, pool["open"] - 1)
+
+    def connection_check_out_started(self, event: monitoring.ConnectionCheckOutStartedEvent) -> None:
+        self._pool(event.address)["waiting"] += 1
+
+    def connection_check_out_failed(self, event: monitoring.ConnectionCheckOutFailedEvent) -> None:
+        pool = self._pool(event.address)
+        pool["waiting"] = max(0, pool["waiting"] - 1)
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        pool = self._pool(event.address)
+        pool["waiting"] = max(0, pool["waiting"] - 1)
+        pool["in_use"] += 1
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        pool = self._pool(event.address)
+        pool["in_use"] = max(0, pool["in_use"] - 1)
+
+    def stats(self, max_pool_size: int) -> Dict[str, int]:
+        """
+        Pool occupancy summed over every server the client talks to.
+
+        Args:
+            max_pool_size: The client's maxPoolSize, which applies per server
+
+        Returns:
+            dict: in_use, idle and open connections, wait_queue, max_pool_size and
+            available, the checkouts left before the busiest pool saturates
+        """
+        pools = list(self._pools.values())
+        in_use = sum(pool["in_use"] for pool in pools)
+        open_connections = sum(pool["open"] for pool in pools)
+        busiest = max((pool["in_use"] for pool in pools), default=0)
+        return {
+            "in_use": in_use,
+            "idle": max(0, open_connections - in_use),
+            "open": open_connections,
+            "available": max(0, max_pool_size - busiest),
+            "wait_queue": sum(pool["waiting"] for pool in pools),
+            "max_pool_size": max_pool_size,
+        }
+
+
+def command_listener_from_env(registry: MetricsRegistry) -> CommandMetricsListener:
+    """
+    Build the command listener with the threshold from MONGODB_SLOW_QUERY_MS.
+
+    A threshold of 0 disables the slow-query log.
+    """
+    return CommandMetricsListener(registry, slow_query_ms=float(os.getenv("MONGODB_SLOW_QUERY_MS", "100")))
+
+
+# Process-wide registry rendered by GET /metrics.
+REGISTRY = MetricsRegistry()
@@ -1,5 +1,10 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, ClassVar, Generic, Literal, Optional, TypeVar
+
+from src.columnar import decode_results
+from src.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+
+T = TypeVar("T")
 
 class User(BaseModel):
     id: str = Field(..., description="The unique identifier for the user")
@@ -13,8 +18,19 @@ class Collection(BaseModel):
     user_id: str = Field(..., description="The ID of the user who owns this collection")
     collection_name: str = Field(..., description="The name of the document collection")
     document_ids: list[str] = Field(default_factory=list, description="The list of document ids")
+    bucketed: bool = Field(False, description="Whether document ids are stored in buckets instead of document_ids")
+    document_count: Optional[int] = Field(None, description="Number of documents when stored in buckets")
+    version: int = Field(0, description="Incremented by every write; set by the server and sent as the ETag")
+
+class ColumnarResultsModel(BaseModel):
+    """Base for models with result rows; also accepts results in the columnar form of src/columnar.py."""
 
-class Review(BaseModel):
+    @model_validator(mode="before")
+    @classmethod
+    def decode_columnar_results(cls, data: Any) -> Any:
+        return decode_results(data) if isinstance(data, dict) else data
+
+class Review(ColumnarResultsModel):
     id: str = Field(..., description="The unique identifier for the review")
     user_id: str = Field(..., description="The unique identifier for the user who made the review")
     name: str = Field(..., description="The name of the review")
@@ -22,10 +38,17 @@ class Review(BaseModel):
     collection_ids: list[str] = Field(default_factory=list, description="The list of collection ids")
     fields: list[dict] = Field(default_factory=list, description=" The schema of columns")
     results: list[dict] = Field(default_factory=list, description="The output results")
-    runs: list[dict] = Field(default_factory=list, description="List of previous review runs")
+    runs: list[dict] = Field(default_factory=list, description="Legacy embedded runs; runs are stored in review_runs")
     updated_at: Optional[str] = Field(None, description="ISO timestamp of last update")
+    version: int = Field(0, description="Incremented by every write, including added runs; set by the server and sent as the ETag")
+
+class ResultsFile(BaseModel):
+    file_id: str = Field(..., description="GridFS file holding the results as NDJSON")
+    rows: int = Field(..., description="Number of result rows")
+    size: int = Field(..., description="Size of the results in bytes before compression")
+    compression: Optional[str] = Field(None, description="gzip, or null when stored uncompressed")
 
-class ReviewRun(BaseModel):
+class ReviewRun(ColumnarResultsModel):
     id: str = Field(..., description="The unique identifier for the run")
     review_id: str = Field(..., description="The ID of the parent review")
     created_at: str = Field(..., description="ISO timestamp of creation")
@@ -35,3 +58,149 @@ class ReviewRun(BaseModel):
     fields: list[dict] = Field(default_factory=list, description="Snapshot of columns")
     results: list[dict] = Field(default_factory=list, description="The results of this run")
     status: str = Field(..., description="Run status (success, failed, etc)")
+    results_file: Optional[ResultsFile] = Field(
+        None, description="Set when large results are stored in GridFS; results is then empty unless inlined"
+    )
+
+class RunDelta(BaseModel):
+    length: int = Field(..., description="Number of rows after the change")
+    rows: list[dict] = Field(default_factory=list, description="Changed rows: {i, row} for whole rows, {i, set, unset} for changed cells")
+
+class RunDiff(BaseModel):
+    review_id: str = Field(..., description="The ID of the parent review")
+    from_run_id: str = Field(..., description="The run the diff starts from")
+    to_run_id: str = Field(..., description="The run the diff leads to")
+    fields: RunDelta = Field(..., description="Changes to the columns")
+    results: RunDelta = Field(..., description="Changes to the results")
+
+class ReviewSummary(BaseModel):
+    id: str = Field(..., description="The unique identifier for the review")
+    user_id: str = Field(..., description="The unique identifier for the user who made the review")
+    name: str = Field(..., description="The name of the review")
+    updated_at: Optional[str] = Field(None, description="ISO timestamp of last update")
+    collection_count: int = Field(0, description="Number of collections the review covers")
+    field_count: int = Field(0, description="Number of columns in the schema")
+    result_count: int = Field(0, description="Number of result rows")
+    run_count: int = Field(0, description="Number of runs")
+
+class CollectionSummary(BaseModel):
+    id: str = Field(..., description="The unique identifier for document collection")
+    user_id: str = Field(..., description="The ID of the user who owns this collection")
+    collection_name: str = Field(..., description="The name of the document collection")
+    document_count: int = Field(0, description="Number of documents in the collection")
+
+class DocumentIdsRequest(BaseModel):
+    document_ids: list[str] = Field(..., description="The document ids to add or remove")
+
+class ResultsFilter(BaseModel):
+    column: str = Field(..., description="A column defined in fields")
+    op: Literal["eq", "ne", "gt", "gte", "lt", "lte", "in", "nin", "contains", "exists"] = Field(
+        "eq", description="Comparison; contains is a case-insensitive substring match, exists takes true or false"
+    )
+    value: Any = Field(None, description="Value to compare with; a list for in and nin")
+
+class ResultsSort(BaseModel):
+    column: str = Field(..., description="A column defined in fields")
+    direction: Literal["asc", "desc"] = Field("asc", description="Sort direction")
+
+class ResultsQuery(BaseModel):
+    filters: list[ResultsFilter] = Field(default_factory=list, description="Conditions every returned row meets")
+    sort: list[ResultsSort] = Field(default_factory=list, description="Sort keys, most significant first; ties keep row order")
+    columns: Optional[list[str]] = Field(None, description="Columns to return; all when omitted")
+    offset: int = Field(0, ge=0, description="Number of matching rows to skip")
+    limit: int = Field(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of rows to return")
+
+class ResultsPage(BaseModel):
+    items: list[dict] = Field(default_factory=list, description="The matching rows on this page")
+    total: int = Field(0, description="Number of rows matching the filters")
+    offset: int = Field(0, description="Offset of the first row on this page")
+    limit: int = Field(DEFAULT_PAGE_SIZE, description="Requested page size")
+
+# Upper bound on document ids per batched reference lookup.
+MAX_REFERENCE_LOOKUP = 1000
+
+class DocumentReferencesRequest(BaseModel):
+    document_ids: list[str] = Field(..., max_length=MAX_REFERENCE_LOOKUP, description="The document ids to look up")
+
+class DocumentReferences(BaseModel):
+    document_id: str = Field(..., description="The document id")
+    collection_ids: list[str] = Field(default_factory=list, description="Collections that contain the document")
+    review_ids: list[str] = Field(default_factory=list, description="Reviews that cover one of those collections")
+
+class BulkItemError(BaseModel):
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = Field(None, description="The id of the item")
+    code: Optional[int] = Field(None, description="MongoDB error code (11000 for duplicate keys)")
+    error: str = Field(..., description="Error message")
+
+class BulkResult(BaseModel):
+    succeeded: list[str] = Field(default_factory=list, description="Ids of the items written")
+    failed: list[BulkItemError] = Field(default_factory=list, description="Items that could not be written")
+
+class Page(BaseModel, Generic[T]):
+    items: list[T] = Field(default_factory=list, description="The items on this page")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page, null on the last page")
+
+class ChangeEvent(BaseModel):
+    kind: str = Field(..., description="review or collection")
+    id: str = Field(..., description="The id of the changed review or collection")
+    user_id: Optional[str] = Field(None, description="The owner, when known")
+    change: str = Field(..., description="updated, run_added, documents_changed or deleted")
+    version: Optional[int] = Field(None, description="Version after the change, when known")
+
+class UserDashboard(BaseModel):
+    user: User = Field(..., description="The user")
+    collections: Page[CollectionSummary] = Field(..., description="First page of the user's collection summaries")
+    reviews: Page[ReviewSummary] = Field(..., description="First page of the user's review summaries")
+
+class PatchModel(BaseModel):
+    """
+    Base for sparse update bodies. Only fields present in the request are applied:
+    plain fields are $set, add_<field>/remove_<field> map to $addToSet/$pull on an
+    id list and append_<field> maps to $push.
+
+    Plain fields default to None so they can be left out, but an explicit null
+    is only accepted for the fields listed in nullable_fields; anything else
+    would store a document the main model can no longer read.
+    """
+
+    nullable_fields: ClassVar[frozenset] = frozenset()
+
+    @model_validator(mode="after")
+    def check_list_operations(self):
+        for name in self.model_fields_set:
+            if name.startswith("add_") and f"remove_{name[4:]}" in self.model_fields_set:
+                raise ValueError(f"Cannot add to and remove from {name[4:]} in the same request")
+        return self
+
+    @model_validator(mode="after")
+    def check_nulls(self):
+        for name in self.model_fields_set:
+            if getattr(self, name) is None and name not in self.nullable_fields:
+                raise ValueError(f"{name} cannot be null")
+        return self
+
+class UserPatch(PatchModel):
+    name: Optional[str] = Field(None, description="The name of the user")
+    email: Optional[str] = Field(None, description="The email of the user")
+    password: Optional[str] = Field(None, description="The password of the user")
+    add_review_ids: list[str] = Field(default_factory=list, description="Review ids to add")
+    remove_review_ids: list[str] = Field(default_factory=list, description="Review ids to remove")
+
+class CollectionPatch(PatchModel):
+    collection_name: Optional[str] = Field(None, description="The name of the document collection")
+    add_document_ids: list[str] = Field(default_factory=list, description="Document ids to add")
+    remove_document_ids: list[str] = Field(default_factory=list, description="Document ids to remove")
+
+class ReviewPatch(PatchModel):
+    # A null results clears the rows, as patch_review stores it as [].
+    nullable_fields: ClassVar[frozenset] = frozenset({"prompt", "results", "updated_at"})
+
+    name: Optional[str] = Field(None, description="The name of the review")
+    prompt: Optional[str] = Field(None, description="The user prompt")
+    fields: Optional[list[dict]] = Field(None, description="The schema of columns")
+    results: Optional[list[dict]] = Field(None, description="Replacement output results")
+    updated_at: Optional[str] = Field(None, description="ISO timestamp of last update")
+    append_results: list[dict] = Field(default_factory=list, description="Result rows to append")
+    add_collection_ids: list[str] = Field(default_factory=list, description="Collection ids to add")
+    remove_collection_ids: list[str] = Field(default_factory=list, description="Collection ids to remove")
@@ -1,36 +1,901 @@
 import os
-from typing import Optional, List
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
+import time
+from datetime import datetime, timezone
+from functools import reduce
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, List, Tuple
+from bson import ObjectId
+from bson.errors import InvalidId
+import pymongo
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.asynchronous.collection import AsyncCollection
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from gridfs import AsyncGridFSBucket
+from gridfs.errors import NoFile
+from pydantic_core import to_json
 from dotenv import load_dotenv
-from src.models import User, Collection as CollectionModel, Review, ReviewRun
+from src.models import (
+    User,
+    Collection as CollectionModel,
+    Review,
+    ReviewRun,
+    RunDelta,
+    RunDiff,
+    Page,
+    PatchModel,
+    ReviewSummary,
+    BulkItemError,
+    BulkResult,
+    CollectionSummary,
+    ChangeEvent,
+    DocumentReferences,
+    ResultsPage,
+    ResultsQuery,
+    UserDashboard,
+    UserPatch,
+    CollectionPatch,
+    ReviewPatch,
+)
+from src.cache import Cache, NullCache
+from src.events import LOCAL, EventBus, change_from_stream, events_source_from_env
+from src.metrics import REGISTRY, MetricsRegistry, PoolStatsListener, command_listener_from_env
+from src.indexes import INDEXES, QUERY_SHAPES, find_plan_stages, winning_plan
+from src.pagination import DEFAULT_PAGE_SIZE, decode_cursor, encode_cursor, keyset_filter
+from src.columnar import COLUMNAR_FIELD, columnar_storage_from_env, decode_results, encode_results
+from src.offload import (
+    RESULTS_BUCKET,
+    decode_payload,
+    encode_payload,
+    iter_payload,
+    iter_rows,
+    offload_compression_from_env,
+    offload_threshold_from_env,
+    results_size,
+)
+from src.results_query import page_from_facet, query_rows, results_pipeline, validate_query
+from src.search import NAME_KEY_FIELD, NAME_FIELDS, PREFIX, name_key_update, normalize_name, search_cursor, search_pipeline, with_name_key
+from src.run_deltas import DELTA, FULL, compose_deltas, decode_runs, diff_rows, encode_run, strip_storage_fields
 
 load_dotenv()
 
 MONGODB_ATLAS_CLUSTER_URI = os.getenv("MONGODB_ATLAS_CLUSTER_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
+STREAM_BATCH_SIZE = 500
+BULK_CHUNK_SIZE = 1000
+# Collections holding more than INLINE_DOCUMENT_LIMIT document ids move them into
+# bucket documents of up to DOCUMENT_BUCKET_SIZE ids each.
+INLINE_DOCUMENT_LIMIT = 10000
+DOCUMENT_BUCKET_SIZE = 1000
+# Runs are stored as deltas against the previous run, with a full checkpoint every
+# RUN_CHECKPOINT_INTERVAL runs to bound how many documents a read has to replay.
+RUN_CHECKPOINT_INTERVAL = 10
+# Reviews and collections carry a version that every write increments. It backs
+# the ETag, If-None-Match and If-Match handling of the API.
+VERSION_FIELD = "version"
+# Counters the server keeps on stored documents, which replacements must not reset.
+# run_sequence numbers a review's runs; restarting it would collide with stored runs.
+CARRIED_FIELDS = ("run_sequence",)
+
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _array_size(field: str) -> dict:
+    return {"$size": {"$ifNull": [f"${field}", []]}}
+
+
+# Aggregation stages that reduce a review to a ReviewSummary on the server.
+# Run counts come from review_runs plus any legacy runs still embedded.
+REVIEW_SUMMARY_STAGES: List[dict] = [
+    {"$lookup": {
+        "from": "review_runs",
+        "localField": "id",
+        "foreignField": "review_id",
+        "pipeline": [{"$count": "n"}],
+        "as": "run_stats",
+    }},
+    {"$project": {
+        "_id": 0,
+        "id": 1,
+        "user_id": 1,
+        "name": 1,
+        "updated_at": 1,
+        "collection_count": _array_size("collection_ids"),
+        "field_count": _array_size("fields"),
+        # Columnar results keep their row count; appended rows are in results.
+        "result_count": {"$add": [_array_size("results"), {"$ifNull": [f"${COLUMNAR_FIELD}.length", 0]}]},
+        "run_count": {"$add": [
+            {"$ifNull": [{"$first": "$run_stats.n"}, 0]},
+            _array_size("runs"),
+        ]},
+    }},
+]
+
+# Projection that reduces a collection to a CollectionSummary on the server.
+COLLECTION_SUMMARY_STAGES: List[dict] = [
+    {"$project": {
+        "_id": 0,
+        "id": 1,
+        "user_id": 1,
+        "collection_name": 1,
+        "document_count": {"$cond": [
+            {"$eq": ["$bucketed", True]},
+            {"$ifNull": ["$document_count", 0]},
+            _array_size("document_ids"),
+        ]},
+    }},
+]
+
+
+def _page_stages(limit: int, stages: List[dict]) -> List[dict]:
+    """Sort by id, keep one document past the page to detect a next page, then shape with stages."""
+    return [{"$sort": {"id": ASCENDING}}, {"$limit": limit + 1}, *stages]
+
+
+def _id_page(model, item_dicts: List[dict], limit: int) -> Page:
+    """Build a page from the output of _page_stages, with a cursor when more documents exist."""
+    items = [model.model_validate(item_dict) for item_dict in item_dicts[:limit]]
+    next_cursor = encode_cursor(items[-1].id) if len(item_dicts) > limit else None
+    return Page[model](items=items, next_cursor=next_cursor)
+
+
+def _versioned_replace(doc: dict) -> UpdateOne:
+    """
+    Replace (or insert) a document by id while carrying its version forward.
+
+    A plain ReplaceOne would reset the version and let a stale ETag match
+    again, so the replacement is an update pipeline. $literal keeps values
+    that start with "$" from being read as expressions. Server-maintained
+    counters (CARRIED_FIELDS) are kept the same way; on documents without
+    them the expression is missing and the field is left out.
+    """
+    return UpdateOne(
+        {"id": doc["id"]},
+        [{"$replaceWith": {"$mergeObjects": [
+            {"$literal": doc},
+            {
+                "_id": "$_id",
+                **{field: f"${field}" for field in CARRIED_FIELDS},
+                VERSION_FIELD: {"$add": [{"$ifNull": [f"${VERSION_FIELD}", 0]}, 1]},
+            },
+        ]}}],
+        upsert=True,
+    )
+
+
+def run_from_legacy(review: Review, run: dict, position: int) -> ReviewRun:
+    """
+    Convert a run embedded in Review.runs into a ReviewRun document.
+
+    Embedded runs were free-form dicts, so missing fields are filled from the
+    parent review: a position-based id, the review's updated_at as the
+    creation time and a "success" status.
+
+    Args:
+        review: The review the run belongs to
+        run: The embedded run dict
+        position: Index of the run in Review.runs
+
+    Returns:
+        ReviewRun object
+    """
+    return ReviewRun(
+        id=str(run.get("id") or f"{review.id}-run-{position}"),
+        review_id=review.id,
+        created_at=str(run.get("created_at") or review.updated_at or datetime.now(timezone.utc).isoformat()),
+        name=run.get("name"),
+        prompt=run.get("prompt"),
+        collection_ids=run.get("collection_ids") or [],
+        fields=run.get("fields") or [],
+        results=run.get("results") or [],
+        status=str(run.get("status") or "success"),
+    )
+
+
+def split_document_ids(collection: CollectionModel) -> tuple:
+    """
+    Decide how a collection's document ids are stored.
+
+    Args:
+        collection: Collection object to store
+
+    Returns:
+        tuple: The collection document to write and the ids to put in buckets
+        (empty when the ids fit inline)
+    """
+    collection_dict = collection.model_dump(exclude={"bucketed", "document_count", VERSION_FIELD})
+    if len(collection_dict["document_ids"]) <= INLINE_DOCUMENT_LIMIT:
+        collection_dict["bucketed"] = False
+        return collection_dict, []
+    overflow = collection_dict.pop("document_ids")
+    collection_dict["bucketed"] = True
+    collection_dict["document_count"] = 0
+    return collection_dict, overflow
+
+
+class VersionConflict(Exception):
+    """Raised when a conditional write finds the document at another version."""
+
+
+def bump_version(update: dict) -> dict:
+    """Return an update document that also increments the version."""
+    return {**update, "$inc": {**update.get("$inc", {}), VERSION_FIELD: 1}}
+
+
+def version_filter(item_id: str, expected_versions: Optional[List[int]]) -> dict:
+    """
+    Build the filter for a write that only applies at one of the expected versions.
+
+    Args:
+        item_id: The id of the document
+        expected_versions: Versions the caller last read, or None for an unconditional write
+
+    Returns:
+        dict: Filter on id, and on version when expected_versions is given
+    """
+    query: Dict[str, object] = {"id": item_id}
+    if expected_versions is not None:
+        # Documents written before versioning have no version field and read as 0.
+        query[VERSION_FIELD] = {"$in": expected_versions + ([None] if 0 in expected_versions else [])}
+    return query
+
+
+def build_update(patch: PatchModel) -> dict:
+    """
+    Translate a sparse patch body into the minimal MongoDB update document.
+
+    Args:
+        patch: Patch model; only the fields set in the request are used
+
+    Returns:
+        dict: Update operators, empty if the patch changes nothing
+    """
+    update: Dict[str, dict] = {}
+    for name in patch.model_fields_set:
+        value = getattr(patch, name)
+        if name.startswith("add_"):
+            if value:
+                update.setdefault("$addToSet", {})[name[4:]] = {"$each": value}
+        elif name.startswith("remove_"):
+            if value:
+                update.setdefault("$pull", {})[name[7:]] = {"$in": value}
+        elif name.startswith("append_"):
+            if value:
+                update.setdefault("$push", {})[name[7:]] = {"$each": value}
+        else:
+            update.setdefault("$set", {})[name] = value
+    return update
 
 
 class MongoDB:
-    def __init__(self, database_name: str = DATABASE_NAME):
-        """Initialize MongoDB connection."""
-        self.client: MongoClient = MongoClient(MONGODB_ATLAS_CLUSTER_URI)
-        self.db: Database = self.client[database_name]
+    def __init__(
+        self,
+        database_name: str = DATABASE_NAME,
+        cache: Optional[Cache] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        events: Optional[EventBus] = None,
+    ):
+        """Initialize MongoDB connection.
+
+        The client is PyMongo's native asyncio client, so every query method is
+        a coroutine and never blocks the event loop while waiting on the server.
+        get_user, get_collection and get_review read through the given cache;
+        every write path invalidates the entries it touches. Every command the
+        client sends is timed into the metrics registry (the process-wide one
+        by default) and logged when slower than MONGODB_SLOW_QUERY_MS. With
+        RESULTS_STORAGE=columnar, review and run results are written in the
+        columnar form of src/columnar.py; both forms are always readable. Run
+        results above RESULTS_OFFLOAD_BYTES are written to GridFS instead.
+        Review and collection changes are announced on the events bus by the
+        write methods, unless EVENTS_SOURCE=change_stream hands that to
+        watch_changes.
+        """
+        self.cache: Cache = cache or NullCache()
+        self.columnar_results: bool = columnar_storage_from_env()
+        self.offload_threshold: int = offload_threshold_from_env()
+        self.offload_compression: Optional[str] = offload_compression_from_env()
+        self.metrics: MetricsRegistry = metrics or REGISTRY
+        self.events: EventBus = events or EventBus()
+        self.publish_writes: bool = events_source_from_env() == LOCAL
+        self.command_listener = command_listener_from_env(self.metrics)
+        self.pool_listener = PoolStatsListener()
+        self.client: AsyncMongoClient = AsyncMongoClient(
+            MONGODB_ATLAS_CLUSTER_URI,
+            event_listeners=[self.command_listener, self.pool_listener],
+        )
+        self.db: AsyncDatabase = self.client[database_name]
 
         # Collections
-        self.users_collection: Collection = self.db["users"]
-        self.collections_collection: Collection = self.db["collections"]
-        self.reviews_collection: Collection = self.db["reviews"]
+        self.users_collection: AsyncCollection = self.db["users"]
+        self.collections_collection: AsyncCollection = self.db["collections"]
+        self.reviews_collection: AsyncCollection = self.db["reviews"]
+        self.review_runs_collection: AsyncCollection = self.db["review_runs"]
+        self.document_buckets_collection: AsyncCollection = self.db["collection_document_buckets"]
+        self.results_bucket: AsyncGridFSBucket = AsyncGridFSBucket(self.db, bucket_name=RESULTS_BUCKET)
 
 
-    def close(self):
+    async def close(self):
         """Close the MongoDB connection."""
-        self.client.close()
+        await self.client.close()
+
+    # ==================== Health ====================
+
+    async def ping(self, timeout: float) -> float:
+        """
+        Round-trip a ping command to the server.
+
+        Args:
+            timeout: Seconds to wait, covering server selection and the command itself
+
+        Returns:
+            float: Round-trip time in milliseconds
+
+        Raises:
+            PyMongoError: If the server is unreachable or the timeout expires
+        """
+        start = time.perf_counter()
+        with pymongo.timeout(timeout):
+            await self.client.admin.command("ping")
+        return (time.perf_counter() - start) * 1000
+
+    def pool_stats(self) -> Dict[str, Dict]:
+        """
+        Report connection-pool occupancy and recent command latency without a round trip.
+
+        Returns:
+            dict: "pool" with in_use, idle, open, available, wait_queue and
+            max_pool_size; "latency" with samples, p50_ms, p99_ms and max_ms
+        """
+        return {
+            "pool": self.pool_listener.stats(self.client.options.pool_options.max_pool_size or 0),
+            "latency": self.command_listener.recent_latency(),
+        }
+
+    # ==================== Index Management ====================
+
+    async def ensure_indexes(self) -> None:
+        """Create every index declared in the index registry (idempotent)."""
+        for collection_name, indexes in INDEXES.items():
+            await self.db[collection_name].create_indexes(indexes)
+
+    async def check_query_plans(self) -> Dict[str, List[str]]:
+        """
+        Run explain() for the query shape of every query method.
+
+        Returns:
+            Mapping of method name to the stages of its winning plan
+
+        Raises:
+            RuntimeError: If any query method still resolves to a COLLSCAN
+        """
+        plans = {}
+        collscans = []
+        for method_name, (collection_name, query, sort) in QUERY_SHAPES.items():
+            explain = await self.db[collection_name].find(query, sort=sort).explain()
+            stages = find_plan_stages(winning_plan(explain))
+            plans[method_name] = stages
+            if "COLLSCAN" in stages:
+                collscans.append(f"{method_name} ({collection_name} {query})")
+        if collscans:
+            raise RuntimeError("Collection scans detected for: " + ", ".join(collscans))
+        return plans
+
+    # ==================== Pagination ====================
+    #
+    # Read paths validate each document once, straight from the driver's dict
+    # with model_validate (a single pydantic-core pass), and let MongoDB drop
+    # _id through the projection. The endpoints return these models through
+    # ModelJSONResponse, so FastAPI does not validate them a second time.
+    # model_construct is not used: it runs in Python and is slower than
+    # validating for documents of this size.
+
+    async def _paginate(
+        self,
+        collection: AsyncCollection,
+        query: dict,
+        model,
+        limit: int,
+        after: Optional[str],
+        sort_keys: tuple = ("id",),
+        decode: Optional[Callable[[List[dict]], Awaitable[list]]] = None,
+    ) -> Page:
+        """
+        Fetch one page of documents using a keyset range on indexed sort keys.
+
+        Instead of skip(), the query resumes from the sort key of the last
+        document of the previous page, so every page costs one index seek no
+        matter how deep it is.
+
+        Args:
+            collection: The MongoDB collection to read from
+            query: Base filter (e.g. user_id)
+            model: Pydantic model to build for each document
+            limit: Maximum number of documents to return
+            after: Cursor returned as next_cursor by the previous page
+            sort_keys: Unique, indexed sort key fields, most significant first
+            decode: Coroutine building the models from the page's raw documents,
+                for stored encodings model_validate cannot read directly
+
+        Returns:
+            Page of model objects
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = dict(query)
+        if after:
+            query.update(keyset_filter(list(sort_keys), decode_cursor(after)))
+
+        # Fetch one extra document to learn whether another page exists.
+        sort = [(key, ASCENDING) for key in sort_keys]
+        cursor = collection.find(query, {"_id": 0}).sort(sort).limit(limit + 1)
+        if decode:
+            items = await decode([item_dict async for item_dict in cursor])
+        else:
+            items = [model.model_validate(item_dict) async for item_dict in cursor]
+
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(*(getattr(items[-1], key) for key in sort_keys))
+        return Page[model](items=items, next_cursor=next_cursor)
+
+    async def _paginate_aggregate(
+        self,
+        collection: AsyncCollection,
+        query: dict,
+        stages: List[dict],
+        model,
+        limit: int,
+        after: Optional[str],
+    ) -> Page:
+        """
+        Like _paginate, but shapes each document with aggregation stages.
+
+        The keyset match, sort and limit run first, so the stages only touch
+        the documents on the requested page.
+
+        Args:
+            collection: The MongoDB collection to read from
+            query: Base filter (e.g. user_id)
+            stages: Stages applied to the page (typically a $project)
+            model: Pydantic model to build for each output document
+            limit: Maximum number of documents to return
+            after: Cursor returned as next_cursor by the previous page
+
+        Returns:
+            Page of model objects
+
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        query = dict(query)
+        if after:
+            query.update(keyset_filter(["id"], decode_cursor(after)))
+
+        pipeline = [{"$match": query}, *_page_stages(limit, stages)]
+        return _id_page(model, [item_dict async for item_dict in await collection.aggregate(pipeline)], limit)
+
+    async def _search(
+        self,
+        collection: AsyncCollection,
+        stages: List[dict],
+        model,
+        user_id: str,
+        q: str,
+        mode: str,
+        limit: int,
+        after: Optional[str],
+    ) -> Page:
+        """
+        Fetch one page of a user's documents matching a name search.
+
+        Args:
+            collection: The MongoDB collection to search
+            stages: Summary stages shaping each matching document
+            model: Pydantic model to build for each output document
+            user_id: Owner whose documents are searched
+            q: Name prefix, or a full-text query
+            mode: "prefix" or "text"
+            limit: Maximum number of documents to return
+            after: Cursor returned as next_cursor by the previous page
+
+        Returns:
+            Page of model objects
+
+        Raises:
+            ValueError: If the query is empty or the cursor is malformed
+        """
+        pipeline = search_pipeline(user_id, q, mode, stages, limit, after)
+        item_dicts = [item_dict async for item_dict in await collection.aggregate(pipeline)]
+        items = [model.model_validate(item_dict) for item_dict in item_dicts[:limit]]
+        next_cursor = encode_cursor(*search_cursor(mode, item_dicts[limit - 1])) if len(item_dicts) > limit else None
+        return Page[model](items=items, next_cursor=next_cursor)
+
+    async def _stream(self, collection: AsyncCollection, query: dict, model, batch_size: int) -> AsyncIterator:
+        """
+        Iterate over every matching document without materializing the result.
+
+        The server cursor hands documents over batch_size at a time, so memory
+        stays bounded by one batch however large the result set is.
+
+        Args:
+            collection: The MongoDB collection to read from
+            query: Filter to apply
+            model: Pydantic model to build for each document
+            batch_size: Number of documents per server round trip
+
+        Yields:
+            model objects ordered by ID
+        """
+        cursor = collection.find(query, {"_id": 0}).sort("id", ASCENDING).batch_size(batch_size)
+        async for item_dict in cursor:
+            yield model.model_validate(item_dict)
+
+    # ==================== Read-through Cache ====================
+
+    async def _get_cached(self, kind: str, collection: AsyncCollection, item_id: str, model):
+        """
+        Get a document by id through the cache.
+
+        Args:
+            kind: Cache namespace ("user", "collection" or "review")
+            collection: The MongoDB collection to read on a miss
+            item_id: The id of the document
+            model: Pydantic model to build from the document
+
+        Returns:
+            model object if found, None otherwise
+        """
+        key = (kind, item_id)
+        item = self.cache.get(key)
+        if item is not None:
+            return item
+        # A write that invalidates the key while find_one is awaited makes the
+        # read possibly stale, and the cache then refuses it.
+        generation = self.cache.generation(key)
+        item_dict = await collection.find_one({"id": item_id}, {"_id": 0})
+        if not item_dict:
+            return None
+        item = model.model_validate(item_dict)
+        self.cache.set(key, item, generation=generation)
+        return item
+
+    def _invalidate(self, kind: str, *item_ids: str) -> None:
+        """Drop cached entries after a write."""
+        for item_id in item_ids:
+            self.cache.delete((kind, item_id))
+
+    # ==================== Change Events ====================
+
+    async def _notify(
+        self,
+        kind: str,
+        item_id: str,
+        change: str,
+        user_id: Optional[str] = None,
+        version: Optional[int] = None,
+    ) -> None:
+        """
+        Announce a review or collection change on the events bus.
+
+        Nothing is done while no stream is open. The owner is looked up only
+        when the caller does not know it and a user stream is open.
+        """
+        if not self.publish_writes or not (self.events.has_subscribers(kind) or self.events.has_subscribers("user")):
+            return
+        if user_id is None and self.events.has_subscribers("user"):
+            collection = self.reviews_collection if kind == "review" else self.collections_collection
+            owner = await collection.find_one({"id": item_id}, {"_id": 0, "user_id": 1})
+            user_id = owner.get("user_id") if owner else None
+        self.events.publish(ChangeEvent(kind=kind, id=item_id, user_id=user_id, change=change, version=version))
+
+    async def watch_changes(self) -> None:
+        """
+        Publish review and collection changes from a MongoDB change stream until cancelled.
+
+        Used with EVENTS_SOURCE=change_stream, so writes from every API process
+        (and from scripts) reach the streams. Requires a replica set. The
+        stream only projects ids, owner, version and the names of updated
+        fields, so results never travel with a change. Deletes are not reported
+        because the deleted document's id is no longer available.
+        """
+        pipeline = [
+            {"$match": {
+                "ns.coll": {"$in": [self.reviews_collection.name, self.collections_collection.name]},
+                "operationType": {"$in": ["insert", "update", "replace"]},
+            }},
+            {"$project": {
+                "operationType": 1,
+                "ns": 1,
+                "fullDocument.id": 1,
+                "fullDocument.user_id": 1,
+                f"fullDocument.{VERSION_FIELD}": 1,
+                "changed_fields": {"$map": {
+                    "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+                    "in": "$$this.k",
+                }},
+            }},
+        ]
+        async with await self.db.watch(pipeline, full_document="updateLookup") as stream:
+            async for change in stream:
+                event = change_from_stream(change)
+                if event is not None:
+                    self.events.publish(event)
+
+    async def _get_version(self, kind: str, collection: AsyncCollection, item_id: str) -> Optional[int]:
+        """
+        Get a document's version without loading the document.
+
+        A cached model answers directly; otherwise only the version field is read.
+
+        Returns:
+            int: The version (0 for documents written before versioning), or None if not found
+        """
+        item = self.cache.get((kind, item_id))
+        if item is not None:
+            return item.version
+        item_dict = await collection.find_one({"id": item_id}, {"_id": 0, VERSION_FIELD: 1})
+        if item_dict is None:
+            return None
+        return item_dict.get(VERSION_FIELD, 0)
+
+    async def _conditional_update(
+        self,
+        kind: str,
+        collection: AsyncCollection,
+        item_id: str,
+        update: dict,
+        expected_versions: Optional[List[int]],
+    ):
+        """
+        Apply an update and bump the version, optionally only at the expected versions.
+
+        Returns:
+            UpdateResult of the write
+
+        Raises:
+            VersionConflict: If the document exists at a version other than the expected ones
+        """
+        result = await collection.update_one(version_filter(item_id, expected_versions), bump_version(update))
+        if result.matched_count == 0 and expected_versions is not None:
+            if await collection.count_documents({"id": item_id}, limit=1):
+                raise VersionConflict(f"{kind} {item_id} was changed by another writer")
+        return result
+
+    # ==================== Partial Updates ====================
+
+    async def _patch(self, kind: str, collection: AsyncCollection, item_id: str, patch: PatchModel) -> bool:
+        """
+        Apply only the operators a patch needs, so writes scale with the change.
+
+        Args:
+            kind: Cache namespace of the document
+            collection: The MongoDB collection to update
+            item_id: The id of the document to update
+            patch: Fields to change
+
+        Returns:
+            bool: True if the document exists, False otherwise
+        """
+        return await self._update(kind, collection, item_id, build_update(patch))
+
+    async def _update(self, kind: str, collection: AsyncCollection, item_id: str, update: dict) -> bool:
+        """Run an update built by build_update, skipping the write when it is empty."""
+        if not update:
+            return await collection.count_documents({"id": item_id}, limit=1) > 0
+        if kind in ("collection", "review"):
+            update = bump_version(name_key_update(kind, update))
+        result = await collection.update_one({"id": item_id}, update)
+        self._invalidate(kind, item_id)
+        return result.matched_count > 0
+
+    # ==================== Results Storage ====================
+
+    def _store_results(self, doc: dict) -> dict:
+        """Return a review or run document with its results in the configured storage form."""
+        return encode_results(doc) if self.columnar_results else doc
+
+    def _results_update(self, doc: dict) -> dict:
+        """
+        Build a $set of a document with replacement results.
+
+        Also unsets the results field of the other storage form, so stale rows
+        (or rows appended to a columnar block) do not survive the replacement.
+        """
+        stored = self._store_results(doc)
+        stale = "results" if COLUMNAR_FIELD in stored else COLUMNAR_FIELD
+        return {"$set": stored, "$unset": {stale: ""}}
+
+    async def _prepare_run(self, doc: dict) -> dict:
+        """
+        Return a full run document as it is stored.
+
+        Results above the offload threshold are uploaded to GridFS and replaced by
+        a results_file reference; smaller ones are kept in the configured form.
+        """
+        rows = doc.get("results") or []
+        if not self.offload_threshold or not rows or results_size(rows) <= self.offload_threshold:
+            return self._store_results(doc)
+        payload, size = encode_payload(rows, self.offload_compression)
+        file_id = await self.results_bucket.upload_from_stream(
+            f"{doc['review_id']}/{doc['id']}.ndjson",
+            payload,
+            metadata={"review_id": doc["review_id"], "run_id": doc["id"], "compression": self.offload_compression},
+        )
+        results_file = {"file_id": str(file_id), "rows": len(rows), "size": size, "compression": self.offload_compression}
+        return dict(doc, results=[], results_file=results_file)
+
+    async def _discard_results_files(self, docs: List[dict]) -> None:
+        """Delete the GridFS files referenced by run documents that were not (or are no longer) stored."""
+        for doc in docs:
+            if doc.get("results_file"):
+                try:
+                    await self.results_bucket.delete(ObjectId(doc["results_file"]["file_id"]))
+                except NoFile:
+                    pass
+
+    async def _insert_runs(self, docs: List[dict]) -> int:
+        """
+        Insert full run documents, skipping ones that already exist.
+
+        Returns:
+            int: Number of runs inserted
+        """
+        inserted = 0
+        for offset in range(0, len(docs), BULK_CHUNK_SIZE):
+            chunk = [await self._prepare_run(doc) for doc in docs[offset:offset + BULK_CHUNK_SIZE]]
+            try:
+                result = await self.review_runs_collection.insert_many(chunk, ordered=False)
+                inserted += len(result.inserted_ids)
+            except BulkWriteError as e:
+                # Only duplicates (re-sent or already migrated runs) are expected here.
+                await self._discard_results_files([chunk[error["index"]] for error in e.details["writeErrors"]])
+                if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                    raise
+                inserted += e.details["nInserted"]
+        return inserted
+
+    async def _file_chunks(self, file_id: ObjectId) -> AsyncIterator[bytes]:
+        """Yield a GridFS file chunk by chunk."""
+        stream = await self.results_bucket.open_download_stream(file_id)
+        try:
+            while chunk := await stream.readchunk():
+                yield chunk
+        finally:
+            await stream.close()
+
+    async def _load_results(self, doc: dict) -> dict:
+        """Return a run document with offloaded results read back from GridFS."""
+        results_file = doc.get("results_file")
+        if not results_file:
+            return doc
+        payload = b"".join([chunk async for chunk in self._file_chunks(ObjectId(results_file["file_id"]))])
+        return dict(doc, results=decode_payload(payload, results_file.get("compression")))
+
+    # ==================== Bulk Writes ====================
+
+    async def _bulk_write(
+        self,
+        kind: str,
+        collection: AsyncCollection,
+        docs: List[dict],
+        upsert: bool,
+        chunk_size: int = BULK_CHUNK_SIZE,
+        versioned: bool = False,
+    ) -> BulkResult:
+        """
+        Write many documents with one unordered round trip per chunk.
+
+        Unordered writes keep going past failing items, so a duplicate key
+        only fails that item and is reported with its request index.
+
+        Args:
+            kind: Cache namespace of the documents
+            collection: The MongoDB collection to write to
+            docs: Documents to write, each with an id
+            upsert: Replace documents with the same id instead of failing on them
+            chunk_size: Maximum number of documents per round trip
+            versioned: Start new documents at version 1 and increment the version
+                of replaced ones, instead of resetting it
+
+        Returns:
+            BulkResult with the ids written and the per-item failures
+        """
+        result = BulkResult()
+        for offset in range(0, len(docs), chunk_size):
+            chunk = docs[offset:offset + chunk_size]
+            failed_indexes = set()
+            try:
+                if upsert and versioned:
+                    await collection.bulk_write([_versioned_replace(doc) for doc in chunk], ordered=False)
+                elif upsert:
+                    await collection.bulk_write(
+                        [ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in chunk], ordered=False
+                    )
+                else:
+                    # insert_many adds an _id to each dict; hand it copies.
+                    await collection.insert_many(
+                        [dict(doc, **({VERSION_FIELD: 1} if versioned else {})) for doc in chunk], ordered=False
+                    )
+            except BulkWriteError as e:
+                for error in e.details.get("writeErrors", []):
+                    index = offset + error["index"]
+                    failed_indexes.add(error["index"])
+                    result.failed.append(BulkItemError(
+                        index=index, id=docs[index].get("id"), code=error.get("code"), error=error.get("errmsg", "")
+                    ))
+            for position, doc in enumerate(chunk):
+                if position not in failed_indexes:
+                    result.succeeded.append(doc["id"])
+            if upsert:
+                self._invalidate(kind, *(doc["id"] for doc in chunk))
+        return result
+
+    async def bulk_create_users(self, users: List[User], upsert: bool = False) -> BulkResult:
+        """
+        Create (or with upsert, replace) many users at once.
+
+        Args:
+            users: User objects to write
+            upsert: Replace existing users with the same id
+
+        Returns:
+            BulkResult with per-item success and failure
+        """
+        return await self._bulk_write("user", self.users_collection, [user.model_dump() for user in users], upsert)
+
+    async def bulk_create_collections(self, collections: List[CollectionModel], upsert: bool = False) -> BulkResult:
+        """
+        Create (or with upsert, replace) many collections at once.
+
+        Args:
+            collections: Collection objects to write
+            upsert: Replace existing collections with the same id
+
+        Returns:
+            BulkResult with per-item success and failure
+        """
+        docs = []
+        overflows = {}
+        for collection in collections:
+            collection_dict, overflow = split_document_ids(collection)
+            docs.append(with_name_key("collection", collection_dict))
+            if overflow:
+                overflows[collection.id] = overflow
+        result = await self._bulk_write("collection", self.collections_collection, docs, upsert, versioned=True)
+
+        if upsert and result.succeeded:
+            await self.document_buckets_collection.delete_many({"collection_id": {"$in": result.succeeded}})
+        for collection_id in result.succeeded:
+            if collection_id in overflows:
+                await self._add_to_buckets(collection_id, overflows[collection_id])
+        return result
+
+    async def bulk_create_reviews(self, reviews: List[Review], upsert: bool = False) -> BulkResult:
+        """
+        Create (or with upsert, replace) many reviews at once.
+
+        Runs supplied with the reviews that were written go to review_runs.
+        """
+        docs = [
+            self._store_results(with_name_key("review", review.model_dump(exclude={"runs", VERSION_FIELD})))
+            for review in reviews
+        ]
+        result = await self._bulk_write("review", self.reviews_collection, docs, upsert, versioned=True)
+
+        written = set(result.succeeded)
+        runs = [
+            run_from_legacy(review, run, position).model_dump()
+            for review in reviews if review.id in written
+            for position, run in enumerate(review.runs)
+        ]
+        await self._insert_runs(runs)
+        return result
 
     # ==================== User CRUD Operations ====================
 
-    def create_user(self, user: User) -> str:
+    async def create_user(self, user: User) -> str:
         """
         Create a new user in the database.
 
@@ -41,10 +906,10 @@ class MongoDB:
             str: The ID of the created user
         """
         user_dict = user.model_dump()
-        result = self.users_collection.insert_one(user_dict)
+        result = await self.users_collection.insert_one(user_dict)
         return str(result.inserted_id)
 
-    def get_user(self, user_id: str) -> Optional[User]:
+    async def get_user(self, user_id: str) -> Optional[User]:
         """
         Get a user by ID.
 
@@ -54,13 +919,54 @@ class MongoDB:
         Returns:
             User object if found, None otherwise
         """
-        user_dict = self.users_collection.find_one({"id": user_id})
-        if user_dict:
-            user_dict.pop("_id", None)  # Remove MongoDB's internal _id
-            return User(**user_dict)
-        return None
+        return await self._get_cached("user", self.users_collection, user_id, User)
 
-    def get_user_by_email(self, email: str) -> Optional[User]:
+    async def get_user_dashboard(self, user_id: str, limit: int = DEFAULT_PAGE_SIZE) -> Optional[UserDashboard]:
+        """
+        Get a user with the first page of their collection and review summaries.
+
+        One aggregation on users joins both summary pages with $lookup, using
+        the same stages as list_collection_summaries and list_review_summaries,
+        so the whole dashboard is a single database round trip.
+
+        Args:
+            user_id: The unique identifier for the user
+            limit: Maximum number of collections and of reviews to include
+
+        Returns:
+            UserDashboard if the user exists, None otherwise. next_cursor on each
+            page continues with the matching summaries endpoint.
+        """
+        pipeline = [
+            {"$match": {"id": user_id}},
+            {"$limit": 1},
+            {"$lookup": {
+                "from": "collections",
+                "localField": "id",
+                "foreignField": "user_id",
+                "pipeline": _page_stages(limit, COLLECTION_SUMMARY_STAGES),
+                "as": "collection_summaries",
+            }},
+            {"$lookup": {
+                "from": "reviews",
+                "localField": "id",
+                "foreignField": "user_id",
+                "pipeline": _page_stages(limit, REVIEW_SUMMARY_STAGES),
+                "as": "review_summaries",
+            }},
+            {"$project": {"_id": 0}},
+        ]
+        user_dicts = [user_dict async for user_dict in await self.users_collection.aggregate(pipeline)]
+        if not user_dicts:
+            return None
+        user_dict = user_dicts[0]
+        return UserDashboard(
+            collections=_id_page(CollectionSummary, user_dict.pop("collection_summaries"), limit),
+            reviews=_id_page(ReviewSummary, user_dict.pop("review_summaries"), limit),
+            user=User.model_validate(user_dict),
+        )
+
+    async def get_user_by_email(self, email: str) -> Optional[User]:
         """
         Get a user by email.
 
@@ -70,13 +976,12 @@ class MongoDB:
         Returns:
             User object if found, None otherwise
         """
-        user_dict = self.users_collection.find_one({"email": email})
-        if user_dict:
-            user_dict.pop("_id", None)
-            return User(**user_dict)
-        return None
+        user_dict = await self.users_collection.find_one({"email": email}, {"_id": 0})
+        if not user_dict:
+            return None
+        return User.model_validate(user_dict)
 
-    def update_user(self, user_id: str, user: User) -> bool:
+    async def update_user(self, user_id: str, user: User) -> bool:
         """
         Update an existing user.
 
@@ -88,13 +993,27 @@ class MongoDB:
             bool: True if user was updated, False otherwise
         """
         user_dict = user.model_dump()
-        result = self.users_collection.update_one(
+        result = await self.users_collection.update_one(
             {"id": user_id},
             {"$set": user_dict}
         )
+        self._invalidate("user", user_id, user.id)
         return result.modified_count > 0
 
-    def delete_user(self, user_id: str) -> bool:
+    async def patch_user(self, user_id: str, patch: UserPatch) -> bool:
+        """
+        Apply a partial update to a user.
+
+        Args:
+            user_id: The unique identifier for the user
+            patch: Fields to change
+
+        Returns:
+            bool: True if the user exists, False otherwise
+        """
+        return await self._patch("user", self.users_collection, user_id, patch)
+
+    async def delete_user(self, user_id: str) -> bool:
         """
         Delete a user by ID.
 
@@ -104,25 +1023,30 @@ class MongoDB:
         Returns:
             bool: True if user was deleted, False otherwise
         """
-        result = self.users_collection.delete_one({"id": user_id})
+        result = await self.users_collection.delete_one({"id": user_id})
+        self._invalidate("user", user_id)
         return result.deleted_count > 0
 
-    def list_users(self) -> List[User]:
+    async def list_users(self, limit: int = DEFAULT_PAGE_SIZE, after: Optional[str] = None) -> Page[User]:
         """
-        Get all users from the database.
+        Get a page of users ordered by ID.
+
+        Args:
+            limit: Maximum number of users to return
+            after: Cursor returned as next_cursor by the previous page
 
         Returns:
-            List of User objects
+            Page of User objects
         """
-        users = []
-        for user_dict in self.users_collection.find():
-            user_dict.pop("_id", None)
-            users.append(User(**user_dict))
-        return users
+        return await self._paginate(self.users_collection, {}, User, limit, after)
+
+    def stream_users(self, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[User]:
+        """Iterate over all users, fetching batch_size documents per round trip."""
+        return self._stream(self.users_collection, {}, User, batch_size)
 
     # ==================== Collection CRUD Operations ====================
 
-    def create_collection(self, collection: CollectionModel) -> str:
+    async def create_collection(self, collection: CollectionModel) -> str:
         """
         Create a new collection in the database.
 
@@ -132,11 +1056,15 @@ class MongoDB:
         Returns:
             str: The ID of the created collection
         """
-        collection_dict = collection.model_dump()
-        result = self.collections_collection.insert_one(collection_dict)
+        collection_dict, overflow = split_document_ids(collection)
+        collection_dict = with_name_key("collection", collection_dict)
+        collection_dict[VERSION_FIELD] = 1
+        result = await self.collections_collection.insert_one(collection_dict)
+        if overflow:
+            await self._add_to_buckets(collection.id, overflow)
         return str(result.inserted_id)
 
-    def get_collection(self, collection_id: str) -> Optional[CollectionModel]:
+    async def get_collection(self, collection_id: str) -> Optional[CollectionModel]:
         """
         Get a collection by ID.
 
@@ -146,31 +1074,92 @@ class MongoDB:
         Returns:
             Collection object if found, None otherwise
         """
-        collection_dict = self.collections_collection.find_one({"id": collection_id})
-        if collection_dict:
-            collection_dict.pop("_id", None)
-            return CollectionModel(**collection_dict)
-        return None
+        return await self._get_cached("collection", self.collections_collection, collection_id, CollectionModel)
+
+    async def get_collection_version(self, collection_id: str) -> Optional[int]:
+        """Get a collection's version without loading its document ids."""
+        return await self._get_version("collection", self.collections_collection, collection_id)
 
-    def update_collection(self, collection_id: str, collection: CollectionModel) -> bool:
+    async def update_collection(
+        self,
+        collection_id: str,
+        collection: CollectionModel,
+        expected_versions: Optional[List[int]] = None,
+    ) -> bool:
         """
         Update an existing collection.
 
         Args:
             collection_id: The unique identifier for the collection
             collection: Updated Collection object
+            expected_versions: Only write if the stored version is one of these (If-Match)
 
         Returns:
             bool: True if collection was updated, False otherwise
+
+        Raises:
+            VersionConflict: If expected_versions is given and the stored version differs
         """
-        collection_dict = collection.model_dump()
-        result = self.collections_collection.update_one(
-            {"id": collection_id},
-            {"$set": collection_dict}
+        # Bucketed collections are read back with empty document_ids, so an
+        # empty list sent to one keeps the stored ids instead of clearing them.
+        keep_ids = not collection.document_ids and await self._is_bucketed(collection_id)
+        if keep_ids:
+            collection_dict = collection.model_dump(exclude={"document_ids", "bucketed", "document_count", VERSION_FIELD})
+            overflow = []
+            update = {"$set": with_name_key("collection", collection_dict)}
+        else:
+            collection_dict, overflow = split_document_ids(collection)
+            update = {"$set": with_name_key("collection", collection_dict)}
+            if collection_dict["bucketed"]:
+                update["$unset"] = {"document_ids": ""}
+            else:
+                update["$unset"] = {"document_count": ""}
+        result = await self._conditional_update(
+            "collection", self.collections_collection, collection_id, update, expected_versions
         )
-        return result.modified_count > 0
+        self._invalidate("collection", collection_id, collection.id)
+        if result.matched_count == 0:
+            return False
+
+        await self._notify("collection", collection_id, "updated", user_id=collection.user_id)
+        if keep_ids:
+            if collection.id != collection_id:
+                await self.document_buckets_collection.update_many(
+                    {"collection_id": collection_id}, {"$set": {"collection_id": collection.id}}
+                )
+            return result.modified_count > 0
+        # document_ids is replaced wholesale, so any previous buckets go.
+        deleted = await self.document_buckets_collection.delete_many({"collection_id": {"$in": [collection_id, collection.id]}})
+        if overflow:
+            await self._add_to_buckets(collection.id, overflow)
+        return result.modified_count > 0 or deleted.deleted_count > 0 or bool(overflow)
+
+    async def patch_collection(self, collection_id: str, patch: CollectionPatch) -> bool:
+        """
+        Apply a partial update to a collection.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            patch: Fields to change
+
+        Returns:
+            bool: True if the collection exists, False otherwise
+        """
+        if patch.add_document_ids or patch.remove_document_ids:
+            # Id list changes go through the batch paths, which know about buckets.
+            if patch.add_document_ids:
+                changed = await self.add_documents_to_collection(collection_id, patch.add_document_ids)
+            else:
+                changed = await self.remove_documents_from_collection(collection_id, patch.remove_document_ids)
+            if changed is None:
+                return False
+            patch = CollectionPatch(**patch.model_dump(include=patch.model_fields_set - {"add_document_ids", "remove_document_ids"}))
+        found = await self._patch("collection", self.collections_collection, collection_id, patch)
+        if found and build_update(patch):
+            await self._notify("collection", collection_id, "updated")
+        return found
 
-    def delete_collection(self, collection_id: str) -> bool:
+    async def delete_collection(self, collection_id: str) -> bool:
         """
         Delete a collection by ID.
 
@@ -180,72 +1169,606 @@ class MongoDB:
         Returns:
             bool: True if collection was deleted, False otherwise
         """
-        result = self.collections_collection.delete_one({"id": collection_id})
-        return result.deleted_count > 0
+        deleted = await self.collections_collection.find_one_and_delete(
+            {"id": collection_id}, projection={"_id": 0, "user_id": 1}
+        )
+        self._invalidate("collection", collection_id)
+        if deleted is None:
+            return False
+        await self.document_buckets_collection.delete_many({"collection_id": collection_id})
+        await self._notify("collection", collection_id, "deleted", user_id=deleted.get("user_id"))
+        return True
 
-    def list_collections(self, user_id: Optional[str] = None) -> List[CollectionModel]:
+    async def list_collections(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[CollectionModel]:
         """
-        Get all collections from the database.
+        Get a page of collections ordered by ID.
         
         Args:
             user_id: Optional user_id to filter by.
+            limit: Maximum number of collections to return
+            after: Cursor returned as next_cursor by the previous page
 
         Returns:
-            List of Collection objects
+            Page of Collection objects
         """
-        collections = []
         query = {}
         if user_id:
             query["user_id"] = user_id
             
-        for collection_dict in self.collections_collection.find(query):
-            collection_dict.pop("_id", None)
-            collections.append(CollectionModel(**collection_dict))
-        return collections
+        return await self._paginate(self.collections_collection, query, CollectionModel, limit, after)
+
+    async def list_collection_summaries(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[CollectionSummary]:
+        """
+        Get a page of lightweight collection summaries.
+
+        The document_ids array is reduced to its size on the server, so it is
+        neither transferred nor validated.
+        """
+        query = {"user_id": user_id} if user_id else {}
+        return await self._paginate_aggregate(
+            self.collections_collection, query, COLLECTION_SUMMARY_STAGES, CollectionSummary, limit, after
+        )
+
+    async def search_collections(
+        self,
+        user_id: str,
+        q: str,
+        mode: str = PREFIX,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[CollectionSummary]:
+        """
+        Search a user's collections by collection_name.
+
+        Prefix matches are case-insensitive and ordered by name; text matches
+        are ordered by relevance.
+
+        Raises:
+            ValueError: If the query is empty or the cursor is malformed
+        """
+        return await self._search(
+            self.collections_collection, COLLECTION_SUMMARY_STAGES, CollectionSummary, user_id, q, mode, limit, after
+        )
+
+    def stream_collections(
+        self, user_id: Optional[str] = None, batch_size: int = STREAM_BATCH_SIZE
+    ) -> AsyncIterator[CollectionModel]:
+        """Iterate over all collections, optionally filtered by user_id."""
+        query = {"user_id": user_id} if user_id else {}
+        return self._stream(self.collections_collection, query, CollectionModel, batch_size)
 
     # ==================== Review CRUD Operations ====================
 
-    def create_review(self, review: Review) -> str:
-        """Create a new review."""
-        review_dict = review.model_dump()
-        result = self.reviews_collection.insert_one(review_dict)
+    async def create_review(self, review: Review) -> str:
+        """Create a new review. Any runs supplied are stored in review_runs."""
+        review_dict = self._store_results(with_name_key("review", review.model_dump(exclude={"runs"})))
+        review_dict[VERSION_FIELD] = 1
+        result = await self.reviews_collection.insert_one(review_dict)
+        if review.runs:
+            await self._insert_runs(
+                [run_from_legacy(review, run, position).model_dump() for position, run in enumerate(review.runs)]
+            )
         return str(result.inserted_id)
 
-    def get_review(self, review_id: str) -> Optional[Review]:
+    async def get_review(self, review_id: str) -> Optional[Review]:
         """Get a review by ID."""
-        review_dict = self.reviews_collection.find_one({"id": review_id})
-        if review_dict:
-            review_dict.pop("_id", None)
-            return Review(**review_dict)
-        return None
-
-    def list_reviews(self, user_id: Optional[str] = None) -> List[Review]:
-        """List reviews, optionally filtered by user_id."""
-        reviews = []
+        return await self._get_cached("review", self.reviews_collection, review_id, Review)
+
+    async def get_review_version(self, review_id: str) -> Optional[int]:
+        """Get a review's version without loading its results."""
+        return await self._get_version("review", self.reviews_collection, review_id)
+
+    async def list_reviews(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[Review]:
+        """List a page of reviews ordered by ID, optionally filtered by user_id."""
         query = {}
         if user_id:
             query["user_id"] = user_id
         
-        for review_dict in self.reviews_collection.find(query):
-            review_dict.pop("_id", None)
-            reviews.append(Review(**review_dict))
-        return reviews
-
-    def update_review(self, review_id: str, review: Review) -> bool:
-        """Update a review."""
-        review_dict = review.model_dump()
-        result = self.reviews_collection.update_one(
+        return await self._paginate(self.reviews_collection, query, Review, limit, after)
+
+    async def list_review_summaries(
+        self,
+        user_id: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[ReviewSummary]:
+        """
+        List a page of lightweight review summaries.
+
+        results, fields and runs are reduced to counts on the server, so none
+        of the heavy payload is transferred or validated.
+        """
+        query = {"user_id": user_id} if user_id else {}
+        return await self._paginate_aggregate(
+            self.reviews_collection, query, REVIEW_SUMMARY_STAGES, ReviewSummary, limit, after
+        )
+
+    async def search_reviews(
+        self,
+        user_id: str,
+        q: str,
+        mode: str = PREFIX,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[ReviewSummary]:
+        """
+        Search a user's reviews by name, or in text mode by name and prompt.
+
+        Prefix matches are case-insensitive and ordered by name; text matches
+        are ordered by relevance, with words in the name weighing more than
+        words in the prompt.
+
+        Raises:
+            ValueError: If the query is empty or the cursor is malformed
+        """
+        return await self._search(
+            self.reviews_collection, REVIEW_SUMMARY_STAGES, ReviewSummary, user_id, q, mode, limit, after
+        )
+
+    def stream_reviews(self, user_id: Optional[str] = None, batch_size: int = STREAM_BATCH_SIZE) -> AsyncIterator[Review]:
+        """Iterate over all reviews, optionally filtered by user_id."""
+        query = {"user_id": user_id} if user_id else {}
+        return self._stream(self.reviews_collection, query, Review, batch_size)
+
+    async def update_review(self, review_id: str, review: Review, expected_versions: Optional[List[int]] = None) -> bool:
+        """
+        Update a review. Runs are managed through add_review_run and are not written.
+
+        Args:
+            review_id: The unique identifier for the review
+            review: Updated Review object
+            expected_versions: Only write if the stored version is one of these (If-Match)
+
+        Returns:
+            bool: True if the review exists, False otherwise
+
+        Raises:
+            VersionConflict: If expected_versions is given and the stored version differs
+        """
+        review_dict = with_name_key("review", review.model_dump(exclude={"runs", VERSION_FIELD}))
+        result = await self._conditional_update(
+            "review", self.reviews_collection, review_id, self._results_update(review_dict), expected_versions
+        )
+        self._invalidate("review", review_id, review.id)
+        if result.matched_count == 0:
+            return False
+        await self._notify("review", review_id, "updated", user_id=review.user_id)
+        return True
+
+    async def patch_review(self, review_id: str, patch: ReviewPatch) -> bool:
+        """
+        Apply a partial update to a review.
+
+        Replacement results are written in the configured storage form;
+        appended results are pushed as rows either way.
+        """
+        update = build_update(patch)
+        if "results" in update.get("$set", {}):
+            rows = update["$set"].pop("results") or []
+            # Rows appended in the same request follow the replacement.
+            push = update.get("$push", {})
+            if "results" in push:
+                rows = rows + push.pop("results")["$each"]
+                if not push:
+                    del update["$push"]
+            results_update = self._results_update({"results": rows})
+            update["$set"].update(results_update["$set"])
+            update["$unset"] = results_update["$unset"]
+        found = await self._update("review", self.reviews_collection, review_id, update)
+        if found and update:
+            await self._notify("review", review_id, "updated")
+        return found
+
+    async def delete_review(self, review_id: str) -> bool:
+        """Delete a review and its runs."""
+        deleted = await self.reviews_collection.find_one_and_delete({"id": review_id}, projection={"_id": 0, "user_id": 1})
+        self._invalidate("review", review_id)
+        if deleted is None:
+            return False
+        cursor = self.review_runs_collection.find(
+            {"review_id": review_id, "results_file": {"$ne": None}}, {"_id": 0, "results_file": 1}
+        )
+        await self._discard_results_files([doc async for doc in cursor])
+        await self.review_runs_collection.delete_many({"review_id": review_id})
+        await self._notify("review", review_id, "deleted", user_id=deleted.get("user_id"))
+        return True
+
+    # ==================== Review Run Operations ====================
+
+    async def add_review_run(self, run: ReviewRun) -> Optional[str]:
+        """
+        Append a run to a review and bump the review's updated_at.
+
+        The run gets the review's next sequence number and is stored as a delta
+        against the previous run, or in full on checkpoints and when most of
+        its rows changed. Full runs with large results are offloaded to GridFS;
+        runs following an offloaded run are stored in full, so rebuilding a
+        run never downloads results.
+
+        Args:
+            run: ReviewRun object to store
+
+        Returns:
+            str: The ID of the stored run, or None if the review does not exist
+        """
+        review_dict = await self.reviews_collection.find_one_and_update(
+            {"id": run.review_id},
+            {"$set": {"updated_at": run.created_at}, "$inc": {"run_sequence": 1, VERSION_FIELD: 1}},
+            projection={"_id": 0, "run_sequence": 1, "user_id": 1, VERSION_FIELD: 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        if review_dict is None:
+            return None
+        self._invalidate("review", run.review_id)
+
+        sequence = review_dict["run_sequence"] - 1
+        base = None
+        if sequence % RUN_CHECKPOINT_INTERVAL != 0:
+            # A concurrent add may not have stored the previous run yet; the run is then stored in full.
+            previous = await self.review_runs_collection.find_one(
+                {"review_id": run.review_id, "sequence": sequence - 1}, {"_id": 0}
+            )
+            if previous is not None and not previous.get("results_file"):
+                base = (await self._decode_run_docs(run.review_id, [previous]))[0]
+        stored = encode_run(run.model_dump(exclude={"results_file"}), base, sequence, RUN_CHECKPOINT_INTERVAL)
+        if stored["encoding"] == FULL:
+            stored = await self._prepare_run(stored)
+        try:
+            await self.review_runs_collection.insert_one(stored)
+        except DuplicateKeyError:
+            await self._discard_results_files([stored])
+            raise
+        await self._notify(
+            "review", run.review_id, "run_added", user_id=review_dict.get("user_id"), version=review_dict.get(VERSION_FIELD)
+        )
+        return run.id
+
+    async def _decode_run_docs(self, review_id: str, docs: List[dict]) -> List[dict]:
+        """
+        Rebuild fields and results of stored run documents, keeping their order.
+
+        Delta-encoded runs are replayed from their checkpoint; the documents in
+        between that are not already in docs are fetched in one query.
+        """
+        docs = [decode_results(doc) for doc in docs]
+        deltas = [doc for doc in docs if doc.get("encoding") == DELTA]
+        if not deltas:
+            return docs
+        low = min(doc["checkpoint_sequence"] for doc in deltas)
+        high = max(doc["sequence"] for doc in deltas)
+        chain = {doc["sequence"]: doc for doc in docs if "sequence" in doc and low <= doc["sequence"] <= high}
+        cursor = self.review_runs_collection.find(
+            {"review_id": review_id, "sequence": {"$gte": low, "$lte": high, "$nin": list(chain)}},
+            {"_id": 0},
+        )
+        async for doc in cursor:
+            chain[doc["sequence"]] = decode_results(doc)
+        decoded = decode_runs(list(chain.values()))
+        return [decoded[doc["sequence"]] if doc.get("encoding") == DELTA else doc for doc in docs]
+
+    async def _decode_runs(self, review_id: str, docs: List[dict]) -> List[ReviewRun]:
+        """Build ReviewRun objects from stored run documents."""
+        return [
+            ReviewRun.model_validate(strip_storage_fields(doc))
+            for doc in await self._decode_run_docs(review_id, docs)
+        ]
+
+    async def get_review_run(self, review_id: str, run_id: str, inline_results: bool = False) -> Optional[ReviewRun]:
+        """
+        Get a single run of a review.
+
+        Args:
+            review_id: The unique identifier for the review
+            run_id: The unique identifier for the run
+            inline_results: Read results offloaded to GridFS back into results
+                instead of returning only the results_file reference
+
+        Returns:
+            ReviewRun, or None if it does not exist
+        """
+        run_dict = await self.review_runs_collection.find_one({"id": run_id, "review_id": review_id}, {"_id": 0})
+        if not run_dict:
+            return None
+        if inline_results:
+            run_dict = await self._load_results(run_dict)
+        return (await self._decode_runs(review_id, [run_dict]))[0]
+
+    async def stream_run_results(self, review_id: str, run_id: str) -> Optional[AsyncIterator[bytes]]:
+        """
+        Stream a run's results as NDJSON bytes.
+
+        Offloaded results are streamed chunk by chunk from GridFS and decompressed
+        on the fly, so they are never held in memory as a whole.
+
+        Args:
+            review_id: The unique identifier for the review
+            run_id: The unique identifier for the run
+
+        Returns:
+            Async iterator of NDJSON fragments, or None if the run does not exist
+        """
+        run_dict = await self.review_runs_collection.find_one({"id": run_id, "review_id": review_id}, {"_id": 0})
+        if not run_dict:
+            return None
+        results_file = run_dict.get("results_file")
+        if results_file:
+            return iter_payload(self._file_chunks(ObjectId(results_file["file_id"])), results_file.get("compression"))
+        run = (await self._decode_runs(review_id, [run_dict]))[0]
+
+        async def lines() -> AsyncIterator[bytes]:
+            for row in run.results:
+                yield to_json(row) + b"\n"
+
+        return lines()
+
+    async def open_run_results(self, review_id: str, run_id: str) -> Optional[Tuple[ReviewRun, AsyncIterator[dict]]]:
+        """
+        Get a run together with an iterator over its result rows.
+
+        Offloaded results are parsed row by row while they are read from GridFS,
+        so callers that write rows out as they come hold only a bounded part of
+        the results in memory.
+
+        Args:
+            review_id: The unique identifier for the review
+            run_id: The unique identifier for the run
+
+        Returns:
+            tuple: The run (results empty when offloaded) and its rows, or None if the run does not exist
+        """
+        run_dict = await self.review_runs_collection.find_one({"id": run_id, "review_id": review_id}, {"_id": 0})
+        if not run_dict:
+            return None
+        run = (await self._decode_runs(review_id, [run_dict]))[0]
+        if run.results_file:
+            chunks = self._file_chunks(ObjectId(run.results_file.file_id))
+            return run, iter_rows(iter_payload(chunks, run.results_file.compression))
+
+        async def rows() -> AsyncIterator[dict]:
+            for row in run.results:
+                yield row
+
+        return run, rows()
+
+    async def _query_results(self, collection: AsyncCollection, match: dict, query: ResultsQuery) -> ResultsPage:
+        """Run results_pipeline on the document matching match and build the page."""
+        cursor = await collection.aggregate(results_pipeline(match, query), allowDiskUse=True)
+        return page_from_facet(await anext(aiter(cursor), None), query)
+
+    async def query_review_results(self, review_id: str, query: ResultsQuery) -> Optional[ResultsPage]:
+        """
+        Filter, sort and page a review's results.
+
+        Results stored as rows are queried by an aggregation, so only the page
+        is read from the database; columnar results are decoded and queried in
+        Python.
+
+        Args:
+            review_id: The unique identifier for the review
+            query: Filters, sort keys, projected columns and page
+
+        Returns:
+            ResultsPage, or None if the review does not exist
+
+        Raises:
+            ValueError: If the query names a column that is not in the review's fields
+        """
+        doc = await self.reviews_collection.find_one(
             {"id": review_id},
-            {"$set": review_dict}
+            {"_id": 0, "fields": 1, "columnar": {"$eq": [{"$type": f"${COLUMNAR_FIELD}"}, "object"]}},
         )
-        return result.matched_count > 0
+        if not doc:
+            return None
+        validate_query(query, doc.get("fields") or [])
+        if doc.get("columnar"):
+            review = await self.get_review(review_id)
+            if review is None:
+                return None
 
-    def delete_review(self, review_id: str) -> bool:
-        """Delete a review."""
-        result = self.reviews_collection.delete_one({"id": review_id})
-        return result.deleted_count > 0
+            async def rows() -> AsyncIterator[dict]:
+                for row in review.results:
+                    yield row
+
+            return await query_rows(rows(), query)
+        return await self._query_results(self.reviews_collection, {"id": review_id}, query)
+
+    async def query_run_results(self, review_id: str, run_id: str, query: ResultsQuery) -> Optional[ResultsPage]:
+        """
+        Filter, sort and page a run's results.
+
+        Full runs stored as rows are queried by an aggregation. Delta-encoded,
+        columnar and offloaded runs are decoded or streamed from GridFS and
+        queried in Python, holding at most the rows up to the end of the page.
+
+        Args:
+            review_id: The unique identifier for the review
+            run_id: The unique identifier for the run
+            query: Filters, sort keys, projected columns and page
+
+        Returns:
+            ResultsPage, or None if the run does not exist
+
+        Raises:
+            ValueError: If the query names a column that is not in the run's fields
+        """
+        match = {"id": run_id, "review_id": review_id}
+        doc = await self.review_runs_collection.find_one(
+            match,
+            {
+                "_id": 0,
+                "fields": 1,
+                "encoding": 1,
+                "results_file": 1,
+                "columnar": {"$eq": [{"$type": f"${COLUMNAR_FIELD}"}, "object"]},
+            },
+        )
+        if not doc:
+            return None
+        if doc.get("encoding") == DELTA or doc.get("results_file") or doc.get("columnar"):
+            opened = await self.open_run_results(review_id, run_id)
+            if opened is None:
+                return None
+            run, rows = opened
+            validate_query(query, run.fields)
+            return await query_rows(rows, query)
+        validate_query(query, doc.get("fields") or [])
+        return await self._query_results(self.review_runs_collection, match, query)
+
+    async def list_review_runs(
+        self,
+        review_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Page[ReviewRun]:
+        """List a page of a review's runs, oldest first."""
+        async def decode(docs: List[dict]) -> List[ReviewRun]:
+            return await self._decode_runs(review_id, docs)
+
+        return await self._paginate(
+            self.review_runs_collection,
+            {"review_id": review_id},
+            ReviewRun,
+            limit,
+            after,
+            sort_keys=("created_at", "id"),
+            decode=decode,
+        )
+
+    async def diff_review_runs(self, review_id: str, from_run_id: str, to_run_id: str) -> Optional[RunDiff]:
+        """
+        Compute the changes in fields and results from one run to another.
+
+        When to_run follows from_run within one checkpoint window, the stored
+        deltas between them are composed without loading any results. Otherwise
+        both runs are rebuilt and compared.
+
+        Args:
+            review_id: The unique identifier for the review
+            from_run_id: The run the diff starts from
+            to_run_id: The run the diff leads to
+
+        Returns:
+            RunDiff, or None if either run does not exist
+        """
+        heads = {}
+        cursor = self.review_runs_collection.find(
+            {"review_id": review_id, "id": {"$in": [from_run_id, to_run_id]}},
+            {"_id": 0, "id": 1, "sequence": 1, "encoding": 1, "checkpoint_sequence": 1},
+        )
+        async for doc in cursor:
+            heads[doc["id"]] = doc
+        if from_run_id not in heads or to_run_id not in heads:
+            return None
+        start, end = heads[from_run_id], heads[to_run_id]
+
+        if (
+            end.get("encoding") == DELTA
+            and "sequence" in start
+            and start["sequence"] < end["sequence"]
+            and end["checkpoint_sequence"] <= start["sequence"]
+        ):
+            cursor = self.review_runs_collection.find(
+                {"review_id": review_id, "sequence": {"$gt": start["sequence"], "$lte": end["sequence"]}},
+                {"_id": 0, "fields_delta": 1, "results_delta": 1},
+            ).sort("sequence", ASCENDING)
+            deltas = [doc async for doc in cursor]
+            fields = reduce(compose_deltas, [doc["fields_delta"] for doc in deltas])
+            results = reduce(compose_deltas, [doc["results_delta"] for doc in deltas])
+        else:
+            runs = {}
+            cursor = self.review_runs_collection.find(
+                {"review_id": review_id, "id": {"$in": [from_run_id, to_run_id]}}, {"_id": 0}
+            )
+            async for doc in cursor:
+                runs[doc["id"]] = doc
+            decoded = await self._decode_run_docs(
+                review_id, [await self._load_results(runs[from_run_id]), await self._load_results(runs[to_run_id])]
+            )
+            fields = diff_rows(decoded[0]["fields"], decoded[1]["fields"])
+            results = diff_rows(decoded[0]["results"], decoded[1]["results"])
 
-    def add_document_to_collection(self, collection_id: str, document_id: str) -> bool:
+        return RunDiff(
+            review_id=review_id,
+            from_run_id=from_run_id,
+            to_run_id=to_run_id,
+            fields=RunDelta(**fields),
+            results=RunDelta(**results),
+        )
+
+    async def migrate_embedded_runs(self, batch_size: int = 100) -> Dict[str, int]:
+        """
+        Move runs embedded in review documents into the review_runs collection.
+
+        Safe to re-run: run IDs are deterministic for runs stored without one,
+        duplicates are skipped, and the embedded array is only removed after
+        its runs were written.
+
+        Args:
+            batch_size: Number of reviews fetched per round trip
+
+        Returns:
+            dict: Number of reviews migrated and runs written
+        """
+        migrated_reviews = 0
+        migrated_runs = 0
+        cursor = self.reviews_collection.find({"runs.0": {"$exists": True}}, {"_id": 0}).batch_size(batch_size)
+        async for review_dict in cursor:
+            review = Review(**review_dict)
+            migrated_runs += await self._insert_runs(
+                [run_from_legacy(review, run, position).model_dump() for position, run in enumerate(review.runs)]
+            )
+            await self.reviews_collection.update_one({"id": review.id}, bump_version({"$unset": {"runs": ""}}))
+            self._invalidate("review", review.id)
+            migrated_reviews += 1
+        return {"reviews": migrated_reviews, "runs": migrated_runs}
+
+    async def backfill_name_keys(self, batch_size: int = BULK_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Set name_key on reviews and collections written before name search.
+
+        Only documents without a name_key are read, so the backfill is safe to
+        re-run. The version is not bumped: name_key is never returned.
+
+        Args:
+            batch_size: Number of updates sent per bulk write
+
+        Returns:
+            dict: Number of reviews and collections updated
+        """
+        counts = {}
+        for kind, collection in (("review", self.reviews_collection), ("collection", self.collections_collection)):
+            name_field = NAME_FIELDS[kind]
+            updated = 0
+            operations = []
+            cursor = collection.find({NAME_KEY_FIELD: {"$exists": False}}, {"_id": 1, name_field: 1}).batch_size(batch_size)
+            async for doc in cursor:
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {NAME_KEY_FIELD: normalize_name(doc.get(name_field))}}))
+                if len(operations) == batch_size:
+                    updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+                    operations = []
+            if operations:
+                updated += (await collection.bulk_write(operations, ordered=False)).modified_count
+            counts[f"{kind}s"] = updated
+        return counts
+
+    # ==================== Collection Document Operations ====================
+
+    async def add_document_to_collection(self, collection_id: str, document_id: str) -> bool:
         """
         Add a document ID to a collection's document_ids list.
 
@@ -256,13 +1779,36 @@ class MongoDB:
         Returns:
             bool: True if document was added, False otherwise
         """
-        result = self.collections_collection.update_one(
-            {"id": collection_id},
-            {"$addToSet": {"document_ids": document_id}}
+        added = await self._add_document(collection_id, document_id)
+        if added:
+            await self._notify("collection", collection_id, "documents_changed")
+        return added
+
+    async def _add_document(self, collection_id: str, document_id: str) -> bool:
+        """Add one id inline or to buckets; see add_document_to_collection."""
+        before = await self.collections_collection.find_one_and_update(
+            {"id": collection_id, "bucketed": {"$ne": True}},
+            bump_version({"$addToSet": {"document_ids": document_id}}),
+            projection={
+                "_id": 0,
+                "size": _array_size("document_ids"),
+                "present": {"$in": [document_id, {"$ifNull": ["$document_ids", []]}]},
+            },
+            return_document=ReturnDocument.BEFORE,
         )
-        return result.modified_count > 0
+        if before is None:
+            if not await self._is_bucketed(collection_id):
+                return False
+            return await self._add_to_buckets(collection_id, [document_id]) > 0
 
-    def remove_document_from_collection(self, collection_id: str, document_id: str) -> bool:
+        self._invalidate("collection", collection_id)
+        if before["present"]:
+            return False
+        if before["size"] + 1 > INLINE_DOCUMENT_LIMIT:
+            await self._spill_to_buckets(collection_id)
+        return True
+
+    async def remove_document_from_collection(self, collection_id: str, document_id: str) -> bool:
         """
         Remove a document ID from a collection's document_ids list.
 
@@ -273,13 +1819,423 @@ class MongoDB:
         Returns:
             bool: True if document was removed, False otherwise
         """
-        result = self.collections_collection.update_one(
-            {"id": collection_id},
-            {"$pull": {"document_ids": document_id}}
+        removed = await self._remove_document(collection_id, document_id)
+        if removed:
+            await self._notify("collection", collection_id, "documents_changed")
+        return removed
+
+    async def _remove_document(self, collection_id: str, document_id: str) -> bool:
+        """Remove one id inline or from buckets; see remove_document_from_collection."""
+        result = await self.collections_collection.update_one(
+            {"id": collection_id, "bucketed": {"$ne": True}},
+            bump_version({"$pull": {"document_ids": document_id}}),
         )
+        if result.matched_count == 0:
+            if not await self._is_bucketed(collection_id):
+                return False
+            return await self._remove_from_buckets(collection_id, [document_id]) > 0
+        self._invalidate("collection", collection_id)
         return result.modified_count > 0
 
+    async def _apply_document_batch(self, collection_id: str, document_ids: List[str], operator: str) -> Tuple[int, int]:
+        """
+        Add or remove document ids in chunks, counting how many were actually present.
+
+        Each chunk is one findAndModify that returns, from the pre-update
+        document, how many of the chunk's ids the collection already held.
+        Chunks stop applying once no collection with inline document ids
+        matches: the collection is missing or bucketed, or another writer
+        spilled it to buckets between two chunks.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            document_ids: Distinct document IDs to apply
+            operator: "$addToSet" or "$pull"
+
+        Returns:
+            tuple: How many of the ids were applied inline (a prefix of
+            document_ids), and how many of those were already present
+        """
+        applied = present = 0
+        for offset in range(0, len(document_ids), BULK_CHUNK_SIZE):
+            chunk = document_ids[offset:offset + BULK_CHUNK_SIZE]
+            change = {"$each": chunk} if operator == "$addToSet" else {"$in": chunk}
+            before = await self.collections_collection.find_one_and_update(
+                {"id": collection_id, "bucketed": {"$ne": True}},
+                bump_version({operator: {"document_ids": change}}),
+                projection={"_id": 0, "present": {"$size": {"$setIntersection": [{"$ifNull": ["$document_ids", []]}, chunk]}}},
+                return_document=ReturnDocument.BEFORE,
+            )
+            if before is None:
+                break
+            applied += len(chunk)
+            present += before["present"]
+        if applied:
+            self._invalidate("collection", collection_id)
+        return applied, present
+
+    async def add_documents_to_collection(self, collection_id: str, document_ids: List[str]) -> Optional[int]:
+        """
+        Add many document IDs to a collection.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            document_ids: Document IDs to add
+
+        Returns:
+            int: Number of ids actually added, or None if the collection does not exist
+        """
+        added = await self._add_documents(collection_id, document_ids)
+        if added:
+            await self._notify("collection", collection_id, "documents_changed")
+        return added
+
+    async def _add_documents(self, collection_id: str, document_ids: List[str]) -> Optional[int]:
+        """Add ids inline or to buckets; see add_documents_to_collection."""
+        layout = await self.collections_collection.find_one(
+            {"id": collection_id}, {"_id": 0, "bucketed": 1, "size": _array_size("document_ids")}
+        )
+        if layout is None:
+            return None
+        bucketed = layout.get("bucketed", False)
+        if not bucketed and layout["size"] + len(set(document_ids)) > INLINE_DOCUMENT_LIMIT:
+            await self._spill_to_buckets(collection_id)
+            bucketed = True
+
+        if bucketed:
+            return await self._add_to_buckets(collection_id, document_ids)
+        unique_ids = list(dict.fromkeys(document_ids))
+        applied, present = await self._apply_document_batch(collection_id, unique_ids, "$addToSet")
+        if applied == len(unique_ids):
+            return applied - present
+        if not await self._is_bucketed(collection_id):
+            return None
+        # Ids added inline before a concurrent spill were moved to buckets, and
+        # counted there, by the spilling writer; only the rest still need adding.
+        return applied - present + await self._add_to_buckets(collection_id, unique_ids[applied:])
+
+    async def remove_documents_from_collection(self, collection_id: str, document_ids: List[str]) -> Optional[int]:
+        """
+        Remove many document IDs from a collection.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            document_ids: Document IDs to remove
+
+        Returns:
+            int: Number of ids actually removed, or None if the collection does not exist
+        """
+        removed = await self._remove_documents(collection_id, document_ids)
+        if removed:
+            await self._notify("collection", collection_id, "documents_changed")
+        return removed
+
+    async def _remove_documents(self, collection_id: str, document_ids: List[str]) -> Optional[int]:
+        """Remove ids inline or from buckets; see remove_documents_from_collection."""
+        unique_ids = list(dict.fromkeys(document_ids))
+        applied, present = await self._apply_document_batch(collection_id, unique_ids, "$pull")
+        if applied == len(unique_ids):
+            return present
+        if not await self._is_bucketed(collection_id):
+            return None
+        # Ids pulled inline before a concurrent spill are already gone.
+        return present + await self._remove_from_buckets(collection_id, unique_ids[applied:])
+
+    async def find_document_references(self, document_ids: List[str]) -> List[DocumentReferences]:
+        """
+        Find the collections, and the reviews over them, that reference each document.
+
+        Three indexed queries in all, whatever the number of ids: inline
+        document_ids and bucket document_ids are both multikey-indexed, and
+        reviews are matched on their collection_ids index. Each collection and
+        bucket only returns the requested ids it holds, not its whole list.
+
+        Args:
+            document_ids: Document IDs to look up
+
+        Returns:
+            One DocumentReferences per distinct id, in request order, with sorted id lists
+        """
+        unique_ids = list(dict.fromkeys(document_ids))
+        hits = {"$filter": {"input": "$document_ids", "cond": {"$in": ["$$this", unique_ids]}}}
+        collections_by_document: Dict[str, set] = {document_id: set() for document_id in unique_ids}
+
+        cursor = self.collections_collection.find({"document_ids": {"$in": unique_ids}}, {"_id": 0, "id": 1, "hits": hits})
+        async for collection_dict in cursor:
+            for document_id in collection_dict["hits"]:
+                collections_by_document[document_id].add(collection_dict["id"])
+        cursor = self.document_buckets_collection.find(
+            {"document_ids": {"$in": unique_ids}, "count": {"$gt": 0}}, {"_id": 0, "collection_id": 1, "hits": hits}
+        )
+        async for bucket in cursor:
+            for document_id in bucket["hits"]:
+                collections_by_document[document_id].add(bucket["collection_id"])
+
+        collection_ids = sorted(set().union(*collections_by_document.values()))
+        reviews_by_collection: Dict[str, set] = {collection_id: set() for collection_id in collection_ids}
+        if collection_ids:
+            cursor = self.reviews_collection.find(
+                {"collection_ids": {"$in": collection_ids}}, {"_id": 0, "id": 1, "collection_ids": 1}
+            )
+            async for review_dict in cursor:
+                for collection_id in review_dict["collection_ids"]:
+                    if collection_id in reviews_by_collection:
+                        reviews_by_collection[collection_id].add(review_dict["id"])
+
+        return [
+            DocumentReferences(
+                document_id=document_id,
+                collection_ids=sorted(collections),
+                review_ids=sorted(set().union(*(reviews_by_collection[collection_id] for collection_id in collections))),
+            )
+            for document_id, collections in collections_by_document.items()
+        ]
 
+    async def list_collection_documents(
+        self,
+        collection_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: Optional[str] = None,
+    ) -> Optional[Page[str]]:
+        """
+        Get a page of a collection's document IDs in storage order.
+
+        Inline ids are sliced server-side by offset; bucketed ids are read
+        bucket by bucket from a (bucket, position) cursor, so no page loads
+        more than a couple of buckets.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            limit: Maximum number of ids to return
+            after: Cursor returned as next_cursor by the previous page
+
+        Returns:
+            Page of document IDs, or None if the collection does not exist
 
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        layout = await self.collections_collection.find_one({"id": collection_id}, {"_id": 0, "bucketed": 1})
+        if layout is None:
+            return None
+        values = decode_cursor(after) if after else None
+
+        if not layout.get("bucketed"):
+            if values is not None and (len(values) != 1 or not isinstance(values[0], int)):
+                raise ValueError("Invalid pagination cursor")
+            offset = values[0] if values else 0
+            collection_dict = await self.collections_collection.find_one(
+                {"id": collection_id}, {"_id": 0, "document_ids": {"$slice": [offset, limit + 1]}}
+            )
+            document_ids = (collection_dict or {}).get("document_ids", [])
+            next_cursor = encode_cursor(offset + limit) if len(document_ids) > limit else None
+            return Page[str](items=document_ids[:limit], next_cursor=next_cursor)
+
+        query = {"collection_id": collection_id, "count": {"$gt": 0}}
+        start_bucket, position = None, 0
+        if values is not None:
+            if len(values) != 2 or not isinstance(values[1], int):
+                raise ValueError("Invalid pagination cursor")
+            try:
+                start_bucket, position = ObjectId(values[0]), values[1]
+            except (InvalidId, TypeError) as e:
+                raise ValueError("Invalid pagination cursor") from e
+            query["_id"] = {"$gte": start_bucket}
+
+        items: List[str] = []
+        cursor = self.document_buckets_collection.find(query, {"document_ids": 1}).sort("_id", ASCENDING).batch_size(4)
+        async for bucket in cursor:
+            document_ids = bucket["document_ids"]
+            start = position if bucket["_id"] == start_bucket else 0
+            for index in range(start, len(document_ids)):
+                if len(items) == limit:
+                    return Page[str](items=items, next_cursor=encode_cursor(str(bucket["_id"]), index))
+                items.append(document_ids[index])
+        return Page[str](items=items)
+
+    async def is_document_in_collection(self, collection_id: str, document_id: str) -> Optional[bool]:
+        """
+        Check whether a collection contains a document without loading its id list.
+
+        Args:
+            collection_id: The unique identifier for the collection
+            document_id: The document ID to look for
+
+        Returns:
+            bool: Whether the document is in the collection, or None if the collection does not exist
+        """
+        collection_dict = await self.collections_collection.find_one(
+            {"id": collection_id},
+            {"_id": 0, "bucketed": 1, "member": {"$in": [document_id, {"$ifNull": ["$document_ids", []]}]}},
+        )
+        if collection_dict is None:
+            return None
+        if collection_dict["member"] or not collection_dict.get("bucketed"):
+            return collection_dict["member"]
+        return await self.document_buckets_collection.count_documents(
+            {"collection_id": collection_id, "count": {"$gt": 0}, "document_ids": document_id}, limit=1
+        ) > 0
 
+    # ==================== Bucketed Document Storage ====================
 
+    async def _is_bucketed(self, collection_id: str) -> bool:
+        """Check whether a collection stores its document ids in buckets."""
+        return await self.collections_collection.count_documents({"id": collection_id, "bucketed": True}, limit=1) > 0
+
+    async def _spill_to_buckets(self, collection_id: str) -> None:
+        """
+        Move a collection's inline document ids into buckets.
+
+        The bucketed flag is flipped first and atomically, so writers that
+        arrive meanwhile already take the bucket path; the inline array is
+        only removed once its ids are in buckets.
+        """
+        before = await self.collections_collection.find_one_and_update(
+            {"id": collection_id, "bucketed": {"$ne": True}},
+            bump_version({"$set": {"bucketed": True}}),
+            projection={"_id": 0, "document_ids": 1},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            return
+        await self._add_to_buckets(collection_id, before.get("document_ids", []))
+        await self.collections_collection.update_one({"id": collection_id}, {"$unset": {"document_ids": ""}})
+        self._invalidate("collection", collection_id)
+
+    async def _bucket_members(self, collection_id: str, document_ids: List[str]) -> set:
+        """Return which of the given ids are already stored in the collection's buckets."""
+        members = set()
+        cursor = self.document_buckets_collection.find(
+            {"collection_id": collection_id, "count": {"$gt": 0}, "document_ids": {"$in": document_ids}},
+            {"_id": 0, "hits": {"$filter": {"input": "$document_ids", "cond": {"$in": ["$$this", document_ids]}}}},
+        )
+        async for bucket in cursor:
+            members.update(bucket["hits"])
+        return members
+
+    async def _push_one_to_bucket(self, collection_id: str, document_id: str) -> bool:
+        """
+        Add a single id to any bucket with room, creating one if needed.
+
+        The unique (collection_id, document_ids) index rejects ids that are
+        already in another bucket, which makes this safe under concurrency.
+        """
+        try:
+            await self.document_buckets_collection.update_one(
+                {"collection_id": collection_id, "count": {"$lt": DOCUMENT_BUCKET_SIZE}, "document_ids": {"$ne": document_id}},
+                {"$push": {"document_ids": document_id}, "$inc": {"count": 1}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def _push_to_buckets(self, collection_id: str, document_ids: List[str]) -> int:
+        """
+        Store ids known to be new: top up the fullest open bucket, then write new buckets.
+
+        Returns:
+            int: Number of ids stored
+        """
+        added = 0
+        remaining = document_ids
+        open_bucket = await self.document_buckets_collection.find_one(
+            {"collection_id": collection_id, "count": {"$lt": DOCUMENT_BUCKET_SIZE}},
+            {"_id": 1, "count": 1},
+            sort=[("count", DESCENDING)],
+        )
+        if open_bucket:
+            room = DOCUMENT_BUCKET_SIZE - open_bucket["count"]
+            take, remaining = remaining[:room], remaining[room:]
+            try:
+                # Matching on count makes this a no-op if another writer filled the bucket first.
+                result = await self.document_buckets_collection.update_one(
+                    {"_id": open_bucket["_id"], "count": open_bucket["count"]},
+                    {"$push": {"document_ids": {"$each": take}}, "$inc": {"count": len(take)}},
+                )
+                if result.modified_count:
+                    added += len(take)
+                else:
+                    remaining = take + remaining
+            except DuplicateKeyError:
+                for document_id in take:
+                    added += await self._push_one_to_bucket(collection_id, document_id)
+
+        buckets = []
+        for offset in range(0, len(remaining), DOCUMENT_BUCKET_SIZE):
+            chunk = remaining[offset:offset + DOCUMENT_BUCKET_SIZE]
+            buckets.append({"collection_id": collection_id, "document_ids": chunk, "count": len(chunk)})
+        if not buckets:
+            return added
+        failed = set()
+        try:
+            await self.document_buckets_collection.insert_many(buckets, ordered=False)
+        except BulkWriteError as e:
+            if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+                raise
+            failed = {error["index"] for error in e.details["writeErrors"]}
+        for index, bucket in enumerate(buckets):
+            if index in failed:
+                # A concurrent writer stored one of these ids; fall back to id-by-id.
+                for document_id in bucket["document_ids"]:
+                    added += await self._push_one_to_bucket(collection_id, document_id)
+            else:
+                added += bucket["count"]
+        return added
+
+    async def _add_to_buckets(self, collection_id: str, document_ids: List[str]) -> int:
+        """
+        Add ids to a bucketed collection, skipping ones it already holds.
+
+        Returns:
+            int: Number of ids actually added
+        """
+        unique_ids = list(dict.fromkeys(document_ids))
+        added = 0
+        for offset in range(0, len(unique_ids), DOCUMENT_BUCKET_SIZE):
+            chunk = unique_ids[offset:offset + DOCUMENT_BUCKET_SIZE]
+            if len(chunk) == 1:
+                added += await self._push_one_to_bucket(collection_id, chunk[0])
+                continue
+            members = await self._bucket_members(collection_id, chunk)
+            new_ids = [document_id for document_id in chunk if document_id not in members]
+            if new_ids:
+                added += await self._push_to_buckets(collection_id, new_ids)
+        if added:
+            await self.collections_collection.update_one(
+                {"id": collection_id}, bump_version({"$inc": {"document_count": added}})
+            )
+        self._invalidate("collection", collection_id)
+        return added
+
+    async def _remove_from_buckets(self, collection_id: str, document_ids: List[str]) -> int:
+        """
+        Remove ids from a bucketed collection and drop buckets left empty.
+
+        Returns:
+            int: Number of ids actually removed
+        """
+        unique_ids = list(dict.fromkeys(document_ids))
+        removed = 0
+        for offset in range(0, len(unique_ids), DOCUMENT_BUCKET_SIZE):
+            members = list(await self._bucket_members(collection_id, unique_ids[offset:offset + DOCUMENT_BUCKET_SIZE]))
+            if not members:
+                continue
+            await self.document_buckets_collection.update_many(
+                {"collection_id": collection_id, "count": {"$gt": 0}, "document_ids": {"$in": members}},
+                [
+                    {"$set": {"document_ids": {"$filter": {
+                        "input": "$document_ids",
+                        "cond": {"$not": [{"$in": ["$$this", members]}]},
+                    }}}},
+                    {"$set": {"count": {"$size": "$document_ids"}}},
+                ],
+            )
+            removed += len(members)
+        if removed:
+            await self.collections_collection.update_one(
+                {"id": collection_id}, bump_version({"$inc": {"document_count": -removed}})
+            )
+            await self.document_buckets_collection.delete_many({"collection_id": collection_id, "count": 0})
+        self._invalidate("collection", collection_id)
+        return removed
@@ -0,0 +1,103 @@
+import json
+import os
+import zlib
+from typing import AsyncIterator, List, Optional, Tuple
+
+import bson
+from pydantic_core import to_json
+
+# Run results larger than the offload threshold are written to GridFS as
+# newline-delimited JSON, one row per line, gzip-compressed unless disabled.
+# The run document keeps results empty and a results_file reference instead.
+
+RESULTS_BUCKET = "run_results"
+GZIP = "gzip"
+# zlib window bits selecting the gzip container.
+_GZIP_WBITS = 31
+
+
+def results_size(rows: List[dict]) -> int:
+    """BSON size the rows would take inline in a run document."""
+    return len(bson.encode({"results": rows}))
+
+
+def encode_payload(rows: List[dict], compression: Optional[str]) -> Tuple[bytes, int]:
+    """
+    Serialize rows to the GridFS payload.
+
+    Args:
+        rows: Result rows
+        compression: "gzip" or None
+
+    Returns:
+        tuple: The payload (NDJSON, compressed if requested) and its uncompressed size
+    """
+    payload = b"".join(to_json(row) + b"\n" for row in rows)
+    if compression == GZIP:
+        compressor = zlib.compressobj(wbits=_GZIP_WBITS)
+        return compressor.compress(payload) + compressor.flush(), len(payload)
+    return payload, len(payload)
+
+
+async def iter_payload(chunks: AsyncIterator[bytes], compression: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    Turn stored chunks back into NDJSON bytes as they arrive.
+
+    Args:
+        chunks: GridFS chunks in order
+        compression: Compression recorded in the results_file reference
+
+    Yields:
+        bytes: NDJSON fragments; lines may span fragments
+    """
+    decompressor = zlib.decompressobj(wbits=_GZIP_WBITS) if compression == GZIP else None
+    async for chunk in chunks:
+        data = decompressor.decompress(chunk) if decompressor else chunk
+        if data:
+            yield data
+    if decompressor:
+        tail = decompressor.flush()
+        if tail:
+            yield tail
+
+
+async def iter_rows(fragments: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """
+    Parse NDJSON fragments into rows, one at a time.
+
+    Args:
+        fragments: NDJSON bytes as yielded by iter_payload; lines may span fragments
+
+    Yields:
+        dict: One result row per line
+    """
+    pending = b""
+    async for fragment in fragments:
+        lines = (pending + fragment).split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            if line:
+                yield json.loads(line)
+    if pending.strip():
+        yield json.loads(pending)
+
+
+def decode_payload(payload: bytes, compression: Optional[str]) -> List[dict]:
+    """Parse a whole stored payload back into rows."""
+    if compression == GZIP:
+        payload = zlib.decompress(payload, wbits=_GZIP_WBITS)
+    return [json.loads(line) for line in payload.splitlines() if line]
+
+
+def offload_threshold_from_env() -> int:
+    """
+    Size in bytes above which run results go to GridFS, from RESULTS_OFFLOAD_BYTES.
+
+    0 disables offloading.
+    """
+    return int(os.getenv("RESULTS_OFFLOAD_BYTES", str(1024 * 1024)))
+
+
+def offload_compression_from_env() -> Optional[str]:
+    """Compression for offloaded results: gzip unless RESULTS_OFFLOAD_COMPRESS is false."""
+    return GZIP if os.getenv("RESULTS_OFFLOAD_COMPRESS", "true").lower() in ("1", "true", "yes") else None
@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import Any, List
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Encode the sort key of the last item on a page into an opaque cursor.
+
+    Args:
+        values: The JSON-serializable key values, in sort order
+
+    Returns:
+        str: URL-safe cursor string
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Args:
+        cursor: The opaque cursor string
+
+    Returns:
+        List of key values
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid pagination cursor") from e
+    if not isinstance(values, list) or not values:
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+
+def keyset_filter(keys: List[str], values: List[Any]) -> dict:
+    """
+    Build the range filter that resumes a keyset-ordered scan after a row.
+
+    For keys (a, b) and values (x, y) this matches a > x, or a == x and b > y,
+    which an index on (..., a, b) serves as a single range.
+
+    Args:
+        keys: Sort keys, most significant first
+        values: Key values of the last row on the previous page
+
+    Returns:
+        dict: MongoDB filter
+
+    Raises:
+        ValueError: If the number of values does not match the keys
+    """
+    if len(keys) != len(values):
+        raise ValueError("Invalid pagination cursor")
+    if len(keys) == 1:
+        return {keys[0]: {"$gt": values[0]}}
+    branches = []
+    for i, key in enumerate(keys):
+        branch = {keys[j]: values[j] for j in range(i)}
+        branch[key] = {"$gt": values[i]}
+        branches.append(branch)
+    return {"$or": branches}
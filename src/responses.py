@@ -0,0 +1,21 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+# Serializes any value, dispatching to each model's own pydantic-core serializer.
+_any_adapter = TypeAdapter(Any)
+
+
+class ModelJSONResponse(JSONResponse):
+    """
+    JSON response that serializes pydantic models straight to bytes with pydantic-core.
+
+    Returning it from an endpoint bypasses FastAPI's response_model pass, which
+    would validate the returned models again and then re-serialize them through
+    Python objects. Only use it for values built from trusted database reads;
+    the endpoint's response_model still documents the shape in OpenAPI.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return _any_adapter.dump_json(content)
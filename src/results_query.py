@@ -0,0 +1,273 @@
+import re
+from functools import cmp_to_key
+from typing import Any, AsyncIterator, Iterable, List, Optional
+
+from src.models import ResultsFilter, ResultsPage, ResultsQuery, ResultsSort
+
+# Filtering, sorting and paging of result rows, for POST .../results/query.
+#
+# Rows stored inline as plain rows are queried by an aggregation pipeline
+# (results_pipeline), so only the requested page leaves the database. Rows
+# that MongoDB cannot see as an array of rows (columnar blocks, delta-encoded
+# runs, results offloaded to GridFS) go through query_rows instead, which
+# applies the same filters and sort order in Python while the rows stream by.
+
+# Filter op -> MongoDB query operator; contains and exists are built separately.
+_OPERATORS = {"eq": "$eq", "ne": "$ne", "gt": "$gt", "gte": "$gte", "lt": "$lt", "lte": "$lte", "in": "$in", "nin": "$nin"}
+
+# Sort rank of each kind of value, following MongoDB's comparison order.
+# _EMPTY ranks the empty arrays of a sort key, which sort below null.
+_EMPTY, _NULL, _NUMBER, _STRING, _OBJECT, _ARRAY, _BOOLEAN = range(-1, 6)
+
+_MISSING = object()
+_EMPTY_ARRAY = object()
+
+# The sorted buffer of query_rows is trimmed back to the page whenever it
+# grows to this many times the rows the page needs.
+_SORT_BUFFER_FACTOR = 2
+
+
+def query_columns(query: ResultsQuery) -> List[str]:
+    """Every column a query filters, sorts or projects on."""
+    columns = [condition.column for condition in query.filters] + [key.column for key in query.sort]
+    return columns + list(query.columns or ())
+
+
+def validate_query(query: ResultsQuery, fields: List[dict]) -> None:
+    """
+    Check that a query only names columns defined in fields.
+
+    Args:
+        query: The results query
+        fields: The review's or run's column schema
+
+    Raises:
+        ValueError: If a column is not defined in fields, or fields is empty
+            and a column name could be read as a path or an operator
+    """
+    defined = {field.get("name") for field in fields}
+    for column in query_columns(query):
+        if defined and column not in defined:
+            raise ValueError(f"unknown column {column!r}")
+        if not column or column.startswith("$") or "." in column:
+            raise ValueError(f"invalid column name {column!r}")
+    for condition in query.filters:
+        if condition.op in ("in", "nin") and not isinstance(condition.value, list):
+            raise ValueError(f"{condition.op} on {condition.column!r} needs a list value")
+        if condition.op == "contains" and not isinstance(condition.value, str):
+            raise ValueError(f"contains on {condition.column!r} needs a string value")
+
+
+def _condition(condition: ResultsFilter) -> dict:
+    if condition.op == "contains":
+        return {"$regex": re.escape(condition.value), "$options": "i"}
+    if condition.op == "exists":
+        return {"$exists": bool(condition.value)}
+    return {_OPERATORS[condition.op]: condition.value}
+
+
+def build_match(filters: List[ResultsFilter], prefix: str = "") -> dict:
+    """
+    Translate filters into a MongoDB query on the row fields under prefix.
+
+    Args:
+        filters: The query's filters; all of them must hold
+        prefix: Path of the row inside the pipeline documents, e.g. "results."
+
+    Returns:
+        dict: $match query
+    """
+    return {"$and": [{prefix + condition.column: _condition(condition)} for condition in filters]} if filters else {}
+
+
+def results_pipeline(match: dict, query: ResultsQuery) -> List[dict]:
+    """
+    Aggregation over the documents matching match, returning one page of their results.
+
+    The pipeline yields a single document with total (rows that pass the
+    filters) and items (the requested page). Ties in the sort order, and
+    queries without a sort, keep the stored row order.
+
+    Args:
+        match: Query selecting the review or run
+        query: The results query
+
+    Returns:
+        list: Pipeline stages
+    """
+    pipeline = [
+        {"$match": match},
+        {"$project": {"_id": 0, "results": 1}},
+        {"$unwind": {"path": "$results", "includeArrayIndex": "row"}},
+    ]
+    if query.filters:
+        pipeline.append({"$match": build_match(query.filters, "results.")})
+    page = []
+    if query.sort:
+        keys = {f"results.{key.column}": 1 if key.direction == "asc" else -1 for key in query.sort}
+        page.append({"$sort": {**keys, "row": 1}})
+    page += [{"$skip": query.offset}, {"$limit": query.limit}, {"$replaceWith": "$results"}]
+    if query.columns is not None:
+        page.append({"$project": {"_id": 0, **{column: 1 for column in query.columns}}})
+    pipeline.append({"$facet": {"total": [{"$count": "count"}], "items": page}})
+    return pipeline
+
+
+def page_from_facet(doc: Optional[dict], query: ResultsQuery) -> ResultsPage:
+    """Build a ResultsPage from the document produced by results_pipeline."""
+    doc = doc or {}
+    total = doc.get("total") or [{"count": 0}]
+    return ResultsPage(items=doc.get("items", []), total=total[0]["count"], offset=query.offset, limit=query.limit)
+
+
+def _rank(value: Any) -> int:
+    if value is _EMPTY_ARRAY:
+        return _EMPTY
+    if value is None or value is _MISSING:
+        return _NULL
+    if isinstance(value, bool):
+        return _BOOLEAN
+    if isinstance(value, (int, float)):
+        return _NUMBER
+    if isinstance(value, str):
+        return _STRING
+    return _ARRAY if isinstance(value, list) else _OBJECT
+
+
+def _compare(a: Any, b: Any) -> int:
+    """
+    Order two values the way MongoDB compares BSON values.
+
+    Values of different kinds order by kind. Arrays compare element by
+    element and objects field by field (the kind of the value, then the
+    name, then the value), a prefix ordering first.
+    """
+    rank_a, rank_b = _rank(a), _rank(b)
+    if rank_a != rank_b:
+        return -1 if rank_a < rank_b else 1
+    if rank_a in (_EMPTY, _NULL):
+        return 0
+    if rank_a in (_ARRAY, _OBJECT):
+        pairs = zip(a, b) if rank_a == _ARRAY else zip(a.items(), b.items())
+        for item_a, item_b in pairs:
+            if rank_a == _ARRAY:
+                order = _compare(item_a, item_b)
+            else:
+                (name_a, value_a), (name_b, value_b) = item_a, item_b
+                order = (
+                    (_rank(value_a) > _rank(value_b)) - (_rank(value_a) < _rank(value_b))
+                    or (name_a > name_b) - (name_a < name_b)
+                    or _compare(value_a, value_b)
+                )
+            if order:
+                return order
+        return (len(a) > len(b)) - (len(a) < len(b))
+    return (a > b) - (a < b)
+
+
+def _sort_value(value: Any, descending: bool) -> Any:
+    """The value $sort orders a row by: an array's smallest element ascending, its largest descending."""
+    if not isinstance(value, list):
+        return value
+    if not value:
+        return _EMPTY_ARRAY
+    return (max if descending else min)(value, key=cmp_to_key(_compare))
+
+
+def _equal(value: Any, target: Any) -> bool:
+    if target is None:
+        return value is None or value is _MISSING
+    if value is _MISSING:
+        return False
+    if _rank(value) == _rank(target) and value == target:
+        return True
+    # As in MongoDB, a scalar matches an array that contains it.
+    return isinstance(value, list) and not isinstance(target, list) and any(_equal(item, target) for item in value)
+
+
+def _holds(condition: ResultsFilter, value: Any) -> bool:
+    op, target = condition.op, condition.value
+    if op == "eq":
+        return _equal(value, target)
+    if op == "ne":
+        return not _equal(value, target)
+    if op == "in":
+        return any(_equal(value, item) for item in target)
+    if op == "nin":
+        return not any(_equal(value, item) for item in target)
+    if op == "exists":
+        return (value is not _MISSING) == bool(target)
+    if op == "contains":
+        values = value if isinstance(value, list) else [value]
+        return any(isinstance(item, str) and target.lower() in item.lower() for item in values)
+    # Range operators only compare values of the same kind, as in MongoDB;
+    # an array is compared both as a whole and by its elements.
+    values = [*value, value] if isinstance(value, list) else [value]
+    for item in values:
+        if _rank(item) != _rank(target) or _rank(item) == _NULL:
+            continue
+        order = _compare(item, target)
+        if {"gt": order > 0, "gte": order >= 0, "lt": order < 0, "lte": order <= 0}[op]:
+            return True
+    return False
+
+
+def row_matches(row: dict, filters: Iterable[ResultsFilter]) -> bool:
+    """Whether a result row passes every filter."""
+    return all(_holds(condition, row.get(condition.column, _MISSING)) for condition in filters)
+
+
+def _sort_key(sort: List[ResultsSort]):
+    def compare(a: tuple, b: tuple) -> int:
+        (index_a, row_a), (index_b, row_b) = a, b
+        for key in sort:
+            descending = key.direction == "desc"
+            order = _compare(
+                _sort_value(row_a.get(key.column), descending), _sort_value(row_b.get(key.column), descending)
+            )
+            if order:
+                return -order if descending else order
+        return index_a - index_b
+
+    return cmp_to_key(compare)
+
+
+def _project(row: dict, columns: Optional[List[str]]) -> dict:
+    return row if columns is None else {column: row[column] for column in columns if column in row}
+
+
+async def query_rows(rows: AsyncIterator[dict], query: ResultsQuery) -> ResultsPage:
+    """
+    Filter, sort and page result rows in Python, with the semantics of results_pipeline.
+
+    Rows are consumed as they arrive. Without a sort only the page is kept;
+    with one, the buffer of candidates is cut back to offset + limit rows
+    whenever it doubles, so memory stays proportional to the page's end
+    rather than to the number of rows.
+
+    Args:
+        rows: The stored rows, in stored order
+        query: The results query
+
+    Returns:
+        ResultsPage
+    """
+    end = query.offset + query.limit
+    total = 0
+    kept: List[tuple] = []
+    key = _sort_key(query.sort)
+    async for row in rows:
+        if not row_matches(row, query.filters):
+            continue
+        if query.sort:
+            kept.append((total, row))
+            if len(kept) >= _SORT_BUFFER_FACTOR * end:
+                kept = sorted(kept, key=key)[:end]
+        elif query.offset <= total < end:
+            kept.append((total, row))
+        total += 1
+    if query.sort:
+        kept = sorted(kept, key=key)[query.offset:end]
+    return ResultsPage(
+        items=[_project(row, query.columns) for _, row in kept], total=total, offset=query.offset, limit=query.limit
+    )
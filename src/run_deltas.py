@@ -0,0 +1,193 @@
+from typing import Any, Dict, List, Optional
+
+# Run documents in review_runs are stored in one of two encodings:
+#
+#   full   fields and results are stored as-is (checkpoints, and every run
+#          written before delta encoding existed, which has no encoding key)
+#   delta  fields_delta and results_delta hold the changes against the run
+#          with the previous sequence number of the same review
+#
+# A delta is {"length": <row count>, "rows": [<change>, ...]} where each change
+# targets one row by index and is either {"i": 3, "row": {...}} (the whole row)
+# or {"i": 3, "set": {...}, "unset": [...]} (only the cells that changed).
+# Rows are matched by position, which suits reruns that keep their rows in the
+# same order and change a few cells.
+
+FULL = "full"
+DELTA = "delta"
+
+# Store a run in full when more than this share of its rows changed.
+MAX_CHANGED_SHARE = 0.5
+
+STORAGE_FIELDS = ("encoding", "sequence", "base_id", "checkpoint_sequence", "fields_delta", "results_delta")
+
+
+def _row_change(index: int, old: dict, new: dict) -> Optional[dict]:
+    """Describe how one row changed, or None if it did not."""
+    if old == new:
+        return None
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    removed = [key for key in old if key not in new]
+    # A cell patch only pays off while it is smaller than the row itself.
+    if len(changed) + len(removed) >= len(new):
+        return {"i": index, "row": new}
+    change: Dict[str, Any] = {"i": index}
+    if changed:
+        change["set"] = changed
+    if removed:
+        change["unset"] = removed
+    return change
+
+
+def diff_rows(old: List[dict], new: List[dict]) -> dict:
+    """
+    Compute the delta that turns one list of rows into another.
+
+    Args:
+        old: Rows of the earlier run
+        new: Rows of the later run
+
+    Returns:
+        dict: Delta with the new length and one change per differing row
+    """
+    changes = []
+    for index, row in enumerate(new):
+        if index >= len(old):
+            changes.append({"i": index, "row": row})
+            continue
+        change = _row_change(index, old[index], row)
+        if change is not None:
+            changes.append(change)
+    return {"length": len(new), "rows": changes}
+
+
+def apply_delta(rows: List[dict], delta: dict) -> List[dict]:
+    """
+    Apply a delta to a list of rows.
+
+    Args:
+        rows: Rows of the base run; not modified
+        delta: Delta produced by diff_rows or compose_deltas
+
+    Returns:
+        List of rows of the later run
+    """
+    result = list(rows[:delta["length"]])
+    result.extend({} for _ in range(delta["length"] - len(result)))
+    for change in delta["rows"]:
+        index = change["i"]
+        if "row" in change:
+            result[index] = change["row"]
+            continue
+        row = {key: value for key, value in result[index].items() if key not in change.get("unset", ())}
+        row.update(change.get("set", {}))
+        result[index] = row
+    return result
+
+
+def compose_deltas(first: dict, second: dict) -> dict:
+    """
+    Combine two consecutive deltas (A to B, then B to C) into one delta from A to C.
+
+    Works on the deltas alone, so no rows of A, B or C have to be read.
+
+    Args:
+        first: Delta from A to B
+        second: Delta from B to C
+
+    Returns:
+        dict: Delta from A to C
+    """
+    length = second["length"]
+    changes = {change["i"]: change for change in first["rows"] if change["i"] < length}
+    for change in second["rows"]:
+        index = change["i"]
+        earlier = changes.get(index)
+        # Rows B added past A's end are whole rows, so patches to them stay whole rows.
+        if "row" in change or earlier is None:
+            changes[index] = change
+        elif "row" in earlier:
+            changes[index] = {"i": index, "row": apply_delta([earlier["row"]], {"length": 1, "rows": [{**change, "i": 0}]})[0]}
+        else:
+            set_values = {key: value for key, value in earlier.get("set", {}).items() if key not in change.get("unset", ())}
+            set_values.update(change.get("set", {}))
+            unset = [key for key in earlier.get("unset", []) if key not in change.get("set", {})]
+            unset.extend(key for key in change.get("unset", []) if key not in unset)
+            merged: Dict[str, Any] = {"i": index}
+            if set_values:
+                merged["set"] = set_values
+            if unset:
+                merged["unset"] = unset
+            changes[index] = merged
+    return {"length": length, "rows": [changes[index] for index in sorted(changes)]}
+
+
+def encode_run(run_dict: dict, base: Optional[dict], sequence: int, checkpoint_interval: int) -> dict:
+    """
+    Build the stored document for a new run.
+
+    The run is stored as a delta against base (the decoded run with the previous
+    sequence number) unless it falls on a checkpoint, has no base, or changed
+    so much that the delta would not be smaller than the run.
+
+    Args:
+        run_dict: The run as dumped from ReviewRun
+        base: Decoded previous run document, or None if there is none
+        sequence: Sequence number of the new run within its review
+        checkpoint_interval: Every run whose sequence is a multiple of this is stored in full
+
+    Returns:
+        dict: Document to insert into review_runs
+    """
+    doc = dict(run_dict, sequence=sequence)
+    if base is None or sequence % checkpoint_interval == 0:
+        return dict(doc, encoding=FULL)
+
+    fields_delta = diff_rows(base["fields"], doc["fields"])
+    results_delta = diff_rows(base["results"], doc["results"])
+    if len(results_delta["rows"]) > MAX_CHANGED_SHARE * max(len(doc["results"]), 1):
+        return dict(doc, encoding=FULL)
+
+    del doc["fields"], doc["results"]
+    return dict(
+        doc,
+        encoding=DELTA,
+        base_id=base["id"],
+        checkpoint_sequence=base["checkpoint_sequence"] if base.get("encoding") == DELTA else base["sequence"],
+        fields_delta=fields_delta,
+        results_delta=results_delta,
+    )
+
+
+def decode_runs(docs: List[dict]) -> Dict[int, dict]:
+    """
+    Rebuild the fields and results of a contiguous chain of run documents.
+
+    Args:
+        docs: Stored documents of one review covering every sequence number from
+            a full run up to the last run needed, in any order
+
+    Returns:
+        dict: Decoded run documents by sequence number
+
+    Raises:
+        ValueError: If a delta's base run is missing from docs
+    """
+    decoded: Dict[int, dict] = {}
+    for doc in sorted(docs, key=lambda d: d["sequence"]):
+        if doc.get("encoding") != DELTA:
+            decoded[doc["sequence"]] = doc
+            continue
+        base = decoded.get(doc["sequence"] - 1)
+        if base is None or base["id"] != doc["base_id"]:
+            raise ValueError(f"Base run {doc['base_id']} of run {doc['id']} is missing")
+        run = {key: value for key, value in doc.items() if key not in ("fields_delta", "results_delta")}
+        run["fields"] = apply_delta(base["fields"], doc["fields_delta"])
+        run["results"] = apply_delta(base["results"], doc["results_delta"])
+        decoded[doc["sequence"]] = run
+    return decoded
+
+
+def strip_storage_fields(doc: dict) -> dict:
+    """Drop the encoding bookkeeping from a decoded run document."""
+    return {key: value for key, value in doc.items() if key not in STORAGE_FIELDS}
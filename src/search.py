@@ -0,0 +1,115 @@
+import unicodedata
+from typing import Dict, List, Optional
+
+from src.pagination import decode_cursor, keyset_filter
+
+# Name search over a user's reviews and collections.
+#
+# Prefix search reads a normalized copy of the name, stored in name_key by
+# every write path and indexed as (user_id, name_key, id): the prefix becomes
+# one index range, already in page order. Full-text search uses the text
+# index on the names (and review prompts) with user_id as its equality
+# prefix, so both modes only ever touch the tenant's own entries.
+
+PREFIX = "prefix"
+TEXT = "text"
+
+NAME_KEY_FIELD = "name_key"
+
+# Field holding the searchable name of each kind of document.
+NAME_FIELDS: Dict[str, str] = {"review": "name", "collection": "collection_name"}
+
+# Text matches are paged by descending relevance; the score is stored negated
+# so the ascending keyset helpers apply.
+SEARCH_RANK_FIELD = "search_rank"
+
+# Above every code point, so key + _KEY_END bounds all keys starting with key.
+_KEY_END = "\U0010ffff"
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """
+    Fold a name to the form stored in name_key and matched by prefix search.
+
+    Compatibility characters are unified, case is folded and runs of
+    whitespace become a single space.
+
+    Args:
+        name: The name as entered
+
+    Returns:
+        str: The normalized name
+    """
+    return " ".join(unicodedata.normalize("NFKC", name or "").casefold().split())
+
+
+def with_name_key(kind: str, doc: dict) -> dict:
+    """Return a review or collection document with name_key set from its name."""
+    return {**doc, NAME_KEY_FIELD: normalize_name(doc.get(NAME_FIELDS[kind]))}
+
+
+def name_key_update(kind: str, update: dict) -> dict:
+    """Return an update document that also refreshes name_key when it sets the name."""
+    updated = update.get("$set", {})
+    if kind not in NAME_FIELDS or NAME_FIELDS[kind] not in updated:
+        return update
+    return {**update, "$set": {**updated, NAME_KEY_FIELD: normalize_name(updated[NAME_FIELDS[kind]])}}
+
+
+def _keeping(stages: List[dict], field: str) -> List[dict]:
+    """Summary stages whose final $project also passes field through, for the page cursor."""
+    *head, last = stages
+    return [*head, {"$project": {**last["$project"], field: 1}}]
+
+
+def search_pipeline(user_id: str, q: str, mode: str, stages: List[dict], limit: int, after: Optional[str]) -> List[dict]:
+    """
+    Aggregation returning one page of a user's documents that match a search.
+
+    Prefix matches are ordered by name_key then id, text matches by relevance
+    then id. One document past the page is kept to detect a next page.
+
+    Args:
+        user_id: Owner whose documents are searched
+        q: Name prefix, or a $text search string
+        mode: PREFIX or TEXT
+        stages: Summary stages shaping each document; the last one must be a $project
+        limit: Maximum number of documents on the page
+        after: Cursor returned as next_cursor by the previous page
+
+    Returns:
+        list: Pipeline stages
+
+    Raises:
+        ValueError: If the query is empty or the cursor is malformed
+    """
+    if mode == TEXT:
+        if not q.strip():
+            raise ValueError("Search query must not be empty")
+        sort_keys = [SEARCH_RANK_FIELD, "id"]
+        pipeline = [
+            {"$match": {"user_id": user_id, "$text": {"$search": q}}},
+            {"$addFields": {SEARCH_RANK_FIELD: {"$multiply": [{"$meta": "textScore"}, -1]}}},
+        ]
+        if after:
+            pipeline.append({"$match": keyset_filter(sort_keys, decode_cursor(after))})
+    else:
+        key = normalize_name(q)
+        if not key:
+            raise ValueError("Search query must not be empty")
+        sort_keys = [NAME_KEY_FIELD, "id"]
+        match = {"user_id": user_id, NAME_KEY_FIELD: {"$gte": key, "$lt": key + _KEY_END}}
+        if after:
+            match = {"$and": [match, keyset_filter(sort_keys, decode_cursor(after))]}
+        pipeline = [{"$match": match}]
+    return [
+        *pipeline,
+        {"$sort": {sort_key: 1 for sort_key in sort_keys}},
+        {"$limit": limit + 1},
+        *_keeping(stages, sort_keys[0]),
+    ]
+
+
+def search_cursor(mode: str, item_dict: dict) -> List:
+    """Sort key values of a search result, as encoded into the next page's cursor."""
+    return [item_dict[SEARCH_RANK_FIELD if mode == TEXT else NAME_KEY_FIELD], item_dict["id"]]
@@ -0,0 +1,110 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+from unittest.mock import MagicMock
+
+import pytest
+from pymongo import MongoClient
+
+from src.mongodb import MongoDB
+
+# Attributes of MongoDB that talk to the server, replaced by make_db.
+MOCKED_ATTRIBUTES = (
+    "users_collection",
+    "collections_collection",
+    "reviews_collection",
+    "review_runs_collection",
+    "document_buckets_collection",
+    "results_bucket",
+)
+
+
+class FakeCursor:
+    """
+    Stand-in for a PyMongo async cursor over a list of documents.
+
+    Serves find() cursors (sort, limit and batch_size chain and are recorded)
+    as well as the cursor an awaited aggregate() returns. Documents are
+    yielded as copies, so the code under test may change them freely.
+    """
+
+    def __init__(self, docs):
+        self.docs = list(docs)
+        self.sort_spec = None
+        self.limit_value = None
+
+    def sort(self, key_or_list, direction=None):
+        self.sort_spec = key_or_list if direction is None else [(key_or_list, direction)]
+        return self
+
+    def limit(self, value):
+        self.limit_value = value
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def __aiter__(self):
+        async def gen():
+            for doc in self.docs[: self.limit_value]:
+                yield dict(doc)
+        return gen()
+
+
+@pytest.fixture
+def fake_cursor():
+    """The FakeCursor class: fake_cursor(docs) builds a cursor over docs."""
+    return FakeCursor
+
+
+@pytest.fixture
+def make_db():
+    """
+    Factory for a MongoDB whose collections and GridFS bucket are MagicMocks.
+
+    Keyword arguments go to MongoDB (cache, events, ...). Tests give the
+    mocked collections the AsyncMock methods their scenario needs.
+    """
+    def build(**kwargs) -> MongoDB:
+        db = MongoDB("test_db", **kwargs)
+        for name in MOCKED_ATTRIBUTES:
+            setattr(db, name, MagicMock())
+        return db
+
+    return build
+
+
+@pytest.fixture(scope="session")
+def mongodb_uri():
+    """
+    URI of a real MongoDB: MONGODB_TEST_URI, or a temporary mongod from PATH.
+
+    Tests using it are skipped when neither is available.
+    """
+    uri = os.getenv("MONGODB_TEST_URI")
+    if uri:
+        yield uri
+        return
+    mongod = shutil.which("mongod")
+    if mongod is None:
+        pytest.skip("No MongoDB available: set MONGODB_TEST_URI or put mongod on PATH")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    with tempfile.TemporaryDirectory(prefix="test-mongod-") as dbpath:
+        process = subprocess.Popen(
+            [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            uri = f"mongodb://127.0.0.1:{port}"
+            with MongoClient(uri, serverSelectionTimeoutMS=15000) as client:
+                client.admin.command("ping")
+            yield uri
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
@@ -1,19 +1,25 @@
 
+import asyncio
 from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, patch
+import json
+
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import DuplicateKeyError
 from main import app
-from src.models import User, Review, PromptState, ReviewState
+from src.models import Page, User, Review
 
 client = TestClient(app)
 
 # Mocking the database
-@patch("main.db")
+@patch("main.db", new_callable=AsyncMock)
 def test_create_user(mock_db):
     mock_db.create_user.return_value = "test_user_id"
     
     user_data = {
         "id": "test_user_id",
         "name": "Test User",
+        "email": "test@example.com",
+        "password": "secret",
         "review_ids": []
     }
     
@@ -21,10 +27,10 @@ def test_create_user(mock_db):
     
     assert response.status_code == 201
     assert response.json() == {"message": "User created successfully", "id": "test_user_id"}
-    mock_db.create_user.assert_called_once()
+    mock_db.create_user.assert_awaited_once()
 
 
-@patch("main.db")
+@patch("main.db", new_callable=AsyncMock)
 def test_update_user(mock_db):
     mock_db.update_user.return_value = True
     
@@ -32,6 +38,8 @@ def test_update_user(mock_db):
     user_data = {
         "id": user_id,
         "name": "Updated Test User",
+        "email": "test@example.com",
+        "password": "secret",
         "review_ids": ["review_1"]
     }
     
@@ -39,7 +47,7 @@ def test_update_user(mock_db):
     
     assert response.status_code == 200
     assert response.json() == {"message": "User updated successfully"}
-    mock_db.update_user.assert_called_once()
+    mock_db.update_user.assert_awaited_once()
     
     # Verify arguments
     args, _ = mock_db.update_user.call_args
@@ -47,55 +55,123 @@ def test_update_user(mock_db):
     assert args[1].name == "Updated Test User"
 
 
-@patch("main.db")
+@patch("main.db", new_callable=AsyncMock)
 def test_create_review(mock_db):
     mock_db.create_review.return_value = "test_review_id"
     
-    prompt_state = {
-        "user_prompt": "test prompt",
-        "review_columns": {}
-    }
-    
     review_data = {
         "id": "test_review_id",
         "user_id": "test_user_id",
-        "collection_ids": [],
-        "prompt_state": prompt_state,
-        "review_states": []
+        "name": "Test Review",
+        "prompt": "test prompt",
+        "collection_ids": []
     }
     
     response = client.post("/reviews", json=review_data)
     
     assert response.status_code == 201
     assert response.json() == {"message": "Review created successfully", "id": "test_review_id"}
-    mock_db.create_review.assert_called_once()
+    mock_db.create_review.assert_awaited_once()
 
 
-@patch("main.db")
-def test_update_review_prompt_state(mock_db):
+@patch("main.db", new_callable=AsyncMock)
+def test_update_review_prompt(mock_db):
     mock_db.update_review.return_value = True
     
     review_id = "test_review_id"
-    prompt_state = {
-        "user_prompt": "updated prompt",
-        "review_columns": {"col1": "val1"}
-    }
-    
     review_data = {
         "id": review_id,
         "user_id": "test_user_id",
+        "name": "Test Review",
+        "prompt": "updated prompt",
         "collection_ids": [],
-        "prompt_state": prompt_state,
-        "review_states": []
+        "fields": [{"name": "col1"}]
     }
     
     response = client.put(f"/reviews/{review_id}", json=review_data)
     
     assert response.status_code == 200
     assert response.json() == {"message": "Review updated successfully"}
-    mock_db.update_review.assert_called_once()
+    mock_db.update_review.assert_awaited_once()
     
     # Verify arguments
     args, _ = mock_db.update_review.call_args
     assert args[0] == review_id
-    assert args[1].prompt_state.user_prompt == "updated prompt"
+    assert args[1].prompt == "updated prompt"
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_get_review_not_found(mock_db):
+    mock_db.get_review.return_value = None
+
+    response = client.get("/reviews/missing")
+
+    assert response.status_code == 404
+    mock_db.get_review.assert_awaited_once_with("missing")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_list_users_rejects_bad_cursor(mock_db):
+    mock_db.list_users.side_effect = ValueError("Invalid pagination cursor")
+
+    response = client.get("/users", params={"after": "garbage", "limit": 10})
+
+    assert response.status_code == 400
+    mock_db.list_users.assert_awaited_once_with(limit=10, after="garbage")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_list_reviews_streams_ndjson(mock_db):
+    async def reviews():
+        for i in range(3):
+            yield Review(id=f"review_{i}", user_id="user_1", name=f"Review {i}")
+
+    mock_db.stream_reviews = MagicMock(return_value=reviews())
+
+    response = client.get("/reviews", params={"user_id": "user_1"}, headers={"Accept": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["id"] for line in lines] == ["review_0", "review_1", "review_2"]
+    mock_db.stream_reviews.assert_called_once_with("user_1")
+    mock_db.list_reviews.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_list_reviews_fast_path_matches_model_dump(mock_db):
+    review = Review(
+        id="review_1",
+        user_id="user_1",
+        name="Review 1",
+        results=[{"row": i, "score": i / 2, "label": None} for i in range(3)],
+    )
+    page = Page[Review](items=[review], next_cursor="abc")
+    mock_db.list_reviews.return_value = page
+
+    response = client.get("/reviews", params={"user_id": "user_1"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/json")
+    assert response.json() == page.model_dump(mode="json")
+
+
+def test_get_user_by_email_projects_out_id(make_db):
+    db = make_db()
+    db.users_collection.find_one = AsyncMock(
+        return_value={"id": "u1", "name": "U", "email": "u@example.com", "password": "pw"}
+    )
+
+    user = asyncio.run(db.get_user_by_email("u@example.com"))
+
+    assert user == User(id="u1", name="U", email="u@example.com", password="pw")
+    assert db.users_collection.find_one.call_args.args == ({"email": "u@example.com"}, {"_id": 0})
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_create_duplicate_user_is_409(mock_db):
+    mock_db.create_user.side_effect = DuplicateKeyError("E11000 duplicate key error index: email_unique")
+
+    response = client.post("/users", json={"id": "u2", "name": "U", "email": "taken@example.com", "password": "pw"})
+
+    assert response.status_code == 409
@@ -0,0 +1,27 @@
+from benchmarks.bench_endpoints import ENDPOINTS, percentile, summarize, uncovered_routes
+from main import app
+
+
+def test_benchmark_drives_every_route():
+    assert uncovered_routes(app.routes) == []
+
+
+def test_endpoint_builders_produce_urls():
+    data = {"users": ["u1"], "collections": ["c1"], "reviews": ["r1"], "documents": 3, "runs": 2, "rows": 1}
+    for endpoint in ENDPOINTS:
+        url, kwargs = endpoint.build(7, data)
+        assert url.startswith("/")
+        assert "{" not in url
+        assert set(kwargs) <= {"json", "params", "headers"}
+
+
+def test_percentiles_use_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+
+    assert percentile(values, 0.50) == 0.05
+    assert percentile(values, 0.99) == 0.099
+    assert percentile([], 0.5) == 0.0
+    summary = summarize(values, errors=2, elapsed=0.5)
+    assert summary["requests"] == 100
+    assert summary["throughput_rps"] == 200.0
+    assert summary["p95_ms"] == 95.0
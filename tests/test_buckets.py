@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+from pymongo.errors import DuplicateKeyError
+
+from main import app
+from src.models import Collection
+from src.mongodb import split_document_ids
+from src.pagination import decode_cursor
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def db(make_db):
+    db = make_db()
+    db.collections_collection.update_one = AsyncMock()
+    return db
+
+
+def test_split_document_ids_spills_past_inline_limit():
+    collection = Collection(id="c1", user_id="u1", collection_name="C", document_ids=["a", "b", "c"])
+
+    with patch("src.mongodb.INLINE_DOCUMENT_LIMIT", 3):
+        inline, overflow = split_document_ids(collection)
+    with patch("src.mongodb.INLINE_DOCUMENT_LIMIT", 2):
+        bucketed, spilled = split_document_ids(collection)
+
+    assert inline["document_ids"] == ["a", "b", "c"] and overflow == []
+    assert "document_ids" not in bucketed
+    assert bucketed["bucketed"] is True and spilled == ["a", "b", "c"]
+
+
+def test_inline_add_past_limit_spills_to_buckets(db):
+    db.collections_collection.find_one_and_update = AsyncMock(return_value={"size": 2, "present": False})
+    db._spill_to_buckets = AsyncMock()
+
+    with patch("src.mongodb.INLINE_DOCUMENT_LIMIT", 2):
+        added = asyncio.run(db.add_document_to_collection("c1", "d3"))
+
+    assert added is True
+    db._spill_to_buckets.assert_awaited_once_with("c1")
+
+
+def test_add_to_buckets_skips_members_and_writes_new_buckets(db, fake_cursor):
+    db.document_buckets_collection.find.return_value = fake_cursor([{"hits": ["a"]}])
+    db.document_buckets_collection.find_one = AsyncMock(return_value=None)
+    db.document_buckets_collection.insert_many = AsyncMock()
+
+    with patch("src.mongodb.DOCUMENT_BUCKET_SIZE", 2):
+        added = asyncio.run(db._add_to_buckets("c1", ["a", "b", "c", "d"]))
+
+    # "a" is already stored; the rest land in new buckets of at most two ids.
+    assert added == 3
+    buckets = db.document_buckets_collection.insert_many.call_args_list
+    assert [b["document_ids"] for call in buckets for b in call.args[0]] == [["b"], ["c", "d"]]
+    db.collections_collection.update_one.assert_awaited_with({"id": "c1"}, {"$inc": {"document_count": 3, "version": 1}})
+
+
+def test_single_bucket_add_reports_duplicates(db):
+    db.document_buckets_collection.update_one = AsyncMock(side_effect=DuplicateKeyError("dup"))
+
+    added = asyncio.run(db._add_to_buckets("c1", ["a"]))
+
+    assert added == 0
+    db.collections_collection.update_one.assert_not_awaited()
+
+
+def test_list_bucketed_documents_resumes_inside_bucket(db, fake_cursor):
+    first, second = ObjectId(), ObjectId()
+    db.collections_collection.find_one = AsyncMock(return_value={"bucketed": True})
+    db.document_buckets_collection.find.return_value = fake_cursor([
+        {"_id": first, "document_ids": ["a", "b", "c"]},
+        {"_id": second, "document_ids": ["d", "e"]},
+    ])
+
+    page = asyncio.run(db.list_collection_documents("c1", limit=4))
+
+    assert page.items == ["a", "b", "c", "d"]
+    assert decode_cursor(page.next_cursor) == [str(second), 1]
+
+
+def test_membership_checks_buckets_only_when_bucketed(db):
+    db.collections_collection.find_one = AsyncMock(return_value={"member": False, "bucketed": True})
+    db.document_buckets_collection.count_documents = AsyncMock(return_value=1)
+
+    assert asyncio.run(db.is_document_in_collection("c1", "d1")) is True
+    query = db.document_buckets_collection.count_documents.call_args.args[0]
+    assert query == {"collection_id": "c1", "count": {"$gt": 0}, "document_ids": "d1"}
+
+
+def test_put_of_fetched_bucketed_collection_keeps_its_buckets(db):
+    stored = {"id": "c1", "user_id": "u1", "collection_name": "C", "bucketed": True, "document_count": 25000, "version": 4}
+    db.collections_collection.find_one = AsyncMock(return_value=stored)
+    db.collections_collection.count_documents = AsyncMock(return_value=1)
+    db.collections_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1, modified_count=1))
+    db.document_buckets_collection.delete_many = AsyncMock()
+
+    with patch("main.db", db):
+        body = client.get("/collections/c1").json()
+        assert body["document_ids"] == []
+        body["collection_name"] = "Renamed"
+        assert client.put("/collections/c1", json=body).status_code == 200
+
+    update = db.collections_collection.update_one.call_args.args[1]
+    assert "$unset" not in update
+    assert update["$set"] == {"id": "c1", "user_id": "u1", "collection_name": "Renamed", "name_key": "renamed"}
+    db.document_buckets_collection.delete_many.assert_not_awaited()
@@ -0,0 +1,56 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+from pymongo.errors import BulkWriteError
+
+from main import app
+from src.models import BulkResult, User
+
+client = TestClient(app)
+
+
+def make_user(i):
+    return User(id=f"user_{i}", name="U", email=f"{i}@example.com", password="pw")
+
+
+def test_bulk_create_reports_per_item_failures_across_chunks(make_db):
+    db = make_db()
+    duplicate = BulkWriteError({
+        "writeErrors": [{"index": 1, "code": 11000, "errmsg": "E11000 duplicate key"}],
+        "nInserted": 1,
+    })
+    db.users_collection.insert_many = AsyncMock(side_effect=[duplicate, None])
+
+    result = asyncio.run(db._bulk_write(
+        "user", db.users_collection, [make_user(i).model_dump() for i in range(3)], upsert=False, chunk_size=2
+    ))
+
+    assert db.users_collection.insert_many.await_count == 2
+    assert db.users_collection.insert_many.call_args_list[0].kwargs == {"ordered": False}
+    assert result.succeeded == ["user_0", "user_2"]
+    assert [(f.index, f.id, f.code) for f in result.failed] == [(1, "user_1", 11000)]
+
+
+def test_bulk_upsert_replaces_by_id(make_db):
+    db = make_db()
+    db.users_collection.bulk_write = AsyncMock()
+
+    result = asyncio.run(db.bulk_create_users([make_user(1)], upsert=True))
+
+    requests = db.users_collection.bulk_write.call_args.args[0]
+    assert requests[0]._filter == {"id": "user_1"}
+    assert requests[0]._upsert is True
+    assert result.succeeded == ["user_1"]
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_bulk_users_endpoint(mock_db):
+    mock_db.bulk_create_users.return_value = BulkResult(succeeded=["user_1"])
+
+    response = client.post("/users/bulk", params={"upsert": "true"}, json=[make_user(1).model_dump()])
+
+    assert response.status_code == 200
+    assert response.json() == {"succeeded": ["user_1"], "failed": []}
+    args, kwargs = mock_db.bulk_create_users.call_args
+    assert kwargs == {"upsert": True}
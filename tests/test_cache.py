@@ -0,0 +1,117 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.cache import LRUCache, NullCache
+from src.models import CollectionPatch
+from src.mongodb import MongoDB
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+
+def test_lru_cache_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 5.0
+
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_cache_refuses_values_read_before_an_invalidation():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    generation = cache.generation("a")
+    cache.delete("a")
+    cache.set("a", "stale", generation=generation)
+    assert cache.get("a") is None
+
+    cache.set("a", "fresh", generation=cache.generation("a"))
+    assert cache.get("a") == "fresh"
+
+    # Pruned generations must not let an old read through either.
+    generation = cache.generation("b")
+    for key in ("b", "c", "d", "e"):
+        cache.delete(key)
+    cache.set("b", "stale", generation=generation)
+    assert cache.get("b") is None
+
+
+@pytest.fixture
+def db(make_db):
+    db = make_db(cache=LRUCache(max_size=10, ttl_seconds=60))
+    db.collections_collection.find_one = AsyncMock(
+        return_value={"id": "c1", "user_id": "u1", "collection_name": "C", "document_ids": []}
+    )
+    db.collections_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1, modified_count=1))
+    db.collections_collection.find_one_and_update = AsyncMock(return_value={"size": 0, "present": False})
+    return db
+
+
+def test_getter_reads_through_cache(db):
+
+    async def scenario():
+        first = await db.get_collection("c1")
+        second = await db.get_collection("c1")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert db.collections_collection.find_one.await_count == 1
+
+
+def test_writes_invalidate_cached_entry(db):
+
+    async def scenario():
+        await db.get_collection("c1")
+        await db.add_document_to_collection("c1", "d1")
+        await db.get_collection("c1")
+        await db.patch_collection("c1", CollectionPatch(collection_name="Renamed"))
+        await db.get_collection("c1")
+
+    asyncio.run(scenario())
+    assert db.collections_collection.find_one.await_count == 3
+    assert db.cache.stats()["invalidations"] == 2
+
+
+def test_null_cache_is_default():
+    assert isinstance(MongoDB("test_db").cache, NullCache)
+
+
+def test_invalidation_during_read_is_not_overwritten(db):
+    old = {"id": "c1", "user_id": "u1", "collection_name": "Old", "document_ids": []}
+
+    async def find_one_racing_a_write(*args):
+        # A concurrent write lands while this read is in flight.
+        db._invalidate("collection", "c1")
+        return old
+
+    db.collections_collection.find_one = AsyncMock(side_effect=find_one_racing_a_write)
+    assert asyncio.run(db.get_collection("c1")).collection_name == "Old"
+    assert db.cache.get(("collection", "c1")) is None
+
+    db.collections_collection.find_one = AsyncMock(return_value=dict(old, collection_name="New"))
+    assert asyncio.run(db.get_collection("c1")).collection_name == "New"
+    assert asyncio.run(db.get_collection_version("c1")) == 0
+    assert db.collections_collection.find_one.await_count == 1
@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo import ReturnDocument
+
+from main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def collection_db(make_db):
+    def build(*responses, layout=None):
+        db = make_db()
+        db.collections_collection.find_one = AsyncMock(return_value=layout)
+        db.collections_collection.find_one_and_update = AsyncMock(side_effect=list(responses))
+        return db
+
+    return build
+
+
+def test_add_documents_counts_new_ids_per_chunk(collection_db):
+    db = collection_db({"present": 1}, {"present": 0}, layout={"bucketed": False, "size": 1})
+
+    with patch("src.mongodb.BULK_CHUNK_SIZE", 2):
+        added = asyncio.run(db.add_documents_to_collection("c1", ["d1", "d2", "d2", "d3"]))
+
+    assert added == 2
+    calls = db.collections_collection.find_one_and_update.call_args_list
+    assert calls[0].args == ({"id": "c1", "bucketed": {"$ne": True}}, {"$addToSet": {"document_ids": {"$each": ["d1", "d2"]}}, "$inc": {"version": 1}})
+    assert calls[1].args[1] == {"$addToSet": {"document_ids": {"$each": ["d3"]}}, "$inc": {"version": 1}}
+    assert calls[0].kwargs["return_document"] == ReturnDocument.BEFORE
+
+
+def test_remove_documents_counts_present_ids(collection_db):
+    db = collection_db({"present": 2})
+
+    removed = asyncio.run(db.remove_documents_from_collection("c1", ["d1", "d2", "d9"]))
+
+    assert removed == 2
+    update = db.collections_collection.find_one_and_update.call_args.args[1]
+    assert update == {"$pull": {"document_ids": {"$in": ["d1", "d2", "d9"]}}, "$inc": {"version": 1}}
+
+
+def test_add_documents_spilled_mid_batch_counts_inline_chunks_once(collection_db, fake_cursor):
+    # The second chunk finds the collection bucketed by another writer.
+    db = collection_db({"present": 1}, None, layout={"bucketed": False, "size": 1})
+    db.collections_collection.count_documents = AsyncMock(return_value=1)
+    db.collections_collection.update_one = AsyncMock()
+    db.document_buckets_collection.find.return_value = fake_cursor([])
+    db.document_buckets_collection.find_one = AsyncMock(return_value=None)
+    db.document_buckets_collection.insert_many = AsyncMock()
+
+    with patch("src.mongodb.BULK_CHUNK_SIZE", 2):
+        added = asyncio.run(db.add_documents_to_collection("c1", ["d1", "d2", "d3", "d4"]))
+
+    assert added == 3
+    # The spilling writer moves d1 and d2 with the rest of the inline ids.
+    buckets = db.document_buckets_collection.insert_many.call_args.args[0]
+    assert [bucket["document_ids"] for bucket in buckets] == [["d3", "d4"]]
+    db.collections_collection.update_one.assert_awaited_once_with(
+        {"id": "c1"}, {"$inc": {"document_count": 2, "version": 1}}
+    )
+
+
+def test_remove_documents_spilled_mid_batch_counts_inline_chunks_once(collection_db):
+    db = collection_db({"present": 2}, None)
+    db.collections_collection.count_documents = AsyncMock(return_value=1)
+    db._remove_from_buckets = AsyncMock(return_value=1)
+
+    with patch("src.mongodb.BULK_CHUNK_SIZE", 2):
+        removed = asyncio.run(db.remove_documents_from_collection("c1", ["d1", "d2", "d3", "d3"]))
+
+    assert removed == 3
+    db._remove_from_buckets.assert_awaited_once_with("c1", ["d3"])
+
+
+def test_batch_on_missing_collection_returns_none(collection_db):
+    db = collection_db(None)
+    assert asyncio.run(db.add_documents_to_collection("missing", ["d1"])) is None
+    db.collections_collection.find_one_and_update.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_remove_documents_endpoint(mock_db):
+    mock_db.remove_documents_from_collection.return_value = 3
+
+    response = client.post("/collections/c1/documents/remove", json={"document_ids": ["a", "b", "c"]})
+
+    assert response.status_code == 200
+    assert response.json()["removed"] == 3
+    mock_db.remove_documents_from_collection.assert_awaited_once_with("c1", ["a", "b", "c"])
+    mock_db.add_document_to_collection.assert_not_awaited()
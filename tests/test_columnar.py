@@ -0,0 +1,99 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.columnar import COLUMNAR_FIELD, decode_results, encode_results, from_columnar, to_columnar
+from src.models import Review, ReviewPatch
+
+client = TestClient(app)
+
+ROWS = [
+    {"document_id": "d1", "score": 0.5, "label": None},
+    {"document_id": "d2", "score": 0.9},
+    {"document_id": "d3", "label": "x", "extra": True},
+]
+
+
+def test_columnar_round_trip_keeps_missing_cells():
+    block = to_columnar(ROWS)
+
+    assert block["columns"] == ["document_id", "score", "label", "extra"]
+    assert block["values"][0] == ["d1", "d2", "d3"]
+    assert block["length"] == 3
+    assert block["absent"] == {"label": [1], "extra": [0, 1], "score": [2]}
+    assert from_columnar(block) == ROWS
+
+
+def test_columnar_round_trip_edge_cases():
+    for rows in ([], [{}], [{}, {"a": 1}, {}], [{"a": 1}, {"a": 2}]):
+        assert from_columnar(to_columnar(rows)) == rows
+    assert "absent" not in to_columnar([{"a": 1}, {"a": 2}])
+
+
+def test_models_read_columnar_documents_with_appended_rows():
+    stored = encode_results({"id": "r1", "user_id": "u1", "name": "R", "results": ROWS[:2]})
+    stored["results"] = [ROWS[2]]
+
+    review = Review.model_validate(stored)
+
+    assert review.results == ROWS
+    assert decode_results({"results": ROWS}) == {"results": ROWS}
+
+
+def test_update_review_writes_configured_form_and_drops_the_other(make_db):
+    db = make_db()
+    db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+    review = Review(id="r1", user_id="u1", name="R", results=ROWS)
+
+    db.columnar_results = True
+    asyncio.run(db.update_review("r1", review))
+    update = db.reviews_collection.update_one.call_args.args[1]
+    assert update["$set"][COLUMNAR_FIELD] == to_columnar(ROWS)
+    assert "results" not in update["$set"]
+    assert update["$unset"] == {"results": ""}
+
+    db.columnar_results = False
+    asyncio.run(db.update_review("r1", review))
+    update = db.reviews_collection.update_one.call_args.args[1]
+    assert update["$set"]["results"] == ROWS
+    assert update["$unset"] == {COLUMNAR_FIELD: ""}
+
+
+def test_patch_review_replaces_and_appends_results_in_columnar_form(make_db):
+    db = make_db()
+    db.columnar_results = True
+    db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+
+    asyncio.run(db.patch_review("r1", ReviewPatch(name="N", results=ROWS[:1], append_results=ROWS[1:])))
+
+    update = db.reviews_collection.update_one.call_args.args[1]
+    assert update["$set"]["name"] == "N"
+    assert from_columnar(update["$set"][COLUMNAR_FIELD]) == ROWS
+    assert update["$unset"] == {"results": ""}
+    assert "$push" not in update
+
+
+def test_append_only_patch_pushes_rows(make_db):
+    db = make_db()
+    db.columnar_results = True
+    db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+
+    asyncio.run(db.patch_review("r1", ReviewPatch(append_results=ROWS[:1])))
+
+    update = db.reviews_collection.update_one.call_args.args[1]
+    assert update == {"$push": {"results": {"$each": ROWS[:1]}}, "$inc": {"version": 1}}
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_get_review_columnar_format(mock_db):
+    mock_db.get_review.return_value = Review(id="r1", user_id="u1", name="R", results=ROWS)
+
+    rows_body = client.get("/reviews/r1").json()
+    columnar_body = client.get("/reviews/r1", params={"format": "columnar"}).json()
+
+    assert rows_body["results"] == ROWS
+    assert columnar_body["results"] == to_columnar(ROWS)
+    assert columnar_body["name"] == "R"
+    assert client.get("/reviews/r1", params={"format": "csv"}).status_code == 422
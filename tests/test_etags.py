@@ -0,0 +1,116 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app, if_match_versions
+from src.models import Collection, Review
+from src.mongodb import VersionConflict
+
+client = TestClient(app)
+
+REVIEW = Review(id="r1", user_id="u1", name="R", results=[{"a": 1}], version=3)
+
+
+def test_if_match_versions():
+    assert if_match_versions(None) is None
+    assert if_match_versions("*") is None
+    assert if_match_versions('"3"') == [3]
+    assert if_match_versions('W/"3-columnar", "4"') == [3, 4]
+    assert if_match_versions('"abc"') == []
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_get_review_sends_etag_and_answers_304(mock_db):
+    mock_db.get_review.return_value = REVIEW
+    mock_db.get_review_version.return_value = 3
+
+    response = client.get("/reviews/r1")
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"3"'
+    assert client.get("/reviews/r1", params={"format": "columnar"}).headers["etag"] == '"3-columnar"'
+
+    mock_db.get_review.reset_mock()
+    response = client.get("/reviews/r1", headers={"If-None-Match": '"3"'})
+    assert response.status_code == 304
+    assert response.content == b""
+    mock_db.get_review.assert_not_awaited()
+
+    # The rows ETag does not validate the columnar representation.
+    assert client.get("/reviews/r1", params={"format": "columnar"}, headers={"If-None-Match": '"3"'}).status_code == 200
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_get_collection_answers_304(mock_db):
+    mock_db.get_collection_version.return_value = 5
+
+    response = client.get("/collections/c1", headers={"If-None-Match": 'W/"5"'})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"5"'
+    mock_db.get_collection.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_put_review_with_stale_if_match_is_412(mock_db):
+    mock_db.update_review.side_effect = VersionConflict("review r1 was changed by another writer")
+
+    response = client.put("/reviews/r1", json=REVIEW.model_dump(), headers={"If-Match": '"2"'})
+
+    assert response.status_code == 412
+    assert mock_db.update_review.call_args.kwargs == {"expected_versions": [2]}
+
+
+@pytest.fixture
+def reviews_db(make_db):
+    def build(matched: int, exists: bool):
+        db = make_db()
+        db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=matched))
+        db.reviews_collection.count_documents = AsyncMock(return_value=int(exists))
+        return db
+
+    return build
+
+
+def test_update_review_bumps_version_and_filters_on_expected_versions(reviews_db):
+    db = reviews_db(matched=1, exists=True)
+
+    assert asyncio.run(db.update_review("r1", REVIEW, expected_versions=[0]))
+
+    query, update = db.reviews_collection.update_one.call_args.args
+    assert query == {"id": "r1", "version": {"$in": [0, None]}}
+    assert update["$inc"] == {"version": 1}
+    assert "version" not in update["$set"]
+
+
+def test_update_review_version_conflict(reviews_db):
+    db = reviews_db(matched=0, exists=True)
+    with pytest.raises(VersionConflict):
+        asyncio.run(db.update_review("r1", REVIEW, expected_versions=[2]))
+
+    db = reviews_db(matched=0, exists=False)
+    assert asyncio.run(db.update_review("r1", REVIEW, expected_versions=[2])) is False
+
+
+def test_version_read_skips_heavy_fields(make_db):
+    db = make_db()
+    db.collections_collection.find_one = AsyncMock(return_value={})
+
+    assert asyncio.run(db.get_collection_version("c1")) == 0
+    assert db.collections_collection.find_one.call_args.args == ({"id": "c1"}, {"_id": 0, "version": 1})
+
+    db.cache.get = MagicMock(return_value=Collection(id="c1", user_id="u1", collection_name="C", version=7))
+    assert asyncio.run(db.get_collection_version("c1")) == 7
+
+
+def test_bulk_upsert_carries_version_forward(make_db):
+    db = make_db()
+    db.reviews_collection.bulk_write = AsyncMock()
+
+    asyncio.run(db.bulk_create_reviews([REVIEW], upsert=True))
+
+    operation = db.reviews_collection.bulk_write.call_args.args[0][0]
+    stage = operation._doc[0]["$replaceWith"]["$mergeObjects"]
+    assert stage[0]["$literal"]["id"] == "r1"
+    assert stage[1]["version"] == {"$add": [{"$ifNull": ["$version", 0]}, 1]}
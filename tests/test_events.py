@@ -0,0 +1,138 @@
+import asyncio
+import json
+import logging
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pymongo.errors import OperationFailure
+
+from main import app, change_events, watcher_stopped
+from src.events import EventBus, change_from_stream
+from src.models import ChangeEvent, Review, ReviewPatch
+
+client = TestClient(app)
+
+
+def _event(**fields) -> ChangeEvent:
+    return ChangeEvent(**{"kind": "review", "id": "r1", "user_id": "u1", "change": "updated", **fields})
+
+
+def test_bus_fans_out_to_document_and_owner_topics():
+    async def scenario():
+        bus = EventBus(queue_size=2)
+        async with bus.subscribe("review", "r1") as review_queue, bus.subscribe("user", "u1") as user_queue:
+            assert bus.has_subscribers("review") and bus.has_subscribers("user")
+            assert bus.publish(_event()) == 2
+            assert bus.publish(_event(id="r2")) == 1
+            bus.publish(_event(change="run_added"))
+            bus.publish(_event(change="deleted"))
+            # The slow review subscriber keeps only the newest two.
+            assert [review_queue.get_nowait().change for _ in range(2)] == ["run_added", "deleted"]
+            assert user_queue.qsize() == 2
+        assert not bus.has_subscribers("review")
+        assert bus.publish(_event()) == 0
+
+    asyncio.run(scenario())
+
+
+def test_change_from_stream():
+    update = {
+        "operationType": "update",
+        "ns": {"db": "nexus", "coll": "reviews"},
+        "fullDocument": {"id": "r1", "user_id": "u1", "version": 4},
+        "changed_fields": ["updated_at", "run_sequence", "version"],
+    }
+    assert change_from_stream(update) == _event(change="run_added", version=4)
+
+    documents = dict(update, ns={"coll": "collections"}, changed_fields=["document_ids.3", "version"])
+    assert change_from_stream(documents).change == "documents_changed"
+    assert change_from_stream(dict(update, operationType="insert", changed_fields=[])).change == "created"
+    assert change_from_stream(dict(update, fullDocument=None)) is None
+
+
+@pytest.fixture
+def events_db(make_db):
+    def build(bus: EventBus):
+        db = make_db(events=bus)
+        db.publish_writes = True
+        db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+        db.reviews_collection.count_documents = AsyncMock(return_value=1)
+        db.reviews_collection.find_one = AsyncMock(return_value={"user_id": "u1"})
+        return db
+
+    return build
+
+
+def test_review_writes_publish_events(events_db):
+    async def scenario():
+        bus = EventBus()
+        db = events_db(bus)
+        async with bus.subscribe("user", "u1") as queue:
+            await db.update_review("r1", Review(id="r1", user_id="u1", name="R"))
+            await db.patch_review("r1", ReviewPatch(name="N"))
+            await db.patch_review("r1", ReviewPatch())
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+    received = asyncio.run(scenario())
+
+    assert [(event.id, event.change, event.user_id) for event in received] == [("r1", "updated", "u1")] * 2
+
+
+def test_writes_without_subscribers_skip_owner_lookup(events_db):
+    db = events_db(EventBus())
+
+    asyncio.run(db.patch_review("r1", ReviewPatch(name="N")))
+
+    db.reviews_collection.find_one.assert_not_awaited()
+
+
+@patch("main.events", new_callable=EventBus)
+def test_change_events_stream(bus):
+    request = MagicMock()
+    request.is_disconnected = AsyncMock(side_effect=[False, True])
+
+    async def scenario():
+        stream = change_events(request, "review", "r1")
+        assert await anext(stream) == "retry: 3000\n\n"
+        bus.publish(_event(change="run_added", version=2))
+        frame = await anext(stream)
+        remaining = [frame async for frame in stream]
+        return frame, remaining
+
+    frame, remaining = asyncio.run(scenario())
+
+    event_line, data_line, _, _ = frame.split("\n")
+    assert event_line == "event: run_added"
+    assert json.loads(data_line.removeprefix("data: "))["version"] == 2
+    assert remaining == []
+    assert not bus.has_subscribers("review")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_events_endpoints_404_for_missing_documents(mock_db):
+    mock_db.get_review_version.return_value = None
+    mock_db.get_user.return_value = None
+
+    assert client.get("/reviews/missing/events").status_code == 404
+    assert client.get("/users/missing/events").status_code == 404
+
+
+def test_failed_change_stream_falls_back_to_local_publishing(make_db, caplog):
+    db = make_db()
+    db.publish_writes = False
+    db.db = MagicMock()
+    db.db.watch = AsyncMock(side_effect=OperationFailure("The $changeStream stage is only supported on replica sets"))
+
+    async def scenario():
+        watcher = asyncio.create_task(db.watch_changes())
+        watcher.add_done_callback(watcher_stopped)
+        await asyncio.wait([watcher])
+        await asyncio.sleep(0)
+
+    with patch("main.db", db), caplog.at_level(logging.ERROR, logger="main"):
+        asyncio.run(scenario())
+
+    assert db.publish_writes is True
+    assert "Change stream watcher stopped" in caplog.text
+    assert "replica sets" in caplog.text
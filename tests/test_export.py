@@ -0,0 +1,95 @@
+import asyncio
+import csv
+import io
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.export import csv_chunks, parquet_chunks
+from src.models import ReviewRun
+from src.offload import iter_rows
+
+client = TestClient(app)
+
+FIELDS = [{"name": "document_id"}, {"name": "score", "type": "number"}, {"name": "tags"}, {"name": "ok", "type": "boolean"}]
+ROWS = [
+    {"score": 0.5, "document_id": "d1", "tags": ["a", "b"], "ok": True, "ignored": 1},
+    {"document_id": "d2", "score": "n/a"},
+]
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def _collect(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def _collect_rows(rows):
+    return [row async for row in rows]
+
+
+def test_csv_follows_fields_order():
+    data = asyncio.run(_collect(csv_chunks(FIELDS, _iterate(ROWS))))
+
+    assert list(csv.reader(io.StringIO(data.decode()))) == [
+        ["document_id", "score", "tags", "ok"],
+        ["d1", "0.5", '["a", "b"]', "True"],
+        ["d2", "n/a", "", ""],
+    ]
+
+
+def test_csv_of_no_rows_is_the_header():
+    assert asyncio.run(_collect(csv_chunks(FIELDS, _iterate([])))) == b"document_id,score,tags,ok\r\n"
+
+
+def test_iter_rows_joins_lines_split_across_fragments():
+    fragments = [b'{"a": 1}\n{"a"', b': 2}\n', b'{"a": 3}']
+
+    rows = asyncio.run(_collect_rows(iter_rows(_iterate(fragments))))
+
+    assert rows == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_parquet_uses_field_types():
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    data = asyncio.run(_collect(parquet_chunks(FIELDS, _iterate(ROWS))))
+
+    table = pq.read_table(io.BytesIO(data))
+    assert table.column_names == ["document_id", "score", "tags", "ok"]
+    assert str(table.schema.field("score").type) == "double"
+    assert table.to_pylist() == [
+        {"document_id": "d1", "score": 0.5, "tags": '["a", "b"]', "ok": True},
+        {"document_id": "d2", "score": None, "tags": None, "ok": None},
+    ]
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_export_endpoint_streams_csv(mock_db):
+    run = ReviewRun(id="run1", review_id="r1", created_at="2025-01-02T00:00:00", status="success", fields=FIELDS)
+    mock_db.open_run_results = AsyncMock(return_value=(run, _iterate(ROWS)))
+
+    response = client.get("/reviews/r1/runs/run1/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="r1-run1.csv"'
+    assert response.text.splitlines()[0] == "document_id,score,tags,ok"
+
+    mock_db.open_run_results = AsyncMock(return_value=None)
+    assert client.get("/reviews/r1/runs/missing/export").status_code == 404
+
+
+@patch("main.parquet_available", return_value=False)
+@patch("main.db", new_callable=AsyncMock)
+def test_parquet_export_without_pyarrow(mock_db, _):
+    response = client.get("/reviews/r1/runs/run1/export", params={"format": "parquet"})
+
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
+    mock_db.open_run_results.assert_not_awaited()
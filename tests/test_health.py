@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+from pymongo.errors import ServerSelectionTimeoutError
+
+from main import app
+from src.metrics import CommandMetricsListener, MetricsRegistry, PoolStatsListener
+
+client = TestClient(app)
+
+
+def _stats(in_use=1, available=99, wait_queue=0):
+    return {
+        "pool": {"in_use": in_use, "idle": 1, "open": in_use + 1, "available": available, "wait_queue": wait_queue, "max_pool_size": 100},
+        "latency": {"samples": 3, "p50_ms": 1.0, "p99_ms": 4.0, "max_ms": 4.0},
+    }
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_health_pings_instead_of_querying(mock_db):
+    mock_db.ping.return_value = 1.234
+
+    response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json() == {"status": "healthy", "database": "connected", "latency_ms": 1.23}
+    mock_db.ping.assert_awaited_once()
+    mock_db.list_users.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_health_reports_unreachable_database(mock_db):
+    mock_db.ping.side_effect = ServerSelectionTimeoutError("timed out")
+
+    response = client.get("/health")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "unhealthy"
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_ready_reports_pool_and_latency(mock_db):
+    mock_db.ping.return_value = 2.0
+    mock_db.pool_stats = MagicMock(return_value=_stats())
+
+    response = client.get("/ready")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "ready"
+    assert body["pool"]["wait_queue"] == 0
+    assert body["latency"]["p99_ms"] == 4.0
+    assert body["ping_ms"] == 2.0
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_ready_sheds_traffic_near_pool_saturation(mock_db):
+    mock_db.ping.return_value = 2.0
+    mock_db.pool_stats = MagicMock(return_value=_stats(in_use=95, available=5, wait_queue=3))
+
+    response = client.get("/ready")
+
+    assert response.status_code == 503
+    assert response.json()["reason"] == "connection pool saturated"
+
+
+def _pool_event(address=("db", 27017)):
+    return SimpleNamespace(address=address)
+
+
+def test_pool_listener_tracks_checkouts_and_waiters():
+    listener = PoolStatsListener()
+    event = _pool_event()
+    listener.pool_created(event)
+    for _ in range(3):
+        listener.connection_created(event)
+    for _ in range(4):
+        listener.connection_check_out_started(event)
+    for _ in range(3):
+        listener.connection_checked_out(event)
+    listener.connection_checked_in(event)
+
+    stats = listener.stats(max_pool_size=10)
+
+    assert stats == {"in_use": 2, "idle": 1, "open": 3, "available": 8, "wait_queue": 1, "max_pool_size": 10}
+    listener.pool_closed(event)
+    assert listener.stats(max_pool_size=10)["open"] == 0
+
+
+def test_command_listener_summarizes_recent_latency():
+    listener = CommandMetricsListener(MetricsRegistry(), slow_query_ms=0)
+    assert listener.recent_latency()["samples"] == 0
+
+    for i in range(1, 101):
+        event = SimpleNamespace(
+            command_name="find", command={"find": "users"}, database_name="nexus",
+            connection_id=("db", 27017), request_id=i, duration_micros=i * 1000, reply={"ok": 1},
+        )
+        listener.started(event)
+        listener.succeeded(event)
+
+    assert listener.recent_latency() == {"samples": 100, "p50_ms": 51.0, "p99_ms": 100.0, "max_ms": 100.0}
@@ -0,0 +1,76 @@
+import asyncio
+import inspect
+import re
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.indexes import (
+    INDEXES,
+    QUERY_SHAPES,
+    SHARED_QUERY_SHAPES,
+    UNCHECKED_QUERY_METHODS,
+    find_plan_stages,
+    winning_plan,
+)
+from src.mongodb import MongoDB
+
+
+@pytest.fixture
+def explain_db(make_db):
+    def build(explain_result):
+        db = make_db()
+        db.db = MagicMock()
+        collection = db.db.__getitem__.return_value
+        collection.create_indexes = AsyncMock()
+        collection.find.return_value.explain = AsyncMock(return_value=explain_result)
+        return db, collection
+
+    return build
+
+
+def test_find_plan_stages_walks_nested_plans():
+    plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN", "indexName": "id_unique"}}
+    assert find_plan_stages(plan) == ["FETCH", "IXSCAN"]
+    assert winning_plan({"queryPlanner": {"winningPlan": {"queryPlan": plan}}}) == plan
+
+
+def test_ensure_indexes_creates_registry(explain_db):
+    db, collection = explain_db({})
+    asyncio.run(db.ensure_indexes())
+    assert collection.create_indexes.await_count == len(INDEXES)
+
+
+def test_check_query_plans_passes_on_index_scans(explain_db):
+    ixscan = {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}
+    db, _ = explain_db(ixscan)
+    plans = asyncio.run(db.check_query_plans())
+    assert set(plans) == set(QUERY_SHAPES)
+
+
+def test_check_query_plans_fails_on_collscan(explain_db):
+    db, _ = explain_db({"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}})
+    with pytest.raises(RuntimeError, match="Collection scans"):
+        asyncio.run(db.check_query_plans())
+
+
+# Calls that send a filter to MongoDB, directly or through a generic helper.
+QUERY_CALL = re.compile(
+    r"\.(find|find_one|find_one_and_update|find_one_and_delete|count_documents|aggregate|"
+    r"update_one|update_many|delete_one|delete_many)\("
+    r"|self\.(_paginate|_paginate_aggregate|_stream|_search|_query_results)\("
+)
+
+
+def test_every_query_method_has_a_plan_checked_shape():
+    checked = {key.split(":")[0] for key in QUERY_SHAPES}
+    query_methods = {
+        name
+        for name, method in inspect.getmembers(MongoDB, inspect.isfunction)
+        if QUERY_CALL.search(inspect.getsource(method))
+    }
+
+    unregistered = query_methods - checked - set(SHARED_QUERY_SHAPES) - UNCHECKED_QUERY_METHODS
+    assert not unregistered, f"Register the query shapes of {sorted(unregistered)} in src/indexes.py"
+    assert set(SHARED_QUERY_SHAPES.values()) <= set(QUERY_SHAPES)
+    assert not (set(SHARED_QUERY_SHAPES) | UNCHECKED_QUERY_METHODS) - query_methods
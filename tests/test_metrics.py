@@ -0,0 +1,86 @@
+import logging
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.metrics import REGISTRY, CommandMetricsListener, MetricsRegistry
+from src.models import Review
+
+client = TestClient(app)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.histogram("op_seconds", "Op latency", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, op="read")
+    histogram.observe(0.5, op="read")
+    histogram.observe(5, op="read")
+
+    text = registry.render()
+
+    assert "# TYPE op_seconds histogram" in text
+    assert 'op_seconds_bucket{op="read",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="read",le="1.0"} 2' in text
+    assert 'op_seconds_bucket{op="read",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="read"} 3' in text
+    assert 'op_seconds_sum{op="read"} 5.55' in text
+
+
+def test_registering_twice_shares_the_metric():
+    registry = MetricsRegistry()
+    first = registry.counter("things_total", "Things", ("kind",))
+    second = registry.counter("things_total", "Things", ("kind",))
+    first.inc(kind="a")
+    second.inc(kind="a")
+
+    assert first is second
+    assert first.value(kind="a") == 2
+
+
+def _event(name, request_id=1, duration_micros=0, **extra):
+    return SimpleNamespace(
+        command_name=name,
+        command={name: "reviews", "filter": {"id": "r1"}},
+        database_name="nexus",
+        connection_id=("localhost", 27017),
+        request_id=request_id,
+        duration_micros=duration_micros,
+        reply={"ok": 1, "cursor": {"firstBatch": []}},
+        **extra,
+    )
+
+
+def test_command_listener_records_timings_sizes_and_errors(caplog):
+    registry = MetricsRegistry()
+    listener = CommandMetricsListener(registry, slow_query_ms=50)
+
+    listener.started(_event("find", request_id=1))
+    listener.succeeded(_event("find", request_id=1, duration_micros=2_000))
+    listener.started(_event("find", request_id=2))
+    with caplog.at_level(logging.WARNING, logger="src.metrics"):
+        listener.failed(_event("find", request_id=2, duration_micros=80_000, failure={"code": 50}))
+
+    assert listener.durations.count(command="find", collection="reviews") == 2
+    assert listener.request_bytes.value(command="find", collection="reviews") > 0
+    assert listener.reply_bytes.value(command="find", collection="reviews") > 0
+    assert listener.errors.value(command="find", collection="reviews", code=50) == 1
+    assert "slow mongodb command command=find collection=reviews duration_ms=80.0" in caplog.text
+    assert listener._pending == {}
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_metrics_endpoint_reports_route_templates(mock_db):
+    mock_db.get_review.return_value = Review(id="review_1", user_id="user_1", name="Review 1")
+
+    assert client.get("/reviews/review_1").status_code == 200
+    assert client.get("/reviews/review_2").status_code == 200
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    histogram = REGISTRY.render()
+    assert 'http_request_duration_seconds_count{method="GET",route="/reviews/{review_id}",status="200"}' in histogram
+    assert "/reviews/review_1" not in histogram
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
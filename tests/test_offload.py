@@ -0,0 +1,90 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from bson import ObjectId
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import ReviewRun
+from src.offload import GZIP, decode_payload, encode_payload, iter_payload
+
+client = TestClient(app)
+
+ROWS = [{"document_id": f"d{i}", "score": i / 10, "label": "x" * 20} for i in range(50)]
+RUN = ReviewRun(id="run1", review_id="r1", created_at="2025-01-02T00:00:00", status="success", results=ROWS)
+
+
+async def _chunks(payload: bytes, size: int):
+    for offset in range(0, len(payload), size):
+        yield payload[offset:offset + size]
+
+
+async def _collect(lines) -> bytes:
+    return b"".join([line async for line in lines])
+
+
+def test_payload_round_trip_with_and_without_gzip():
+    for compression in (GZIP, None):
+        payload, size = encode_payload(ROWS, compression)
+
+        assert decode_payload(payload, compression) == ROWS
+        streamed = asyncio.run(_collect(iter_payload(_chunks(payload, 7), compression)))
+        assert decode_payload(streamed, None) == ROWS
+        assert size == len(streamed)
+    assert len(encode_payload(ROWS, GZIP)[0]) < len(encode_payload(ROWS, None)[0])
+
+
+@pytest.fixture
+def storage_db(make_db):
+    def build(threshold: int):
+        db = make_db()
+        db.offload_threshold = threshold
+        db.offload_compression = GZIP
+        db.results_bucket.upload_from_stream = AsyncMock(return_value=ObjectId())
+        db.results_bucket.delete = AsyncMock()
+        db.reviews_collection.find_one_and_update = AsyncMock(return_value={"run_sequence": 1})
+        db.review_runs_collection.insert_one = AsyncMock()
+        return db
+
+    return build
+
+
+def test_large_run_results_are_offloaded_to_gridfs(storage_db):
+    db = storage_db(threshold=1024)
+
+    asyncio.run(db.add_review_run(RUN))
+
+    stored = db.review_runs_collection.insert_one.call_args.args[0]
+    assert stored["results"] == []
+    assert stored["results_file"]["rows"] == len(ROWS)
+    assert stored["results_file"]["compression"] == GZIP
+    payload = db.results_bucket.upload_from_stream.call_args.args[1]
+    assert decode_payload(payload, GZIP) == ROWS
+
+
+def test_small_run_results_stay_inline(storage_db):
+    db = storage_db(threshold=1024 * 1024)
+
+    asyncio.run(db.add_review_run(RUN))
+
+    stored = db.review_runs_collection.insert_one.call_args.args[0]
+    assert stored["results"] == ROWS
+    assert stored.get("results_file") is None
+    db.results_bucket.upload_from_stream.assert_not_called()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_stream_run_results_endpoint(mock_db):
+    payload, _ = encode_payload(ROWS, None)
+    mock_db.stream_run_results = AsyncMock(return_value=_chunks(payload, 64))
+
+    response = client.get("/reviews/r1/runs/run1/results")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert decode_payload(response.content, None) == ROWS
+    mock_db.stream_run_results.assert_awaited_once_with("r1", "run1")
+
+    mock_db.stream_run_results = AsyncMock(return_value=None)
+    assert client.get("/reviews/r1/runs/missing/results").status_code == 404
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from src.models import User
+from src.pagination import decode_cursor, encode_cursor, keyset_filter
+
+
+def user_doc(i):
+    return {"id": f"user_{i:03d}", "name": "U", "email": f"{i}@example.com", "password": "pw"}
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor("user_042")) == ["user_042"]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor!")
+
+
+def test_paginate_uses_keyset_range(make_db, fake_cursor):
+    db = make_db()
+    cursor = fake_cursor([user_doc(i) for i in range(3, 10)])
+    db.users_collection.find.return_value = cursor
+
+    page = asyncio.run(db.list_users(limit=5, after=encode_cursor("user_002")))
+
+    db.users_collection.find.assert_called_once_with({"id": {"$gt": "user_002"}}, {"_id": 0})
+    assert cursor.sort_spec == [("id", 1)]
+    assert cursor.limit_value == 6
+    assert [u.id for u in page.items] == [f"user_{i:03d}" for i in range(3, 8)]
+    assert all(isinstance(u, User) for u in page.items)
+    assert decode_cursor(page.next_cursor) == ["user_007"]
+
+
+def test_paginate_last_page_has_no_cursor(make_db, fake_cursor):
+    db = make_db()
+    db.reviews_collection.find.return_value = fake_cursor([])
+
+    page = asyncio.run(db.list_reviews("user_1", limit=5))
+
+    db.reviews_collection.find.assert_called_once_with({"user_id": "user_1"}, {"_id": 0})
+    assert page.items == []
+    assert page.next_cursor is None
+
+
+def test_keyset_filter_for_compound_keys():
+    assert keyset_filter(["created_at", "id"], ["2025", "run_1"]) == {
+        "$or": [
+            {"created_at": {"$gt": "2025"}},
+            {"created_at": "2025", "id": {"$gt": "run_1"}},
+        ]
+    }
+    with pytest.raises(ValueError):
+        keyset_filter(["created_at", "id"], ["2025"])
@@ -0,0 +1,85 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from pymongo.errors import DuplicateKeyError
+
+from main import app
+from src.models import CollectionPatch, ReviewPatch, UserPatch
+from src.mongodb import build_update
+
+client = TestClient(app)
+
+
+def test_build_update_only_touches_sent_fields():
+    patch_body = ReviewPatch(prompt="new prompt", append_results=[{"a": 1}], add_collection_ids=["c1"])
+
+    assert build_update(patch_body) == {
+        "$set": {"prompt": "new prompt"},
+        "$push": {"results": {"$each": [{"a": 1}]}},
+        "$addToSet": {"collection_ids": {"$each": ["c1"]}},
+    }
+
+
+def test_build_update_pulls_ids_and_allows_clearing_fields():
+    patch_body = CollectionPatch(remove_document_ids=["d1", "d2"])
+    assert build_update(patch_body) == {"$pull": {"document_ids": {"$in": ["d1", "d2"]}}}
+    assert build_update(ReviewPatch(prompt=None)) == {"$set": {"prompt": None}}
+
+
+def test_patch_rejects_add_and_remove_of_same_list():
+    with pytest.raises(ValidationError):
+        CollectionPatch(add_document_ids=["d1"], remove_document_ids=["d2"])
+
+
+@pytest.mark.parametrize("model, body", [
+    (UserPatch, {"name": None}),
+    (UserPatch, {"email": None}),
+    (UserPatch, {"password": None}),
+    (CollectionPatch, {"collection_name": None}),
+    (ReviewPatch, {"name": None}),
+    (ReviewPatch, {"fields": None}),
+])
+def test_patch_rejects_null_for_required_fields(model, body):
+    with pytest.raises(ValidationError, match="cannot be null"):
+        model.model_validate(body)
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_patch_endpoint_rejects_null_name(mock_db):
+    assert client.patch("/reviews/review_1", json={"name": None}).status_code == 422
+    mock_db.patch_review.assert_not_awaited()
+    assert client.patch("/reviews/review_1", json={"prompt": None, "updated_at": None}).status_code == 200
+
+
+def test_empty_patch_only_checks_existence(make_db):
+    db = make_db()
+    db.reviews_collection.count_documents = AsyncMock(return_value=1)
+    db.reviews_collection.update_one = AsyncMock()
+
+    assert asyncio.run(db.patch_review("review_1", ReviewPatch())) is True
+    db.reviews_collection.update_one.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_patch_review_endpoint(mock_db):
+    mock_db.patch_review.return_value = True
+
+    response = client.patch("/reviews/review_1", json={"prompt": "only this"})
+
+    assert response.status_code == 200
+    args, _ = mock_db.patch_review.call_args
+    assert args[0] == "review_1"
+    assert args[1].model_fields_set == {"prompt"}
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_patch_user_to_taken_email_is_409(mock_db):
+    mock_db.patch_user.side_effect = DuplicateKeyError("E11000 duplicate key error index: email_unique")
+
+    response = client.patch("/users/user_1", json={"email": "taken@example.com"})
+
+    assert response.status_code == 409
+    assert mock_db.patch_user.call_args.args[1].email == "taken@example.com"
@@ -0,0 +1,65 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import MAX_REFERENCE_LOOKUP, DocumentReferences
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def references_db(make_db, fake_cursor):
+    def build(collections, buckets, reviews):
+        db = make_db()
+        db.collections_collection.find = MagicMock(return_value=fake_cursor(collections))
+        db.document_buckets_collection.find = MagicMock(return_value=fake_cursor(buckets))
+        db.reviews_collection.find = MagicMock(return_value=fake_cursor(reviews))
+        return db
+
+    return build
+
+
+def test_references_join_inline_bucketed_and_reviews(references_db):
+    db = references_db(
+        collections=[{"id": "c1", "hits": ["d1", "d2"]}, {"id": "c2", "hits": ["d2"]}],
+        buckets=[{"collection_id": "c3", "hits": ["d1"]}],
+        reviews=[{"id": "r1", "collection_ids": ["c1", "c9"]}, {"id": "r2", "collection_ids": ["c3"]}],
+    )
+
+    references = asyncio.run(db.find_document_references(["d2", "d1", "d2", "d3"]))
+
+    assert references == [
+        DocumentReferences(document_id="d2", collection_ids=["c1", "c2"], review_ids=["r1"]),
+        DocumentReferences(document_id="d1", collection_ids=["c1", "c3"], review_ids=["r1", "r2"]),
+        DocumentReferences(document_id="d3"),
+    ]
+    query, projection = db.collections_collection.find.call_args.args
+    assert query == {"document_ids": {"$in": ["d2", "d1", "d3"]}}
+    assert "document_ids" not in projection
+    assert db.document_buckets_collection.find.call_args.args[0]["count"] == {"$gt": 0}
+    assert db.reviews_collection.find.call_args.args[0] == {"collection_ids": {"$in": ["c1", "c2", "c3"]}}
+
+
+def test_references_skip_review_query_without_collections(references_db):
+    db = references_db(collections=[], buckets=[], reviews=[])
+
+    assert asyncio.run(db.find_document_references(["d1"])) == [DocumentReferences(document_id="d1")]
+    db.reviews_collection.find.assert_not_called()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_reference_endpoints(mock_db):
+    mock_db.find_document_references.return_value = [DocumentReferences(document_id="d1", collection_ids=["c1"])]
+
+    assert client.get("/documents/d1/references").json()["collection_ids"] == ["c1"]
+    mock_db.find_document_references.assert_awaited_with(["d1"])
+
+    response = client.post("/documents/references", json={"document_ids": ["d1"]})
+    assert response.status_code == 200
+    assert response.json()[0]["document_id"] == "d1"
+
+    too_many = {"document_ids": [f"d{i}" for i in range(MAX_REFERENCE_LOOKUP + 1)]}
+    assert client.post("/documents/references", json=too_many).status_code == 422
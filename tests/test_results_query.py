@@ -0,0 +1,225 @@
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.columnar import to_columnar
+from src.models import ResultsPage, ResultsQuery, ReviewRun
+from src.results_query import build_match, page_from_facet, query_rows, results_pipeline, validate_query
+
+client = TestClient(app)
+
+FIELDS = [{"name": "document_id"}, {"name": "score"}, {"name": "label"}]
+ROWS = [
+    {"document_id": "d1", "score": 0.9, "label": "Relevant"},
+    {"document_id": "d2", "score": "n/a", "label": "unclear"},
+    {"document_id": "d3", "score": 0.2},
+    {"document_id": "d4", "score": 0.9, "label": "relevant"},
+    {"document_id": "d5", "score": None, "label": ["relevant", "maybe"]},
+]
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+def _query(**fields) -> ResultsQuery:
+    return ResultsQuery.model_validate(fields)
+
+
+def _run(query: ResultsQuery, rows=ROWS) -> ResultsPage:
+    return asyncio.run(query_rows(_iterate(rows), query))
+
+
+def _ids(page: ResultsPage) -> list:
+    return [row["document_id"] for row in page.items]
+
+
+def test_pipeline_pages_inside_the_database():
+    query = _query(
+        filters=[{"column": "label", "op": "contains", "value": "rel.vant"}],
+        sort=[{"column": "score", "direction": "desc"}],
+        columns=["document_id"],
+        offset=10,
+        limit=5,
+    )
+
+    pipeline = results_pipeline({"id": "r1"}, query)
+
+    assert pipeline[:3] == [
+        {"$match": {"id": "r1"}},
+        {"$project": {"_id": 0, "results": 1}},
+        {"$unwind": {"path": "$results", "includeArrayIndex": "row"}},
+    ]
+    assert pipeline[3] == {"$match": {"$and": [{"results.label": {"$regex": r"rel\.vant", "$options": "i"}}]}}
+    assert pipeline[4]["$facet"] == {
+        "total": [{"$count": "count"}],
+        "items": [
+            {"$sort": {"results.score": -1, "row": 1}},
+            {"$skip": 10},
+            {"$limit": 5},
+            {"$replaceWith": "$results"},
+            {"$project": {"_id": 0, "document_id": 1}},
+        ],
+    }
+
+
+def test_build_match_operators():
+    query = _query(filters=[
+        {"column": "score", "op": "in", "value": [1, 2]},
+        {"column": "label", "op": "exists", "value": False},
+    ])
+
+    assert build_match(query.filters) == {"$and": [{"score": {"$in": [1, 2]}}, {"label": {"$exists": False}}]}
+    assert build_match([]) == {}
+
+
+def test_query_rows_filters_like_mongodb():
+    assert _ids(_run(_query(filters=[{"column": "score", "op": "gte", "value": 0.5}]))) == ["d1", "d4"]
+    # Range operators skip values of another type; eq None also matches missing columns.
+    assert _ids(_run(_query(filters=[{"column": "score", "op": "lt", "value": 1}]))) == ["d1", "d3", "d4"]
+    assert _ids(_run(_query(filters=[{"column": "label", "op": "eq", "value": None}]))) == ["d3"]
+    assert _ids(_run(_query(filters=[{"column": "label", "op": "eq", "value": "maybe"}]))) == ["d5"]
+    assert _ids(_run(_query(filters=[{"column": "label", "op": "contains", "value": "RELEVANT"}]))) == ["d1", "d4", "d5"]
+    assert _ids(_run(_query(filters=[{"column": "label", "op": "exists", "value": False}]))) == ["d3"]
+    assert _ids(_run(_query(filters=[{"column": "document_id", "op": "nin", "value": ["d1", "d2", "d3"]}]))) == ["d4", "d5"]
+
+
+def test_query_rows_sorts_in_mongodb_order_and_keeps_ties_stable():
+    page = _run(_query(sort=[{"column": "score", "direction": "asc"}, {"column": "label", "direction": "desc"}]))
+    # null < numbers < strings; equal scores fall back to label, descending.
+    assert _ids(page) == ["d5", "d3", "d4", "d1", "d2"]
+
+    page = _run(_query(sort=[{"column": "score", "direction": "desc"}]))
+    assert _ids(page) == ["d2", "d1", "d4", "d3", "d5"]
+
+
+# Values of every kind, with arrays and objects that MongoDB orders by BSON comparison.
+MIXED_ROWS = [
+    {"document_id": "a", "v": [3, 1]},
+    {"document_id": "b", "v": [2]},
+    {"document_id": "c", "v": []},
+    {"document_id": "d", "v": None},
+    {"document_id": "e", "v": 1.5},
+    {"document_id": "f", "v": {"x": 1}},
+    {"document_id": "g", "v": {"x": 1, "y": 0}},
+    {"document_id": "h", "v": {"w": 5}},
+    {"document_id": "i", "v": [[0]]},
+    {"document_id": "j", "v": True},
+]
+MIXED_SORTS = [[{"column": "v", "direction": "asc"}], [{"column": "v", "direction": "desc"}]]
+
+
+def test_query_rows_sorts_arrays_and_objects_in_bson_order():
+    # Ascending, an array sorts by its smallest element and an empty one below null;
+    # objects compare field by field, so {"w": 5} < {"x": 1} < {"x": 1, "y": 0}.
+    ascending = _run(_query(sort=MIXED_SORTS[0]), MIXED_ROWS)
+    assert _ids(ascending) == ["c", "d", "a", "e", "b", "h", "f", "g", "i", "j"]
+
+    # Descending, an array sorts by its largest element: [[0]] by the array [0].
+    descending = _run(_query(sort=MIXED_SORTS[1]), MIXED_ROWS)
+    assert _ids(descending) == ["j", "i", "g", "f", "h", "a", "b", "e", "d", "c"]
+
+    # A whole array compares element by element: [3, 1] > [2], and [[0]] > [2] as an array outranks a number.
+    compared = _run(_query(filters=[{"column": "v", "op": "gt", "value": [2]}]), MIXED_ROWS)
+    assert _ids(compared) == ["a", "i"]
+
+
+def test_pipeline_and_python_paths_sort_alike(mongodb_uri):
+    from pymongo import AsyncMongoClient
+
+    async def both_paths(query: ResultsQuery):
+        client = AsyncMongoClient(mongodb_uri)
+        collection = client[f"test_results_{uuid.uuid4().hex[:8]}"]["reviews"]
+        try:
+            await collection.insert_one({"id": "r1", "results": MIXED_ROWS})
+            docs = [doc async for doc in await collection.aggregate(results_pipeline({"id": "r1"}, query))]
+            return page_from_facet(docs[0] if docs else None, query), await query_rows(_iterate(MIXED_ROWS), query)
+        finally:
+            await client.drop_database(collection.database.name)
+            await client.close()
+
+    for sort in MIXED_SORTS:
+        in_database, in_python = asyncio.run(both_paths(_query(sort=sort)))
+        assert _ids(in_database) == _ids(in_python)
+
+
+def test_query_rows_pages_and_projects():
+    rows = [{"document_id": f"d{i}", "score": i % 7} for i in range(50)]
+    query = _query(sort=[{"column": "score", "direction": "desc"}], columns=["score"], offset=3, limit=4)
+
+    page = _run(query, rows)
+
+    assert page.total == 50
+    assert page.items == [{"score": 6}] * 4
+    unsorted = _run(_query(offset=48, limit=10), rows)
+    assert _ids(unsorted) == ["d48", "d49"]
+
+
+def test_validate_query_rejects_unknown_columns():
+    validate_query(_query(sort=[{"column": "score"}]), FIELDS)
+    with pytest.raises(ValueError, match="unknown column"):
+        validate_query(_query(columns=["secret"]), FIELDS)
+    with pytest.raises(ValueError, match="invalid column"):
+        validate_query(_query(filters=[{"column": "$where", "value": 1}]), [])
+    with pytest.raises(ValueError, match="list"):
+        validate_query(_query(filters=[{"column": "score", "op": "in", "value": 1}]), FIELDS)
+
+
+def test_review_rows_are_queried_by_aggregation(make_db, fake_cursor):
+    db = make_db()
+    db.reviews_collection.find_one = AsyncMock(return_value={"fields": FIELDS, "columnar": False})
+    facet = {"total": [{"count": 2}], "items": ROWS[:1]}
+    db.reviews_collection.aggregate = AsyncMock(return_value=fake_cursor([facet]))
+    query = _query(limit=1)
+
+    page = asyncio.run(db.query_review_results("r1", query))
+
+    assert page == ResultsPage(items=ROWS[:1], total=2, offset=0, limit=1)
+    pipeline = db.reviews_collection.aggregate.call_args.args[0]
+    assert pipeline == results_pipeline({"id": "r1"}, query)
+    assert db.reviews_collection.aggregate.call_args.kwargs == {"allowDiskUse": True}
+
+
+def test_columnar_review_is_queried_in_python(make_db):
+    db = make_db()
+    stored = {"id": "r1", "user_id": "u1", "name": "R", "fields": FIELDS, "results_columnar": to_columnar(ROWS)}
+    db.reviews_collection.find_one = AsyncMock(side_effect=[{"fields": FIELDS, "columnar": True}, stored])
+    db.reviews_collection.aggregate = AsyncMock()
+
+    page = asyncio.run(db.query_review_results("r1", _query(filters=[{"column": "score", "op": "eq", "value": 0.9}])))
+
+    assert _ids(page) == ["d1", "d4"]
+    db.reviews_collection.aggregate.assert_not_awaited()
+
+
+def test_offloaded_run_is_streamed(make_db):
+    db = make_db()
+    db.review_runs_collection.find_one = AsyncMock(return_value={"fields": FIELDS, "results_file": {"file_id": "x"}})
+    run = ReviewRun(id="run1", review_id="r1", created_at="2025-01-02T00:00:00", status="success", fields=FIELDS)
+    db.open_run_results = AsyncMock(return_value=(run, _iterate(ROWS)))
+
+    page = asyncio.run(db.query_run_results("r1", "run1", _query(offset=4)))
+
+    assert page.total == 5 and _ids(page) == ["d5"]
+    db.open_run_results.assert_awaited_with("r1", "run1")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_query_endpoints(mock_db):
+    mock_db.query_review_results.return_value = ResultsPage(items=ROWS[:1], total=1)
+
+    response = client.post("/reviews/r1/results/query", json={"sort": [{"column": "score"}]})
+    assert response.status_code == 200
+    assert response.json()["items"] == ROWS[:1]
+
+    mock_db.query_run_results.side_effect = ValueError("unknown column 'secret'")
+    assert client.post("/reviews/r1/runs/run1/results/query", json={"columns": ["secret"]}).status_code == 400
+
+    mock_db.query_review_results.return_value = None
+    assert client.post("/reviews/missing/results/query", json={}).status_code == 404
+    assert client.post("/reviews/r1/results/query", json={"limit": 0}).status_code == 422
@@ -0,0 +1,111 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import Review, ReviewRun
+from src.mongodb import run_from_legacy
+
+client = TestClient(app)
+
+
+def make_review(**overrides):
+    data = {"id": "review_1", "user_id": "user_1", "name": "Review", "updated_at": "2025-01-01T00:00:00"}
+    data.update(overrides)
+    return Review(**data)
+
+
+def test_run_from_legacy_fills_missing_fields():
+    review = make_review()
+    run = run_from_legacy(review, {"results": [{"a": 1}], "prompt": "p"}, 2)
+
+    assert run.id == "review_1-run-2"
+    assert run.review_id == "review_1"
+    assert run.created_at == "2025-01-01T00:00:00"
+    assert run.status == "success"
+    assert run.results == [{"a": 1}]
+
+
+def test_update_review_does_not_write_runs(make_db):
+    db = make_db()
+    db.reviews_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+
+    asyncio.run(db.update_review("review_1", make_review(runs=[{"id": "r"}])))
+
+    update = db.reviews_collection.update_one.call_args.args[1]
+    assert "runs" not in update["$set"]
+
+
+def test_migrate_embedded_runs_moves_runs_and_unsets_array(make_db, fake_cursor):
+    db = make_db()
+    review_doc = make_review(runs=[{"id": "a", "status": "failed"}, {"results": []}]).model_dump()
+    db.reviews_collection.find.return_value = fake_cursor([review_doc])
+    db.reviews_collection.update_one = AsyncMock()
+    db.review_runs_collection.insert_many = AsyncMock(return_value=MagicMock(inserted_ids=[1, 2]))
+
+    counts = asyncio.run(db.migrate_embedded_runs())
+
+    assert counts == {"reviews": 1, "runs": 2}
+    written = db.review_runs_collection.insert_many.call_args.args[0]
+    assert [run["id"] for run in written] == ["a", "review_1-run-1"]
+    assert written[0]["status"] == "failed"
+    db.reviews_collection.update_one.assert_awaited_once_with({"id": "review_1"}, {"$unset": {"runs": ""}, "$inc": {"version": 1}})
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_add_review_run_to_missing_review(mock_db):
+    mock_db.add_review_run.return_value = None
+    run = {"id": "run_1", "review_id": "review_1", "created_at": "2025-01-02T00:00:00", "status": "success"}
+
+    response = client.post("/reviews/review_1/runs", json=run)
+
+    assert response.status_code == 404
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_add_review_run_rejects_mismatched_review(mock_db):
+    run = {"id": "run_1", "review_id": "other", "created_at": "2025-01-02T00:00:00", "status": "success"}
+
+    response = client.post("/reviews/review_1/runs", json=run)
+
+    assert response.status_code == 400
+    mock_db.add_review_run.assert_not_awaited()
+
+
+def replace_stored(stored: dict, operation) -> dict:
+    """Evaluate a _versioned_replace pipeline against a stored document."""
+    literal, kept = operation._doc[0]["$replaceWith"]["$mergeObjects"]
+    replaced = dict(literal["$literal"])
+    for field, expression in kept.items():
+        if isinstance(expression, str):
+            if expression[1:] in stored:
+                replaced[field] = stored[expression[1:]]
+        else:
+            replaced[field] = stored.get(field, 0) + 1
+    return replaced
+
+
+def test_bulk_upsert_keeps_run_sequence_for_the_next_run(make_db):
+    stored = {"_id": 1, "id": "review_1", "user_id": "user_1", "name": "Review", "run_sequence": 5, "version": 6}
+    db = make_db()
+
+    async def bulk_write(operations, ordered):
+        stored.update(replace_stored(stored, operations[0]))
+
+    async def find_one_and_update(query, update, projection, return_document):
+        for field, step in update["$inc"].items():
+            stored[field] = stored.get(field, 0) + step
+        return dict(stored)
+
+    db.reviews_collection.bulk_write = bulk_write
+    db.reviews_collection.find_one_and_update = find_one_and_update
+    db.review_runs_collection.find_one = AsyncMock(return_value=None)
+    db.review_runs_collection.insert_one = AsyncMock()
+
+    asyncio.run(db.bulk_create_reviews([make_review(name="Renamed")], upsert=True))
+    assert stored["run_sequence"] == 5 and stored["name"] == "Renamed"
+
+    run = ReviewRun(id="run_new", review_id="review_1", created_at="2025-01-02T00:00:00", status="success")
+    assert asyncio.run(db.add_review_run(run)) == "run_new"
+    assert db.review_runs_collection.insert_one.call_args.args[0]["sequence"] == 5
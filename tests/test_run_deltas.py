@@ -0,0 +1,182 @@
+import asyncio
+import random
+from unittest.mock import AsyncMock, patch
+
+import bson
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import ReviewRun
+from src.mongodb import RUN_CHECKPOINT_INTERVAL
+from src.run_deltas import DELTA, FULL, apply_delta, compose_deltas, decode_runs, diff_rows, encode_run
+
+client = TestClient(app)
+
+
+def rows(n, **overrides):
+    data = [{"document_id": f"doc_{i}", "title": f"Title {i}", "score": i} for i in range(n)]
+    for index, row in overrides.items():
+        data[int(index[1:])] = row
+    return data
+
+
+def make_run(run_id, results, fields=None):
+    return ReviewRun(
+        id=run_id,
+        review_id="review_1",
+        created_at=f"2025-01-01T00:00:{run_id[-2:]}",
+        fields=fields or [{"name": "score"}],
+        results=results,
+        status="success",
+    ).model_dump()
+
+
+def mutate(data, rng):
+    data = [dict(row) for row in data]
+    for _ in range(rng.randint(0, 3)):
+        choice = rng.random()
+        if choice < 0.5 and data:
+            data[rng.randrange(len(data))]["score"] = rng.random()
+        elif choice < 0.7 and data:
+            data[rng.randrange(len(data))].pop("title", None)
+        elif choice < 0.85:
+            data.append({"document_id": f"new_{rng.random()}"})
+        elif data:
+            data.pop()
+    return data
+
+
+def test_diff_only_records_changed_cells():
+    old = rows(5)
+    new = rows(5, r2={"document_id": "doc_2", "title": "Title 2", "score": 99})
+
+    delta = diff_rows(old, new)
+
+    assert delta == {"length": 5, "rows": [{"i": 2, "set": {"score": 99}}]}
+    assert apply_delta(old, delta) == new
+
+
+def test_diff_handles_added_removed_rows_and_keys():
+    old = rows(4)
+    new = rows(3) + [{"document_id": "doc_3"}, {"document_id": "doc_9"}]
+    new[0] = {"document_id": "doc_0", "title": "Title 0", "score": 0, "flag": True}
+
+    delta = diff_rows(old, new)
+
+    assert apply_delta(old, delta) == new
+    assert apply_delta(new, diff_rows(new, old)) == old
+
+
+def test_random_chains_round_trip_and_compose():
+    rng = random.Random(7)
+    for _ in range(50):
+        versions = [rows(rng.randint(0, 6))]
+        for _ in range(5):
+            versions.append(mutate(versions[-1], rng))
+        deltas = [diff_rows(a, b) for a, b in zip(versions, versions[1:])]
+
+        for start in range(len(deltas)):
+            composed = deltas[start]
+            for delta in deltas[start + 1:]:
+                composed = compose_deltas(composed, delta)
+            assert apply_delta(versions[start], composed) == versions[-1]
+
+
+def test_encode_run_stores_deltas_between_checkpoints():
+    base = encode_run(make_run("run_00", rows(200)), None, 0, RUN_CHECKPOINT_INTERVAL)
+    changed = rows(200, r5={"document_id": "doc_5", "title": "Title 5", "score": -1})
+
+    stored = encode_run(make_run("run_01", changed), base, 1, RUN_CHECKPOINT_INTERVAL)
+
+    assert base["encoding"] == FULL
+    assert stored["encoding"] == DELTA
+    assert stored["base_id"] == "run_00"
+    assert stored["checkpoint_sequence"] == 0
+    assert "results" not in stored and "fields" not in stored
+    assert len(bson.encode(stored)) * 20 < len(bson.encode(base))
+
+    decoded = decode_runs([base, stored])
+    assert decoded[1]["results"] == changed
+    assert decoded[1]["fields"] == [{"name": "score"}]
+
+
+def test_encode_run_falls_back_to_full():
+    base = encode_run(make_run("run_00", rows(4)), None, 0, RUN_CHECKPOINT_INTERVAL)
+
+    rewritten = encode_run(make_run("run_01", [{"x": i} for i in range(4)]), base, 1, RUN_CHECKPOINT_INTERVAL)
+    checkpoint = encode_run(make_run("run_10", rows(4)), base, RUN_CHECKPOINT_INTERVAL, RUN_CHECKPOINT_INTERVAL)
+
+    assert rewritten["encoding"] == FULL
+    assert checkpoint["encoding"] == FULL
+
+
+def stored_chain(count):
+    docs, base, versions = [], None, []
+    current = rows(10)
+    for sequence in range(count):
+        current = [dict(row) for row in current]
+        current[sequence % 10]["score"] = sequence * 100
+        versions.append(current)
+        run = make_run(f"run_{sequence:02d}", current)
+        doc = encode_run(run, base, sequence, RUN_CHECKPOINT_INTERVAL)
+        docs.append(doc)
+        base = dict(doc, fields=run["fields"], results=run["results"])
+    return docs, versions
+
+
+def test_get_review_run_replays_from_checkpoint(make_db, fake_cursor):
+    docs, versions = stored_chain(4)
+    db = make_db()
+    db.review_runs_collection.find_one = AsyncMock(return_value=dict(docs[3]))
+    db.review_runs_collection.find.return_value = fake_cursor(docs[:3])
+
+    run = asyncio.run(db.get_review_run("review_1", "run_03"))
+
+    assert run.results == versions[3]
+    query = db.review_runs_collection.find.call_args.args[0]
+    assert query == {"review_id": "review_1", "sequence": {"$gte": 0, "$lte": 3, "$nin": [3]}}
+
+
+def test_add_review_run_stores_delta_against_previous_run(make_db, fake_cursor):
+    docs, versions = stored_chain(2)
+    db = make_db()
+    db.reviews_collection.find_one_and_update = AsyncMock(return_value={"run_sequence": 3})
+    db.review_runs_collection.find_one = AsyncMock(return_value=dict(docs[1]))
+    db.review_runs_collection.find.return_value = fake_cursor(docs[:1])
+    db.review_runs_collection.insert_one = AsyncMock()
+    changed = [dict(row) for row in versions[1]]
+    changed[0]["score"] = "changed"
+    run = ReviewRun(**make_run("run_02", changed))
+
+    assert asyncio.run(db.add_review_run(run)) == "run_02"
+
+    stored = db.review_runs_collection.insert_one.call_args.args[0]
+    assert stored["sequence"] == 2
+    assert stored["encoding"] == DELTA
+    assert stored["results_delta"] == {"length": 10, "rows": [{"i": 0, "set": {"score": "changed"}}]}
+    db.review_runs_collection.find_one.assert_awaited_once_with({"review_id": "review_1", "sequence": 1}, {"_id": 0})
+
+
+def test_diff_review_runs_composes_stored_deltas(make_db, fake_cursor):
+    docs, versions = stored_chain(4)
+    heads = [{key: docs[i][key] for key in ("id", "sequence", "encoding", "checkpoint_sequence") if key in docs[i]} for i in (1, 3)]
+    db = make_db()
+    db.review_runs_collection.find.side_effect = [fake_cursor(heads), fake_cursor(docs[2:4])]
+
+    diff = asyncio.run(db.diff_review_runs("review_1", "run_01", "run_03"))
+
+    assert apply_delta(versions[1], diff.results.model_dump()) == versions[3]
+    assert diff.fields.rows == []
+    delta_query = db.review_runs_collection.find.call_args.args
+    assert delta_query[0] == {"review_id": "review_1", "sequence": {"$gt": 1, "$lte": 3}}
+    assert "results" not in delta_query[1]
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_diff_endpoint_missing_run(mock_db):
+    mock_db.diff_review_runs.return_value = None
+
+    response = client.get("/reviews/review_1/runs/diff", params={"from_run": "a", "to_run": "b"})
+
+    assert response.status_code == 404
+    mock_db.diff_review_runs.assert_awaited_once_with("review_1", "a", "b")
@@ -0,0 +1,104 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import CollectionPatch, Page, Review, ReviewSummary
+from src.mongodb import COLLECTION_SUMMARY_STAGES, REVIEW_SUMMARY_STAGES
+from src.pagination import decode_cursor, encode_cursor
+from src.search import name_key_update, normalize_name, search_pipeline
+
+client = TestClient(app)
+
+
+def test_normalize_name():
+    assert normalize_name("  Quarterly   REVIEW\tﬁnal ") == "quarterly review final"
+    assert normalize_name("Straße") == "strasse"
+    assert normalize_name(None) == ""
+
+
+def test_name_key_update_follows_name_changes():
+    assert name_key_update("review", {"$set": {"name": "New Name"}})["$set"]["name_key"] == "new name"
+    assert name_key_update("review", {"$set": {"prompt": "p"}}) == {"$set": {"prompt": "p"}}
+    assert name_key_update("user", {"$set": {"name": "N"}}) == {"$set": {"name": "N"}}
+
+
+def test_prefix_pipeline_is_one_index_range():
+    pipeline = search_pipeline("u1", "Quart", "prefix", COLLECTION_SUMMARY_STAGES, 10, None)
+
+    assert pipeline[0] == {"$match": {"user_id": "u1", "name_key": {"$gte": "quart", "$lt": "quart\U0010ffff"}}}
+    assert pipeline[1:3] == [{"$sort": {"name_key": 1, "id": 1}}, {"$limit": 11}]
+    assert pipeline[-1]["$project"]["name_key"] == 1
+
+    after = search_pipeline("u1", "quart", "prefix", COLLECTION_SUMMARY_STAGES, 10, encode_cursor("quarterly", "c9"))
+    assert after[0]["$match"]["$and"][1] == {"$or": [{"name_key": {"$gt": "quarterly"}}, {"name_key": "quarterly", "id": {"$gt": "c9"}}]}
+
+    with pytest.raises(ValueError):
+        search_pipeline("u1", "   ", "prefix", COLLECTION_SUMMARY_STAGES, 10, None)
+
+
+def test_text_pipeline_pages_by_relevance():
+    pipeline = search_pipeline("u1", "churn", "text", REVIEW_SUMMARY_STAGES, 10, encode_cursor(-1.5, "r3"))
+
+    assert pipeline[0] == {"$match": {"user_id": "u1", "$text": {"$search": "churn"}}}
+    assert pipeline[1] == {"$addFields": {"search_rank": {"$multiply": [{"$meta": "textScore"}, -1]}}}
+    assert pipeline[2]["$match"]["$or"][1] == {"search_rank": -1.5, "id": {"$gt": "r3"}}
+    assert pipeline[3] == {"$sort": {"search_rank": 1, "id": 1}}
+    # The summary lookup still runs only on the page.
+    assert pipeline[5:-1] == REVIEW_SUMMARY_STAGES[:-1]
+
+
+def test_search_reviews_returns_summaries_and_cursor(make_db, fake_cursor):
+    db = make_db()
+    docs = [
+        {"id": f"r{i}", "user_id": "u1", "name": f"Review {i}", "name_key": f"review {i}"}
+        for i in range(3)
+    ]
+    db.reviews_collection.aggregate = AsyncMock(return_value=fake_cursor(docs))
+
+    page = asyncio.run(db.search_reviews("u1", "rev", limit=2))
+
+    assert [item.id for item in page.items] == ["r0", "r1"]
+    assert decode_cursor(page.next_cursor) == ["review 1", "r1"]
+
+
+def test_writes_store_name_key(make_db):
+    db = make_db()
+    db.reviews_collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id="x"))
+    db.collections_collection.update_one = AsyncMock(return_value=MagicMock(matched_count=1))
+
+    asyncio.run(db.create_review(Review(id="r1", user_id="u1", name="Churn  Analysis")))
+    asyncio.run(db.patch_collection("c1", CollectionPatch(collection_name="Q3 Accounts")))
+
+    assert db.reviews_collection.insert_one.call_args.args[0]["name_key"] == "churn analysis"
+    update = db.collections_collection.update_one.call_args.args[1]
+    assert update["$set"] == {"collection_name": "Q3 Accounts", "name_key": "q3 accounts"}
+
+
+def test_backfill_name_keys(make_db, fake_cursor):
+    db = make_db()
+    db.reviews_collection.find = MagicMock(return_value=fake_cursor([{"_id": 1, "name": "A"}, {"_id": 2, "name": "B"}]))
+    db.reviews_collection.bulk_write = AsyncMock(return_value=MagicMock(modified_count=2))
+    db.collections_collection.find = MagicMock(return_value=fake_cursor([]))
+    db.collections_collection.bulk_write = AsyncMock()
+
+    assert asyncio.run(db.backfill_name_keys()) == {"reviews": 2, "collections": 0}
+    assert db.reviews_collection.find.call_args.args == ({"name_key": {"$exists": False}}, {"_id": 1, "name": 1})
+    db.collections_collection.bulk_write.assert_not_awaited()
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_search_endpoints(mock_db):
+    mock_db.search_reviews.return_value = Page[ReviewSummary](items=[ReviewSummary(id="r1", user_id="u1", name="Churn")])
+
+    response = client.get("/reviews/search", params={"user_id": "u1", "q": "churn", "mode": "text"})
+    assert response.status_code == 200
+    assert response.json()["items"][0]["id"] == "r1"
+    mock_db.search_reviews.assert_awaited_with("u1", "churn", mode="text", limit=100, after=None)
+
+    mock_db.search_collections.side_effect = ValueError("Invalid pagination cursor")
+    assert client.get("/collections/search", params={"user_id": "u1", "q": "q", "after": "x"}).status_code == 400
+    assert client.get("/reviews/search", params={"q": "churn"}).status_code == 422
+    assert client.get("/reviews/search", params={"user_id": "u1", "q": "c", "mode": "fuzzy"}).status_code == 422
@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from fastapi.testclient import TestClient
+
+from main import app
+from src.models import Page, ReviewSummary
+from src.pagination import encode_cursor
+
+client = TestClient(app)
+
+
+def test_review_summaries_project_on_server(make_db, fake_cursor):
+    db = make_db()
+    db.reviews_collection.aggregate = AsyncMock(return_value=fake_cursor([
+        {"id": "r1", "user_id": "u1", "name": "One", "result_count": 3, "run_count": 2},
+        {"id": "r2", "user_id": "u1", "name": "Two"},
+    ]))
+
+    page = asyncio.run(db.list_review_summaries("u1", limit=1, after=encode_cursor("r0")))
+
+    pipeline = db.reviews_collection.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"user_id": "u1", "id": {"$gt": "r0"}}}
+    assert pipeline[2] == {"$limit": 2}
+    projection = pipeline[-1]["$project"]
+    assert "results" not in projection and "runs" not in projection
+    assert [s.id for s in page.items] == ["r1"]
+    assert page.items[0].run_count == 2
+    assert page.next_cursor == encode_cursor("r1")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_review_summaries_route_is_not_shadowed(mock_db):
+    mock_db.list_review_summaries.return_value = Page[ReviewSummary](
+        items=[ReviewSummary(id="r1", user_id="u1", name="One", result_count=5)]
+    )
+
+    response = client.get("/reviews/summaries", params={"user_id": "u1"})
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["result_count"] == 5
+    mock_db.get_review.assert_not_awaited()
+
+
+def test_user_dashboard_is_one_aggregation(make_db, fake_cursor):
+    db = make_db()
+    db.users_collection.aggregate = AsyncMock(return_value=fake_cursor([{
+        "id": "u1", "name": "U", "email": "u@x", "password": "p",
+        "collection_summaries": [{"id": "c1", "user_id": "u1", "collection_name": "C", "document_count": 4}],
+        "review_summaries": [
+            {"id": "r1", "user_id": "u1", "name": "One", "run_count": 2},
+            {"id": "r2", "user_id": "u1", "name": "Two"},
+        ],
+    }]))
+
+    dashboard = asyncio.run(db.get_user_dashboard("u1", limit=1))
+
+    db.users_collection.aggregate.assert_awaited_once()
+    pipeline = db.users_collection.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"id": "u1"}}
+    lookups = [stage["$lookup"] for stage in pipeline if "$lookup" in stage]
+    assert [lookup["from"] for lookup in lookups] == ["collections", "reviews"]
+    assert all({"$limit": 2} in lookup["pipeline"] for lookup in lookups)
+    assert dashboard.user.id == "u1"
+    assert [c.document_count for c in dashboard.collections.items] == [4]
+    assert dashboard.collections.next_cursor is None
+    assert [r.id for r in dashboard.reviews.items] == ["r1"]
+    assert dashboard.reviews.next_cursor == encode_cursor("r1")
+
+
+@patch("main.db", new_callable=AsyncMock)
+def test_user_dashboard_endpoint(mock_db):
+    mock_db.get_user_dashboard.return_value = None
+
+    assert client.get("/users/missing/dashboard").status_code == 404
+    mock_db.get_user_dashboard.assert_awaited_once_with("missing", limit=100)